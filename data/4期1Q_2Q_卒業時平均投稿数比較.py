@@ -20,6 +20,9 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+from 名前正規化 import normalize_name
+from 期カレンダー import assign_term_quarter
+
 # 入力パス
 BASE = Path(__file__).parent.parent
 INPUT_PATH = BASE / "コミットプラン (4).xlsx"
@@ -96,18 +99,6 @@ GRADUATES_4Q2Q = {
 }
 
 
-def normalize_name(name):
-    """名前を正規化（全角スペース→半角スペース、小文字化など）"""
-    if pd.isna(name):
-        return ""
-    s = str(name).strip()
-    # 全角スペースを半角スペースに統一
-    s = s.replace("　", " ")
-    # 小文字化
-    s = s.lower()
-    return s
-
-
 def to_num(val):
     """数値に変換"""
     if pd.isna(val):
@@ -305,11 +296,8 @@ def main():
         for period, grad_names in all_graduates.items():
             for grad_name in grad_names:
                 grad_name_norm = normalize_name(grad_name)
-                # 完全一致または、grad_nameがnameに含まれる（括弧内の情報を除く）
-                name_clean = name.split("（")[0].split("(")[0].strip()
-                grad_name_clean = grad_name_norm.split("（")[0].split("(")[0].strip()
-                
-                if grad_name_clean == name_clean or grad_name_clean in name_clean:
+                # 完全一致または、grad_nameがnameに含まれる（括弧内の情報は正規化で除去済み）
+                if grad_name_norm == name or grad_name_norm in name:
                     matched_period = period
                     matched_grad_name = grad_name
                     break
@@ -364,10 +352,8 @@ def main():
     
     result_df = pd.DataFrame(results)
     
-    # 4期1Qと4期2Qに分類
-    result_df["期"] = result_df["卒業月"].apply(
-        lambda x: "4期1Q" if x in ["2025-08", "2025-09", "2025-10"] else "4期2Q"
-    )
+    # 4期1Qと4期2Qに分類（期カレンダーで一括付与）
+    result_df["期"] = assign_term_quarter(result_df["卒業月"])["期Q"]
     
     # 4期1Qと4期2Qを分離
     q1_df = result_df[result_df["期"] == "4期1Q"].copy()
@@ -8,9 +8,11 @@ KGI「生徒一人当たり全期間合計平均投稿数」を、
 - プレミアムプラス：PP_Rawdata の「合計投稿数」
 ※有効な数値が入っている生徒のみで平均を算出
 """
-import pandas as pd
+import sys
 from pathlib import Path
 
+import pandas as pd
+
 BASE = Path(__file__).parent
 INPUT_PATH = BASE / "［最新版］mg_monthly_analysis_results_v1.1.xlsx"
 REPORT_PATH = BASE.parent / "分析結果" / "KGI_全期間合計平均投稿数_コミットとPP.md"
@@ -25,20 +27,29 @@ def to_num(val):
         return None
 
 
-def main():
+def compute_kgi(df_cc, df_pp):
+    """コミットRawdata（header=0）・PP_Rawdata（header=2）の表 → (平均, 対象人数) をコース別に返す"""
     # コミット
-    df_cc = pd.read_excel(INPUT_PATH, sheet_name="コミットRawdata", header=0)
     cc_total = df_cc["現在投稿数合計"].map(to_num)
     valid_cc = cc_total.notna()
     n_cc = valid_cc.sum()
     avg_cc = round(cc_total[valid_cc].mean(), 2) if n_cc else 0
 
     # プレミアムプラス
-    df_pp = pd.read_excel(INPUT_PATH, sheet_name="PP_Rawdata", header=2)
     pp_total = df_pp["合計投稿数"].map(to_num)
     valid_pp = pp_total.notna()
     n_pp = valid_pp.sum()
     avg_pp = round(pp_total[valid_pp].mean(), 2) if n_pp else 0
+    return {"コミット": (avg_cc, n_cc), "プレミアムプラス": (avg_pp, n_pp)}
+
+
+def main(input_path=None):
+    input_path = input_path or INPUT_PATH
+    df_cc = pd.read_excel(input_path, sheet_name="コミットRawdata", header=0)
+    df_pp = pd.read_excel(input_path, sheet_name="PP_Rawdata", header=2)
+    kgi = compute_kgi(df_cc, df_pp)
+    avg_cc, n_cc = kgi["コミット"]
+    avg_pp, n_pp = kgi["プレミアムプラス"]
 
     # レポート
     report = f"""# KGI：生徒一人当たり全期間合計平均投稿数
@@ -68,7 +79,8 @@ def main():
     print("【KGI 生徒一人当たり全期間合計平均投稿数】")
     print(f"  コミット：{avg_cc}本（{n_cc}人）")
     print(f"  プレミアムプラス：{avg_pp}本（{n_pp}人）")
+    return kgi
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
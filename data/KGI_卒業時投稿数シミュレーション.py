@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+KGI「卒業時平均投稿数 80」をどのくらいの確率で達成できるかをモンテカルロで見積もる。
+
+卒業生の「新 月次投稿数」から ヶ月目ごとの投稿数の分布を作り、在学中の生徒の残りの月を
+（生徒 × 試行）の配列でまとめてサンプリングして、卒業時投稿数と平均の分布を出す。
+10万試行でも数秒で終わるよう、試行は CHUNK_DRAWS ずつのブロックに分けて配列演算する
+（--workers 2 以上ならブロックをプロセスプールに分けて並列に回す）。
+
+【モデル】
+- k ヶ月目の投稿数の分布 = 卒業生の k ヶ月目の実績（「ー」・空欄は 0。卒業時投稿数の定義と同じ）
+- 1ヶ月目以降は前月に投稿があったか（>0）で分布を分ける（止まった生徒は止まり続けやすい）。
+  どちらかの件数が MIN_POOL 未満の月は分けずに k ヶ月目全体から引く
+- 在学中の生徒: 基準日（--as-of。省略時は今日）の月より前の月で投稿数が入っている月は実績をそのまま使い、
+  残りの月をサンプリング
+- 卒業生・在学中の 0m〜6m・初回セッション日は 特徴量ストア.py の版から読む（--version。省略時は今の Excel の版）
+
+【出力】
+- 在学中の生徒の卒業時平均投稿数の分布（平均・分位点・80以上になる確率）
+- 卒業生（実績）と在学中（シミュレーション）を合わせた卒業時平均投稿数の分布
+- 生徒別の卒業時投稿数の期待値・80以上になる確率
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import コミットプラン読込
+import 特徴量ストア
+from コミットプラン読込 import MONTH_LABELS
+
+OUTPUT_PATH = Path(__file__).parent / "KGI_卒業時投稿数シミュレーション結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "KGI_卒業時投稿数シミュレーション.md"
+
+KGI_TARGET = 80
+DEFAULT_DRAWS = 100_000
+CHUNK_DRAWS = 10_000
+MIN_POOL = 20  # 前月の状態で分けたときの最低件数
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+HIST_BIN = 2  # 平均投稿数の分布表の刻み
+
+
+def fit_pools(history):
+    """卒業生の 0m〜6m（生徒 × 7 の配列）→ k ヶ月目ごとの (前月に投稿なし, 前月に投稿あり) の実績の配列"""
+    history = np.nan_to_num(history)
+    pools = []
+    for k in range(history.shape[1]):
+        values = history[:, k]
+        if k == 0:
+            pools.append((values, values))
+            continue
+        active = history[:, k - 1] > 0
+        idle_pool, active_pool = values[~active], values[active]
+        if len(idle_pool) < MIN_POOL or len(active_pool) < MIN_POOL:
+            idle_pool = active_pool = values
+        pools.append((idle_pool, active_pool))
+    return pools
+
+
+def simulate_totals(pools, observed, draws, seed):
+    """在学中の生徒の卒業時投稿数を draws 回サンプリング → (生徒, draws) の配列。
+    observed は (生徒, 7) で、実績がある月は値、サンプリングする月は NaN"""
+    rng = np.random.default_rng(seed)
+    fixed = ~np.isnan(observed)
+    totals = np.zeros((observed.shape[0], draws))
+    prev = np.zeros_like(totals)
+    for k, (idle_pool, active_pool) in enumerate(pools):
+        idle = idle_pool[rng.integers(0, len(idle_pool), size=totals.shape)]
+        active = active_pool[rng.integers(0, len(active_pool), size=totals.shape)]
+        sampled = np.where(prev > 0, active, idle)
+        month = np.where(fixed[:, k, None], observed[:, k, None], sampled)
+        totals += month
+        prev = month
+    return totals
+
+
+def summarize_chunk(pools, observed, draws, seed, graduate_sum, graduate_n):
+    """1ブロック分の試行 → 在学中平均・全体平均（各 draws 個）と、生徒別の合計・80以上の回数"""
+    totals = simulate_totals(pools, observed, draws, seed)
+    n = observed.shape[0]
+    in_progress = totals.mean(axis=0) if n else np.full(draws, np.nan)
+    combined = (graduate_sum + totals.sum(axis=0)) / max(graduate_n + n, 1)
+    return in_progress, combined, totals.sum(axis=1), (totals >= KGI_TARGET).sum(axis=1)
+
+
+def run(pools, observed, graduate_sum, graduate_n, draws=DEFAULT_DRAWS, seed=0, workers=1):
+    """draws 回の試行を CHUNK_DRAWS ずつに分けて実行し、結果をまとめる"""
+    sizes = [CHUNK_DRAWS] * (draws // CHUNK_DRAWS)
+    if draws % CHUNK_DRAWS:
+        sizes.append(draws % CHUNK_DRAWS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(pools, observed, size, s, graduate_sum, graduate_n) for size, s in zip(sizes, seeds)]
+    if workers == 1 or len(args) <= 1:
+        parts = [summarize_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(summarize_chunk, *zip(*args)))
+    in_progress = np.concatenate([p[0] for p in parts])
+    combined = np.concatenate([p[1] for p in parts])
+    student_sum = np.sum([p[2] for p in parts], axis=0)
+    student_hits = np.sum([p[3] for p in parts], axis=0)
+    return in_progress, combined, student_sum / draws, student_hits / draws
+
+
+def load_inputs(features, as_of):
+    """特徴量（特徴量ストア.load の結果）→ 卒業生の 0m〜6m（数値）・卒業生の表と、
+    在学中の生徒（no.・生徒名・担当MG・初回セッション日・実績として使う 0m〜6m）"""
+    commit = 特徴量ストア.course_frame(features, "コミット").rename(columns={"ソースキー": "no."})
+    is_graduate = commit["卒業"] == 1
+    graduates = commit[is_graduate].reset_index(drop=True)
+    history = graduates[MONTH_LABELS].to_numpy(dtype=float)
+    students = commit[~is_graduate & (commit["在学"] == コミットプラン読込.ENROLLED_STATUS)].reset_index(drop=True)
+
+    # 基準日の月より前（終わった月）で値が入っている月だけ実績として固定する
+    start = pd.PeriodIndex(pd.to_datetime(students["初回セッション日"]), freq="M")
+    start_ord = np.where(start.isna(), np.iinfo(np.int64).min, start.asi8)
+    calendar = start_ord[:, None] + np.arange(len(MONTH_LABELS))[None, :]
+    closed = calendar < pd.Period(as_of, freq="M").ordinal
+    posts = students[MONTH_LABELS].to_numpy(dtype=float)
+    observed = np.where(closed, posts, np.nan)
+    return history, graduates, students, observed
+
+
+def distribution_table(values):
+    """平均投稿数の分布（HIST_BIN 刻みの度数と割合）。値がなければ空の表"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return pd.DataFrame(columns=["下限", "上限", "試行数", "割合%"])
+    lo = np.floor(values.min() / HIST_BIN) * HIST_BIN
+    hi = np.ceil(values.max() / HIST_BIN) * HIST_BIN + HIST_BIN
+    counts, edges = np.histogram(values, bins=np.arange(lo, hi + HIST_BIN, HIST_BIN))
+    return pd.DataFrame({
+        "下限": edges[:-1],
+        "上限": edges[1:],
+        "試行数": counts,
+        "割合%": np.round(100 * counts / len(values), 2),
+    })[lambda d: d["試行数"] > 0]
+
+
+def summary_row(label, values):
+    q = np.quantile(values, QUANTILES)
+    row = {"対象": label, "試行数": len(values), "平均": round(float(values.mean()), 2)}
+    row.update({f"{int(p * 100)}%点": round(float(v), 2) for p, v in zip(QUANTILES, q)})
+    row[f"{KGI_TARGET}以上の確率%"] = round(float((values >= KGI_TARGET).mean() * 100), 2)
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="卒業時平均投稿数 80 の達成確率をモンテカルロで見積もる")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--survey", type=Path, default=特徴量ストア.SURVEY_PATH, help="卒業時アンケートの xlsx（生徒IDの名寄せ）")
+    parser.add_argument("--claims", type=Path, default=特徴量ストア.CLAIM_PATH, help="クレーム対応の xlsx（生徒IDの名寄せ）")
+    parser.add_argument("--version", default=None, help="特徴量ストアの版（既定: 今の Excel の版）")
+    parser.add_argument("--as-of", default=None, help="基準日。この月より前の月の実績を固定（既定: 今日。--version 指定時はその版の基準日）")
+    parser.add_argument("--draws", type=int, default=DEFAULT_DRAWS, help=f"試行回数（既定: {DEFAULT_DRAWS}）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="プロセス数（既定: 1。0 なら CPU数）")
+    parser.add_argument("--store", type=Path, default=特徴量ストア.STORE_DIR, help="特徴量ストアのフォルダ")
+    parser.add_argument("--output-dir", type=Path, default=None, help="出力先フォルダ（既定: data/ と 分析結果/）")
+    args = parser.parse_args(argv)
+    output_path = args.output_dir / OUTPUT_PATH.name if args.output_dir else OUTPUT_PATH
+    report_path = args.output_dir / REPORT_PATH.name if args.output_dir else REPORT_PATH
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    workers = args.workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    features, record = 特徴量ストア.load_or_build(
+        args.version, args.commit_plan, args.mg_results, args.store, as_of=args.as_of,
+        survey_path=args.survey, claim_path=args.claims)
+    # 基準日の月はまだ途中なので、その月から先をサンプリングする（特徴量も同じ基準日で作る）
+    as_of = pd.Timestamp(args.as_of or record["基準日"])
+    history, graduates, students, observed = load_inputs(features, as_of)
+    t_load = time.perf_counter() - t0
+    pools = fit_pools(history)
+    graduate_sum = float(graduates["卒業時投稿数"].sum())
+    in_progress, combined, expected, hit_rate = run(
+        pools, observed, graduate_sum, len(graduates), args.draws, args.seed, workers)
+    t_sim = time.perf_counter() - t0 - t_load
+
+    summary = pd.DataFrame([
+        summary_row(f"在学中（{len(students)}名）", in_progress),
+        summary_row(f"卒業生＋在学中（{len(graduates) + len(students)}名）", combined),
+    ])
+    per_student = students[["no.", "生徒名", "担当MG", "初回セッション日"]].copy()
+    per_student["初回セッション日"] = pd.to_datetime(per_student["初回セッション日"]).dt.strftime("%Y-%m-%d")
+    per_student["実績の月数"] = (~np.isnan(observed)).sum(axis=1)
+    per_student["実績投稿数"] = np.nansum(observed, axis=1)
+    per_student["卒業時投稿数_期待値"] = np.round(expected, 1)
+    per_student[f"{KGI_TARGET}以上の確率%"] = np.round(hit_rate * 100, 1)
+    per_student = per_student.sort_values("卒業時投稿数_期待値", ascending=False).reset_index(drop=True)
+    pool_stats = pd.DataFrame([
+        {"ヶ月目": MONTH_LABELS[k], "前月投稿なし_件数": len(idle), "前月投稿なし_平均": round(float(idle.mean()), 2),
+         "前月投稿あり_件数": len(active), "前月投稿あり_平均": round(float(active.mean()), 2)}
+        for k, (idle, active) in enumerate(pools)
+    ])
+
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
+        summary.to_excel(w, sheet_name="サマリ", index=False)
+        distribution_table(in_progress).to_excel(w, sheet_name="分布_在学中", index=False)
+        distribution_table(combined).to_excel(w, sheet_name="分布_卒業生＋在学中", index=False)
+        per_student.to_excel(w, sheet_name="生徒別", index=False)
+        pool_stats.to_excel(w, sheet_name="月別分布", index=False)
+
+    cols = list(summary.columns)
+    report_lines = [
+        f"# KGI 卒業時平均投稿数 {KGI_TARGET} シミュレーション（基準日: {as_of:%Y-%m-%d}）",
+        "",
+        f"- **試行回数**: {args.draws:,}（seed {args.seed}）",
+        f"- **特徴量**: {record['version']}（{record['基準日']} 時点）",
+        f"- **卒業生（実績）**: {len(graduates)}名・平均 {graduates['卒業時投稿数'].mean():.2f}投稿",
+        "",
+        "## 卒業時平均投稿数の分布",
+        "",
+        "| " + " | ".join(cols) + " |",
+        "|" + "|".join("------" for _ in cols) + "|",
+    ]
+    for _, row in summary.iterrows():
+        report_lines.append("| " + " | ".join(str(row[c]) for c in cols) + " |")
+    report_lines.extend([
+        "",
+        "## ヶ月目ごとの分布（卒業生の実績）",
+        "",
+        "| ヶ月目 | 前月投稿なし（件数・平均） | 前月投稿あり（件数・平均） |",
+        "|--------|--------------------------|--------------------------|",
+    ])
+    for _, row in pool_stats.iterrows():
+        report_lines.append(
+            f"| {row['ヶ月目']} | {row['前月投稿なし_件数']}件・{row['前月投稿なし_平均']} | "
+            f"{row['前月投稿あり_件数']}件・{row['前月投稿あり_平均']} |")
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **卒業生・在学中**: `コミットプラン (4).xlsx`「新 月次投稿数」（在学=在学中、卒業生は除く）",
+        "- **分布**: 卒業生の k ヶ月目の実績（「ー」は 0）。1ヶ月目以降は前月の投稿の有無で分ける"
+        f"（どちらかが {MIN_POOL} 件未満の月は分けない）",
+        "- **在学中の実績**: 基準日の月より前で値が入っている月は固定、残りの月をサンプリング",
+        "",
+        "---",
+        "*出力: KGI_卒業時投稿数シミュレーション.py*",
+    ])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
+    print()
+    print(f"【KGI 卒業時平均投稿数 {KGI_TARGET} シミュレーション】{args.draws:,}試行 "
+          f"（読込 {t_load:.1f}秒 / 計算 {t_sim:.1f}秒・{workers}プロセス）")
+    for _, row in summary.iterrows():
+        print(f"  {row['対象']}: 平均 {row['平均']} / 中央値 {row['50%点']} / "
+              f"{KGI_TARGET}以上 {row[f'{KGI_TARGET}以上の確率%']}%")
+    return summary
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
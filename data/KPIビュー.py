@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+KGI・KPI の見出し数値を、コース × 月 × 担当MG ごとの件数・合計（集計済みビュー）として
+分析DB（分析DB.sqlite）に持ち、差分だけで更新する。
+
+これまで次のスクリプトがそれぞれシート全体を読み直して出していた数値を、1か所にまとめる:
+- KGI_全期間合計平均投稿数_コミットとPP.py          → 指標「全期間合計投稿数」（月 = 全期間）
+- 卒業生_卒業時投稿数_集計.py                       → 指標「卒業時投稿数」コース=コミット（月 = 卒業月。卒業の定義は コミットプラン読込.py）
+- プレミアムプラス_卒業生_月次平均卒業時投稿数_集計.py → 指標「卒業時投稿数」コース=プレミアムプラス（月 = 卒業月）
+
+【テーブル】
+- KPI_明細 : 生徒1人 × 指標 の値（前回の更新時点。差分の検出用）
+- KPI_集計 : 指標 × コース × 月 × 担当MG の 件数・合計・二乗和（集計済みビュー）
+- KPI_累計 : KPI_集計 を月順に積み上げた「その月までの全体」（ビュー）
+- KPI_入力 : 入力のブックごとの内容ハッシュ（前回の更新時点）
+
+【生徒キー】行の挿入・並べ替えでずれないよう、行番号ではなく
+- コミット: no.（no. がない行は正規化した生徒名）
+- PP      : 正規化した名前（再登録で同じ名前が複数行あるときは上から「#2」「#3」…）
+名前も no. もない行は「CC値:」「PP値:」+ 担当MG・値（・6回目実施日）。同じキーの2件目からは「#2」…
+
+【差分更新】
+1. 入力のブックの内容ハッシュが KPI_入力 と同じなら、そのブックは読まない（SOURCES の指標は前回のまま）
+2. 変わったブックの指標だけ、今回の明細と KPI_明細 を生徒キーで突き合わせ、
+   追加・変更・削除された生徒の分だけ KPI_集計 の件数・合計を加減する（変更のない生徒には触れない）
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import PP_Rawdata読込
+import コミットプラン読込
+from スナップショット保存 import file_sha256
+from 分析DB import DB_PATH, MG_RESULTS_PATH
+from 名前正規化 import normalize_names
+
+ALL_PERIOD = "全期間"
+NO_MG = "（未設定）"
+UNKNOWN_MONTH = "不明"  # 月順の並びで最後に来る
+FACT_KEYS = ["指標", "コース", "生徒キー"]
+GROUP_KEYS = ["指標", "コース", "月", "担当MG"]
+MIN_NAME_LENGTH = 2
+# 入力のブック → そのブックから作る指標 × コース
+SOURCES = {
+    "mg_results": [("全期間合計投稿数", "コミット"), ("全期間合計投稿数", "プレミアムプラス"),
+                   ("卒業時投稿数", "プレミアムプラス")],
+    "コミットプラン": [("卒業時投稿数", "コミット")],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "KPI_明細" (
+    "指標" TEXT NOT NULL, "コース" TEXT NOT NULL, "生徒キー" TEXT NOT NULL,
+    "月" TEXT NOT NULL, "担当MG" TEXT NOT NULL, "値" REAL NOT NULL,
+    PRIMARY KEY ("指標", "コース", "生徒キー")
+);
+CREATE TABLE IF NOT EXISTS "KPI_集計" (
+    "指標" TEXT NOT NULL, "コース" TEXT NOT NULL, "月" TEXT NOT NULL, "担当MG" TEXT NOT NULL,
+    "件数" INTEGER NOT NULL, "合計" REAL NOT NULL, "二乗和" REAL NOT NULL,
+    PRIMARY KEY ("指標", "コース", "月", "担当MG")
+);
+CREATE TABLE IF NOT EXISTS "KPI_入力" (
+    "入力" TEXT PRIMARY KEY, "ハッシュ" TEXT NOT NULL
+);
+CREATE VIEW IF NOT EXISTS "KPI_累計" AS
+SELECT "指標", "コース", "月", "担当MG", "件数", "合計",
+       SUM("件数") OVER w AS "累計件数",
+       SUM("合計") OVER w AS "累計合計",
+       ROUND(SUM("合計") OVER w * 1.0 / NULLIF(SUM("件数") OVER w, 0), 2) AS "累計平均"
+FROM "KPI_集計"
+WINDOW w AS (PARTITION BY "指標", "コース", "担当MG" ORDER BY "月"
+             ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW);
+"""
+
+
+def fact_frame(metric, course, keys, months, mgs, values):
+    """指標の明細（生徒1人1行）。months=None は全期間。値が数値でない生徒は除外"""
+    keys = pd.Series(keys).astype(str).to_numpy()
+    if months is None:
+        months = [ALL_PERIOD] * len(keys)
+    df = pd.DataFrame({
+        "指標": metric,
+        "コース": course,
+        "生徒キー": keys,
+        "月": pd.Series(months, dtype=object).fillna(ALL_PERIOD).astype(str).to_numpy(),
+        "担当MG": pd.Series(mgs, dtype=object).fillna(NO_MG).astype(str).to_numpy(),
+        "値": pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(),
+    })
+    return df[df["値"].notna()]
+
+
+def student_keys(primary, fallback):
+    """生徒キー: primary（no.・正規化名。欠損可）、なければ fallback（行の値）。同じキーの2件目からは「#2」…を付ける"""
+    base = pd.Series(primary, dtype="string").reset_index(drop=True)
+    base = base.fillna(pd.Series(fallback, dtype="string").reset_index(drop=True))
+    nth = base.groupby(base).cumcount()
+    return base.where(nth == 0, base + "#" + (nth + 1).astype(str)).astype(str)
+
+
+def name_keys(names, prefix):
+    """名前 → prefix + 正規化名（MIN_NAME_LENGTH 文字未満は欠損）"""
+    normalized = pd.Series(normalize_names(names), dtype="string")
+    return (prefix + normalized).where(normalized.str.len() >= MIN_NAME_LENGTH)
+
+
+def collect_facts(commit_raw=None, pp_raw=None, graduates=None):
+    """
+    各シートから明細を作る（元スクリプトと同じく、名前の有無で行を絞らない）。
+    commit_raw: コミットRawdata（header=0）, pp_raw: PP_Rawdata（header=2）,
+    graduates: コミットプラン読込.load_graduates の結果（None のシートの指標は作らない）
+    """
+    facts = []
+    if commit_raw is not None:
+        cc_no = コミットプラン読込.to_no_series(commit_raw["no."]).astype("Int64")
+        cc_mg = PP_Rawdata読込.clean_text(commit_raw["Unnamed: 6"])
+        cc_total = コミットプラン読込.to_num_series(commit_raw["現在投稿数合計"])
+        cc_keys = student_keys(("no." + cc_no.astype("string")).fillna(name_keys(commit_raw["生徒名"], "名:")),
+                               "CC値:" + cc_mg.fillna("") + "|" + cc_total.map(str))
+        facts.append(fact_frame("全期間合計投稿数", "コミット", cc_keys, None, cc_mg, cc_total))
+    if pp_raw is not None:
+        pp_mg = PP_Rawdata読込.clean_text(pp_raw["担当MG"])
+        pp_total = コミットプラン読込.to_num_series(pp_raw["合計投稿数"])
+        pp_keys = student_keys(name_keys(pp_raw["名前"], "名:"),
+                               "PP値:" + pp_mg.fillna("") + "|" + pp_total.map(str) + "|"
+                               + pp_raw["6回目実施日"].map(str))
+        # 卒業＝6回目実施日あり。日付として読めない値は卒業月「不明」
+        is_grad = pp_raw["6回目実施日"].notna().to_numpy()
+        pp_grad_month = pd.to_datetime(pp_raw["6回目実施日"], errors="coerce").dt.strftime("%Y-%m").fillna(
+            UNKNOWN_MONTH)
+        facts.append(fact_frame("全期間合計投稿数", "プレミアムプラス", pp_keys, None, pp_mg, pp_total))
+        facts.append(fact_frame("卒業時投稿数", "プレミアムプラス", pp_keys[is_grad],
+                                pp_grad_month[is_grad], pp_mg[is_grad], pp_total[is_grad]))
+    if graduates is not None:
+        facts.append(fact_frame("卒業時投稿数", "コミット", "no." + graduates["no."].astype(str),
+                                graduates["卒業月"], graduates["担当MG"], graduates["卒業時投稿数"]))
+    if not facts:
+        return pd.DataFrame(columns=FACT_KEYS + ["月", "担当MG", "値"])
+    return pd.concat(facts, ignore_index=True)
+
+
+def input_paths(commit_path=None, mg_results_path=None):
+    """SOURCES の入力名 → ブックのパス"""
+    return {"mg_results": Path(mg_results_path or MG_RESULTS_PATH),
+            "コミットプラン": Path(commit_path or コミットプラン読込.INPUT_PATH)}
+
+
+def load_facts(commit_path=None, mg_results_path=None, sources=tuple(SOURCES)):
+    """Excel から明細を作る（sources のブックだけ読む）"""
+    paths = input_paths(commit_path, mg_results_path)
+    commit_raw = pp_raw = graduates = None
+    if "mg_results" in sources:
+        commit_raw = pd.read_excel(paths["mg_results"], sheet_name="コミットRawdata", header=0)
+        pp_raw = pd.read_excel(paths["mg_results"], sheet_name=PP_Rawdata読込.SHEET, header=PP_Rawdata読込.HEADER_ROW)
+    if "コミットプラン" in sources:
+        graduates = コミットプラン読込.load_graduates(paths["コミットプラン"])
+    return collect_facts(commit_raw, pp_raw, graduates)
+
+
+def changed_sources(hashes, path=None):
+    """入力名 → 内容ハッシュ のうち、KPI_入力（前回の更新時点）と違うものの入力名"""
+    if not Path(path or DB_PATH).exists():
+        return list(hashes)
+    con = sqlite3.connect(str(path or DB_PATH))
+    try:
+        con.executescript(SCHEMA)
+        stored = dict(con.execute('SELECT "入力", "ハッシュ" FROM "KPI_入力"').fetchall())
+    finally:
+        con.close()
+    return [name for name, digest in hashes.items() if stored.get(name) != digest]
+
+
+def diff_facts(old, new):
+    """前回・今回の明細 → (件数・合計の増減, 削除する生徒キー, 追加・更新する明細)"""
+    merged = old.merge(new, on=FACT_KEYS, how="outer", suffixes=("_旧", "_新"), indicator=True)
+    same = (
+        (merged["_merge"] == "both")
+        & (merged["月_旧"] == merged["月_新"])
+        & (merged["担当MG_旧"] == merged["担当MG_新"])
+        & (merged["値_旧"] == merged["値_新"])
+    )
+    changed = merged[~same]
+    had_old = changed["_merge"] != "right_only"
+    has_new = changed["_merge"] != "left_only"
+
+    removed = changed[had_old].rename(columns={"月_旧": "月", "担当MG_旧": "担当MG", "値_旧": "値"})
+    added = changed[has_new].rename(columns={"月_新": "月", "担当MG_新": "担当MG", "値_新": "値"})
+    delta = pd.concat([
+        removed[GROUP_KEYS + ["値"]].assign(符号=-1),
+        added[GROUP_KEYS + ["値"]].assign(符号=1),
+    ], ignore_index=True)
+    delta = (
+        delta.assign(件数=delta["符号"], 合計=delta["符号"] * delta["値"], 二乗和=delta["符号"] * delta["値"] ** 2)
+        .groupby(GROUP_KEYS, as_index=False)[["件数", "合計", "二乗和"]].sum()
+    )
+    upserts = added[FACT_KEYS + ["月", "担当MG", "値"]]
+    deletes = changed.loc[had_old & ~has_new, FACT_KEYS]
+    return delta, deletes, upserts
+
+
+def refresh(facts, path=None, full=False, hashes=None):
+    """明細で KPI_集計 を更新する。full=True なら作り直し。戻り値は (変更のあった生徒数, 所要秒)。
+    hashes（入力名 → 内容ハッシュ）を渡すと、その入力の指標だけを突き合わせ、ハッシュを KPI_入力 に残す"""
+    t0 = time.perf_counter()
+    con = sqlite3.connect(str(path or DB_PATH))
+    try:
+        if full:
+            con.executescript('DROP VIEW IF EXISTS "KPI_累計"; DROP TABLE IF EXISTS "KPI_明細"; '
+                              'DROP TABLE IF EXISTS "KPI_集計"; DROP TABLE IF EXISTS "KPI_入力";')
+        con.executescript(SCHEMA)
+        old = pd.read_sql_query('SELECT * FROM "KPI_明細"', con)
+        if hashes is not None:
+            # 読まなかったブックの指標は前回のまま（削除として扱わない）
+            pairs = pd.MultiIndex.from_tuples([pair for name in hashes for pair in SOURCES[name]])
+            old = old[pd.MultiIndex.from_frame(old[["指標", "コース"]]).isin(pairs)]
+        delta, deletes, upserts = diff_facts(old, facts)
+
+        con.executemany(
+            'INSERT INTO "KPI_集計" VALUES (?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT ("指標", "コース", "月", "担当MG") DO UPDATE SET '
+            '"件数" = "件数" + excluded."件数", "合計" = "合計" + excluded."合計", '
+            '"二乗和" = "二乗和" + excluded."二乗和"',
+            delta[GROUP_KEYS + ["件数", "合計", "二乗和"]].itertuples(index=False, name=None),
+        )
+        con.execute('DELETE FROM "KPI_集計" WHERE "件数" = 0')
+        con.executemany(
+            'DELETE FROM "KPI_明細" WHERE "指標" = ? AND "コース" = ? AND "生徒キー" = ?',
+            deletes.itertuples(index=False, name=None),
+        )
+        con.executemany(
+            'INSERT OR REPLACE INTO "KPI_明細" VALUES (?, ?, ?, ?, ?, ?)',
+            upserts.itertuples(index=False, name=None),
+        )
+        con.executemany('INSERT OR REPLACE INTO "KPI_入力" VALUES (?, ?)', (hashes or {}).items())
+        con.commit()
+    finally:
+        con.close()
+    return len(upserts) + len(deletes), time.perf_counter() - t0
+
+
+def read_view(sql, path=None, params=None):
+    con = sqlite3.connect(str(path or DB_PATH))
+    try:
+        return pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+
+def dashboard(path=None, months=None):
+    """
+    見出し数値をビューから返す。
+    - コース別: 指標 × コース の 人数・平均
+    - 月別: 卒業時投稿数の「当月卒業生のみ」と「その月までの全体」（months で絞り込み）
+    """
+    by_course = read_view(
+        'SELECT "指標", "コース", SUM("件数") AS "人数", ROUND(SUM("合計") * 1.0 / SUM("件数"), 2) AS "平均" '
+        'FROM "KPI_集計" GROUP BY "指標", "コース" ORDER BY "指標", "コース"', path)
+    monthly = read_view(
+        'SELECT "コース", "月", SUM("件数") AS "当月_人数", SUM("合計") AS "当月_合計" '
+        'FROM "KPI_集計" WHERE "指標" = \'卒業時投稿数\' GROUP BY "コース", "月" ORDER BY "コース", "月"', path)
+    grouped = monthly.groupby("コース")
+    monthly["当月_平均"] = (monthly["当月_合計"] / monthly["当月_人数"]).round(2)
+    monthly["全体_人数"] = grouped["当月_人数"].cumsum()
+    monthly["全体_平均"] = (grouped["当月_合計"].cumsum() / monthly["全体_人数"]).round(2)
+    monthly = monthly.drop(columns=["当月_合計"])
+    if months is not None:
+        monthly = monthly[monthly["月"].isin(months)]
+    return by_course, monthly.reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KGI/KPI の集計済みビューを差分更新する")
+    parser.add_argument("--db", type=Path, default=None, help="DBファイルのパス（既定: 分析DB.sqlite）")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--full", action="store_true", help="差分ではなく作り直す")
+    parser.add_argument("--months", nargs="*", default=["2025-11", "2025-12", "2026-01"], help="月別表示の対象月")
+    parser.add_argument("--xlsx", type=Path, default=None, help="コース別・月別の表を Excel に出力")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    hashes = {name: file_sha256(path) for name, path in input_paths(args.commit_plan, args.mg_results).items()}
+    sources = list(hashes) if args.full else changed_sources(hashes, args.db)
+    facts = load_facts(args.commit_plan, args.mg_results, sources)
+    n_changed = 0
+    if sources:
+        n_changed, _ = refresh(facts, args.db, full=args.full, hashes={name: hashes[name] for name in sources})
+    elapsed = time.perf_counter() - t0
+    by_course, monthly = dashboard(args.db, args.months)
+
+    if sources:
+        print(f"更新: {'・'.join(sources)} の明細 {len(facts)}件中 {n_changed}件が追加・変更・削除（{elapsed:.2f}秒）")
+    else:
+        print(f"更新: 入力のブックに変更なし（読込なし・{elapsed:.2f}秒）")
+    print()
+    print("【KGI/KPI コース別】")
+    for _, row in by_course.iterrows():
+        print(f"  {row['指標']} {row['コース']}：{row['平均']}本（{row['人数']}人）")
+    print()
+    print("【卒業時投稿数 月別】")
+    for _, row in monthly.iterrows():
+        print(f"  {row['コース']} {row['月']}  全体：{row['全体_平均']}投稿（{row['全体_人数']}人） / "
+              f"▼当月卒業生のみ：{row['当月_平均']}投稿（{row['当月_人数']}人）")
+    if args.xlsx:
+        args.xlsx.parent.mkdir(parents=True, exist_ok=True)
+        with pd.ExcelWriter(args.xlsx, engine="openpyxl") as w:
+            by_course.to_excel(w, sheet_name="コース別", index=False)
+            monthly.to_excel(w, sheet_name="卒業時投稿数_月別", index=False)
+        print(f"出力: {args.xlsx}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+担当MG別・チーム別のレポート（xlsx・md）を、MG・チームリーダーごとに1ファイルずつ出力する。
+
+全体の集計結果を手でフィルタする代わりに、卒業生・順位推移の表を 担当MG・チーム名 で分割し、
+プロセスプールで並列に書き出す。データの読み込みは親プロセスで1回だけ行い、
+各ワーカーには起動時に1回だけ渡す（タスクごとには MG・チーム名しか送らない）。
+
+【1ファイルの中身】
+- サマリ        : コミット卒業生・PP卒業生の人数と平均卒業時投稿数、直近の順位
+- コミット卒業生 : 生徒一覧（卒業月・卒業時投稿数・0m〜6m）
+- 推移          : 0m〜6m の平均投稿数（コミット卒業生）
+- PP卒業生      : 生徒一覧（卒業月・合計投稿数・1〜6回目の増加投稿数）
+- 順位推移      : 月ごとの増加投稿数（PPセッション）と MG間・チーム間の順位
+- チャット活発度 : チームのみ。チャットログがある場合（チーム別_3ヶ月投稿数とチャット活発度_集計.py と同じ数え方）
+
+【出力先】OUTPUT_DIR/MG/<担当MG>.xlsx・.md、OUTPUT_DIR/チーム/<チーム名>.xlsx・.md
+
+【使い方】
+    python MGチーム別レポート.py                 # CPU数のワーカーで並列
+    python MGチーム別レポート.py --workers 1     # 並列なし
+    python MGチーム別レポート.py --only チーム   # チーム別だけ
+    python MGチーム別レポート.py --exclude-anomalies  # 投稿数異常検知 の突出・マイナスの生徒を除く
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import PP_Rawdata読込
+import コミットプラン読込
+from コミットプラン読込 import MONTH_LABELS
+from 分析DB import MG_RESULTS_PATH
+
+OUTPUT_DIR = Path(__file__).parent / "MGチーム別レポート"
+
+KINDS = {"MG": "担当MG", "チーム": "チーム名"}
+PP_INCR_LABELS = [f"{n}回目増加" for n in range(1, PP_Rawdata読込.SESSION_COUNT + 1)]
+
+_SHARED = {}  # ワーカー内で共有する表（_init_worker で1回だけ受け取る）
+
+
+def safe_filename(name):
+    """ファイル名に使えない文字を置き換える"""
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", str(name)).strip("_") or "_"
+
+
+def ranking_history(pp_long, key):
+    """PPセッションの増加投稿数を key × 年月 で合計し、月ごとの順位を付ける"""
+    df = pp_long[pp_long[key].notna() & ~pp_long[key].isin(PP_Rawdata読込.PLACEHOLDER_GROUPS)]
+    df = df.assign(年月=df["実施日"].dt.strftime("%Y-%m"))
+    agg = df.groupby([key, "年月"], as_index=False)["増加投稿数"].sum()
+    agg["順位"] = agg.groupby("年月")["増加投稿数"].rank(ascending=False, method="min").astype(int)
+    agg["グループ数"] = agg.groupby("年月")[key].transform("size")
+    return agg.sort_values(["年月", "順位"]).reset_index(drop=True)
+
+
+def chat_activity():
+    """チーム名 → チャットログのブロック数・キーワード数（ログがあるチームのみ）"""
+    import チーム別_3ヶ月投稿数とチャット活発度_集計 as chat
+    rows = []
+    for team, filename in chat.TEAM_FILE_MAP.items():
+        path = chat.CHAT_DIR / filename
+        if path.exists():
+            counts = chat.count_chat_blocks_and_keywords(path)
+            rows.append({"チーム名": team, "チャット投稿ブロック数": counts["blocks"],
+                         "注意・依頼系キーワード出現数": counts["supervision"],
+                         "FB・振り返り系キーワード出現数": counts["feedback"]})
+    return pd.DataFrame(rows, columns=["チーム名", "チャット投稿ブロック数",
+                                       "注意・依頼系キーワード出現数", "FB・振り返り系キーワード出現数"])
+
+
+def load_tables(commit_path=None, mg_results_path=None, exclude_anomalies=False):
+    """全レポートで使う表を1回だけ読み込む（exclude_anomalies: 投稿数異常検知 のフラグが付いた生徒を除く）"""
+    commit_path = commit_path or コミットプラン読込.INPUT_PATH
+    mg_results_path = mg_results_path or MG_RESULTS_PATH
+
+    graduates = コミットプラン読込.load_graduates(commit_path, exclude_anomalies=exclude_anomalies)
+    commit_raw = pd.read_excel(mg_results_path, sheet_name="コミットRawdata", header=0)
+    teams = pd.DataFrame({
+        "no.": コミットプラン読込.to_no_series(commit_raw["no."]),
+        "チーム名": PP_Rawdata読込.clean_text(commit_raw["チーム名"]),
+    }).dropna(subset=["no."]).drop_duplicates("no.", keep="last")
+    teams["no."] = teams["no."].astype(int)
+    graduates = graduates.merge(teams, on="no.", how="left")
+    graduates["担当MG"] = PP_Rawdata読込.clean_text(graduates["担当MG"].astype(str))
+    graduates = graduates[["no.", "生徒名", "担当MG", "チーム名", "卒業月", "卒業時投稿数"] + MONTH_LABELS]
+
+    pp = PP_Rawdata読込.load_pp_rawdata(mg_results_path, exclude_anomalies=exclude_anomalies)
+    pp_grad = pp[pp["6回目実施日"].notna()]
+    pp_graduates = pd.DataFrame({
+        "行番号": pp_grad["行番号"],
+        "名前": pp_grad["名前"],
+        "担当MG": pp_grad["担当MG"],
+        "チーム名": pp_grad["チーム名"],
+        "卒業月": pp_grad["6回目実施日"].dt.strftime("%Y-%m"),
+        "合計投稿数": pp_grad["合計投稿数"],
+    })
+    for label, col in zip(PP_INCR_LABELS, PP_Rawdata読込.INCR_COLS):
+        pp_graduates[label] = pp_grad[col]
+
+    pp_long = PP_Rawdata読込.to_session_long(pp)
+    return {
+        "卒業生": graduates,
+        "PP卒業生": pp_graduates.reset_index(drop=True),
+        "順位推移_MG": ranking_history(pp_long, "担当MG"),
+        "順位推移_チーム": ranking_history(pp_long, "チーム名"),
+        "チャット活発度": chat_activity(),
+    }
+
+
+def partitions(tables, kinds=tuple(KINDS)):
+    """(種類, 名前) の一覧。どれかの表に1行でもある 担当MG・チーム名"""
+    tasks = []
+    for kind in kinds:
+        col = KINDS[kind]
+        names = pd.concat([
+            tables["卒業生"][col], tables["PP卒業生"][col], tables[f"順位推移_{kind}"][col],
+        ]).dropna().astype(str)
+        names = sorted(set(names) - PP_Rawdata読込.PLACEHOLDER_GROUPS)
+        tasks.extend((kind, name) for name in names)
+    return tasks
+
+
+def _init_worker(tables):
+    _SHARED.clear()
+    _SHARED.update(tables)
+
+
+def _mean(s):
+    s = pd.to_numeric(s, errors="coerce")
+    return round(float(s.mean()), 2) if s.notna().any() else None
+
+
+def build_report(tables, kind, name):
+    """1つの MG・チームの表（シート名 → DataFrame）"""
+    col = KINDS[kind]
+    grads = tables["卒業生"][tables["卒業生"][col] == name].sort_values(["卒業月", "no."])
+    pp_grads = tables["PP卒業生"][tables["PP卒業生"][col] == name].sort_values(["卒業月", "行番号"])
+    ranking = tables[f"順位推移_{kind}"]
+    ranking = ranking[ranking[col] == name][["年月", "増加投稿数", "順位", "グループ数"]]
+
+    months = grads[MONTH_LABELS].apply(pd.to_numeric, errors="coerce")
+    trajectory = pd.DataFrame({
+        "相対月": MONTH_LABELS,
+        "件数": months.notna().sum().to_numpy(),
+        "平均投稿数": months.mean().round(2).to_numpy(),
+    })
+    latest = ranking.iloc[-1] if len(ranking) else None
+    summary = pd.DataFrame([
+        {"項目": "コミット卒業生", "値": len(grads)},
+        {"項目": "コミット 平均卒業時投稿数", "値": _mean(grads["卒業時投稿数"])},
+        {"項目": "PP卒業生", "値": len(pp_grads)},
+        {"項目": "PP 平均合計投稿数", "値": _mean(pp_grads["合計投稿数"])},
+        {"項目": "直近の順位", "値": f"{latest['年月']} {latest['順位']}位／{latest['グループ数']}" if latest is not None else "ー"},
+    ])
+    sheets = {
+        "サマリ": summary,
+        "コミット卒業生": grads,
+        "推移": trajectory,
+        "PP卒業生": pp_grads,
+        "順位推移": ranking,
+    }
+    if kind == "チーム":
+        chat = tables["チャット活発度"]
+        sheets["チャット活発度"] = chat[chat["チーム名"] == name]
+    return sheets
+
+
+def render_markdown(kind, name, sheets):
+    lines = [f"# {kind}別レポート: {name}", "", "## サマリ", "", "| 項目 | 値 |", "|------|----|"]
+    for _, row in sheets["サマリ"].iterrows():
+        lines.append(f"| {row['項目']} | {row['値'] if pd.notna(row['値']) else 'ー'} |")
+
+    lines.extend(["", "## 0m〜6m 推移（コミット卒業生）", "", "| 相対月 | 件数 | 平均投稿数 |", "|--------|------|-----------|"])
+    for _, row in sheets["推移"].iterrows():
+        mean = row["平均投稿数"] if pd.notna(row["平均投稿数"]) else "ー"
+        lines.append(f"| {row['相対月']} | {row['件数']} | {mean} |")
+
+    lines.extend(["", "## 順位推移（PPセッションの増加投稿数）", "", "| 年月 | 増加投稿数 | 順位 |", "|------|-----------|------|"])
+    for _, row in sheets["順位推移"].iterrows():
+        lines.append(f"| {row['年月']} | {int(row['増加投稿数'])} | {row['順位']}位／{row['グループ数']} |")
+
+    lines.extend(["", "## コミット卒業生", "", "| 生徒名 | 卒業月 | 卒業時投稿数 |", "|--------|--------|-------------|"])
+    for _, row in sheets["コミット卒業生"].iterrows():
+        lines.append(f"| {row['生徒名']} | {row['卒業月']} | {row['卒業時投稿数']} |")
+
+    lines.extend(["", "## PP卒業生", "", "| 名前 | 卒業月 | 合計投稿数 |", "|------|--------|-----------|"])
+    for _, row in sheets["PP卒業生"].iterrows():
+        total = int(row["合計投稿数"]) if pd.notna(row["合計投稿数"]) else "ー"
+        lines.append(f"| {row['名前']} | {row['卒業月']} | {total} |")
+
+    chat = sheets.get("チャット活発度")
+    if chat is not None and len(chat):
+        row = chat.iloc[0]
+        lines.extend([
+            "", "## チャット活発度", "",
+            f"- 投稿ブロック数: {row['チャット投稿ブロック数']}",
+            f"- 注意・依頼系キーワード: {row['注意・依頼系キーワード出現数']}",
+            f"- FB・振り返り系キーワード: {row['FB・振り返り系キーワード出現数']}",
+        ])
+    lines.extend(["", "---", "*出力: MGチーム別レポート.py*"])
+    return "\n".join(lines)
+
+
+def write_report(kind, name, output_dir, tables=None):
+    """1つの MG・チームの xlsx と md を書き出す（ワーカーでは共有の表を使う）"""
+    tables = tables if tables is not None else _SHARED
+    sheets = build_report(tables, kind, name)
+    folder = Path(output_dir) / kind
+    folder.mkdir(parents=True, exist_ok=True)
+    stem = folder / safe_filename(name)
+    with pd.ExcelWriter(stem.with_suffix(".xlsx"), engine="openpyxl") as w:
+        for sheet, df in sheets.items():
+            df.to_excel(w, sheet_name=sheet, index=False)
+    stem.with_suffix(".md").write_text(render_markdown(kind, name, sheets), encoding="utf-8")
+    return kind, name, len(sheets["コミット卒業生"]), len(sheets["PP卒業生"])
+
+
+def fan_out(tables, tasks, output_dir=OUTPUT_DIR, workers=None):
+    """レポートを並列に書き出す（workers=1 なら同じプロセスで順に）"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        return [write_report(kind, name, output_dir, tables) for kind, name in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tables,)) as pool:
+        futures = [pool.submit(write_report, kind, name, output_dir) for kind, name in tasks]
+        return [f.result() for f in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="担当MG別・チーム別のレポートを並列に出力する")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="ワーカー数（既定: CPU数）")
+    parser.add_argument("--only", choices=list(KINDS), default=None, help="MG別・チーム別の片方だけ")
+    parser.add_argument("--exclude-anomalies", action="store_true",
+                        help="投稿数異常検知 で突出・マイナスのフラグが付いた生徒を集計から除く")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    tables = load_tables(args.commit_plan, args.mg_results, args.exclude_anomalies)
+    t_load = time.perf_counter() - t0
+    tasks = partitions(tables, (args.only,) if args.only else tuple(KINDS))
+    results = fan_out(tables, tasks, args.output_dir, args.workers)
+    t_total = time.perf_counter() - t0
+
+    print(f"出力: {args.output_dir}")
+    print()
+    print(f"【MG別・チーム別レポート】読込 {t_load:.1f}秒 / 合計 {t_total:.1f}秒")
+    for kind in KINDS:
+        done = [r for r in results if r[0] == kind]
+        if done:
+            print(f"  {kind}: {len(done)}件")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
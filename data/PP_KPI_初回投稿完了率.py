@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+KPI「2回目セッション時の初回投稿完了率」を PP_Rawdata から算出するスクリプト。
+報告用_各数値のデータ出所一覧.md で「再現用スクリプトなし（手集計）」となっていた数値の再現用。
+
+【指標の定義】スタータープログラムの40日〜50日の間に2回目セッションを実施したPP生徒のうち、
+            2回目セッション時点で初回投稿が完了している割合
+【起算日】【SP】受講開始日
+【初回投稿完了】1回目〜N回目の「前回からの増加投稿数」の合計が1以上（PP_Rawdata の「2回目 投稿有無」と同じ考え方）
+【月】N回目実施日の年月
+
+生徒 × 回 の配列を1回だけ作り、N回目（1〜6）× 月 × チームの各切り口はそこから出す。
+窓（40〜50日）・回は --window・--session で変更できる。
+
+【データ出所】［最新版］mg_monthly_analysis_results_v1.1.xlsx の PP_Rawdata
+
+【使い方】
+    python PP_KPI_初回投稿完了率.py
+    python PP_KPI_初回投稿完了率.py --window 30 60 --session 3
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import PP_Rawdata読込
+
+OUTPUT_PATH = Path(__file__).parent / "PP_KPI_初回投稿完了率_集計結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "PP_KPI_初回投稿完了率.md"
+
+BASE_DATE_COL = "【SP】受講開始日"
+KPI_SESSION = 2
+KPI_WINDOW = (40, 50)  # 起算日からの日数（両端を含む）
+
+
+def session_matrix(pp, base_date_col=BASE_DATE_COL):
+    """生徒 × 回 の配列（実施日・起算日からの日数・累計増加投稿数・初回投稿完了フラグ）"""
+    dates = pp[PP_Rawdata読込.SESSION_COLS].to_numpy(dtype="datetime64[D]")
+    base = pd.to_datetime(pp[base_date_col], errors="coerce").to_numpy(dtype="datetime64[D]")
+    elapsed = (dates - base[:, None]).astype("timedelta64[D]").astype(float)
+    elapsed[np.isnat(dates) | np.isnat(base)[:, None]] = np.nan
+    cum = np.nancumsum(pp[PP_Rawdata読込.INCR_COLS].to_numpy(dtype=float), axis=1)
+    return {
+        "dates": dates,
+        "elapsed": elapsed,
+        "cum": cum,
+        "completed": cum >= 1,
+    }
+
+
+def held_sessions(pp, matrix):
+    """生徒 × 回 の配列 → 実施済みの（生徒, 回）ごとの表（回・月・チーム名・担当MG・起算日からの日数・完了）"""
+    rows, ks = np.nonzero(~np.isnat(matrix["dates"]))
+    return pd.DataFrame({
+        "回": ks + 1,
+        "月": pd.PeriodIndex(matrix["dates"][rows, ks], freq="M").astype(str),
+        "チーム名": pp["チーム名"].to_numpy()[rows],
+        "担当MG": pp["担当MG"].to_numpy()[rows],
+        "日数": matrix["elapsed"][rows, ks],
+        "完了": matrix["completed"][rows, ks],
+    })
+
+
+def completion_rates(held, window=KPI_WINDOW, sessions=None, by=("回", "月")):
+    """
+    N回目セッション時点の初回投稿完了率を、実施済みセッションの表（held_sessions）から算出する。
+
+    window: (最小日数, 最大日数)。None なら窓で絞り込まない
+    sessions: 対象の回（1〜6）。None なら全回
+    by: 集計の切り口（"回"・"月"・"チーム名"・"担当MG" の組み合わせ）
+    """
+    keep = np.ones(len(held), dtype=bool)
+    if sessions is not None:
+        keep &= held["回"].isin(list(sessions)).to_numpy()
+    if window is not None:
+        keep &= held["日数"].between(window[0], window[1]).to_numpy()
+    g = held[keep].groupby(list(by), dropna=False)["完了"].agg(対象生徒数="count", 初回投稿完了数="sum").reset_index()
+    g["初回投稿完了数"] = g["初回投稿完了数"].astype(int)
+    g["初回投稿完了率"] = (g["初回投稿完了数"] / g["対象生徒数"] * 100).round(2)
+    return g
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PP生徒のN回目セッション時の初回投稿完了率を集計する")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--window", type=int, nargs=2, default=list(KPI_WINDOW), metavar=("最小日数", "最大日数"),
+                        help=f"起算日からの日数の窓（両端を含む。既定: {KPI_WINDOW[0]} {KPI_WINDOW[1]}）")
+    parser.add_argument("--session", type=int, default=KPI_SESSION, choices=range(1, PP_Rawdata読込.SESSION_COUNT + 1),
+                        help=f"N回目セッション（既定: {KPI_SESSION}）")
+    parser.add_argument("--output-dir", type=Path, default=None, help="出力先フォルダ（既定: data/ と 分析結果/）")
+    args = parser.parse_args(argv)
+    if args.window[0] > args.window[1]:
+        parser.error(f"--window は 最小日数 ≤ 最大日数 で指定してください: {args.window[0]} {args.window[1]}")
+    window = tuple(args.window)
+    session = args.session
+    output_path = args.output_dir / OUTPUT_PATH.name if args.output_dir else OUTPUT_PATH
+    report_path = args.output_dir / REPORT_PATH.name if args.output_dir else REPORT_PATH
+
+    pp = PP_Rawdata読込.load_pp_rawdata(args.mg_results)
+    # 生徒 × 回 の配列は1回だけ作り、6つの切り口はその実施済みセッションの表から出す
+    held = held_sessions(pp, session_matrix(pp))
+
+    kpi_total = completion_rates(held, window, [session], by=("回",))
+    kpi_monthly = completion_rates(held, window, [session], by=("回", "月"))
+    kpi_team = completion_rates(held, window, [session], by=("回", "チーム名"))
+    family = completion_rates(held, window, None, by=("回", "月"))
+    family_total = completion_rates(held, window, None, by=("回",))
+    no_window = completion_rates(held, None, None, by=("回",))
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
+        kpi_total.to_excel(w, sheet_name="KPI_全体", index=False)
+        kpi_monthly.to_excel(w, sheet_name="KPI_月別", index=False)
+        kpi_team.to_excel(w, sheet_name="KPI_チーム別", index=False)
+        family_total.to_excel(w, sheet_name="回別_全体", index=False)
+        family.to_excel(w, sheet_name="回別_月別", index=False)
+        no_window.to_excel(w, sheet_name="回別_日数条件なし", index=False)
+
+    lo, hi = window if window is not None else ("-", "-")
+    head = kpi_total.iloc[0] if len(kpi_total) else None
+    report_lines = [
+        f"# PP KPI：{session}回目セッション時の初回投稿完了率",
+        "",
+        f"## 全体（起算日から{lo}〜{hi}日に{session}回目セッションを実施した生徒）",
+        "",
+    ]
+    if head is not None:
+        report_lines.append(
+            f"**{head['初回投稿完了率']}%**（{int(head['初回投稿完了数'])}名 / {int(head['対象生徒数'])}名）"
+        )
+    else:
+        report_lines.append("対象生徒なし")
+    report_lines.extend([
+        "",
+        "## 月別",
+        "",
+        "| 月 | 対象生徒数 | 初回投稿完了数 | 初回投稿完了率 |",
+        "|----|-----------|---------------|---------------|",
+    ])
+    for _, row in kpi_monthly.iterrows():
+        report_lines.append(
+            f"| {row['月']} | {row['対象生徒数']}名 | {row['初回投稿完了数']}名 | **{row['初回投稿完了率']}%** |"
+        )
+    report_lines.extend([
+        "",
+        "## チーム別",
+        "",
+        "| チーム名 | 対象生徒数 | 初回投稿完了数 | 初回投稿完了率 |",
+        "|---------|-----------|---------------|---------------|",
+    ])
+    for _, row in kpi_team.iterrows():
+        team = row["チーム名"] if pd.notna(row["チーム名"]) else "（未設定）"
+        report_lines.append(
+            f"| {team} | {row['対象生徒数']}名 | {row['初回投稿完了数']}名 | **{row['初回投稿完了率']}%** |"
+        )
+    report_lines.extend([
+        "",
+        f"## 参考：回別（{lo}〜{hi}日 / 日数条件なし）",
+        "",
+        "| 回 | 対象生徒数 | 初回投稿完了率 | 対象生徒数（条件なし） | 初回投稿完了率（条件なし） |",
+        "|----|-----------|---------------|----------------------|--------------------------|",
+    ])
+    merged = no_window.merge(family_total, on="回", how="left", suffixes=("_条件なし", ""))
+    for _, row in merged.iterrows():
+        n = int(row["対象生徒数"]) if pd.notna(row["対象生徒数"]) else 0
+        rate = f"{row['初回投稿完了率']}%" if pd.notna(row["初回投稿完了率"]) else "-"
+        report_lines.append(
+            f"| {int(row['回'])}回目 | {n}名 | {rate} | {int(row['対象生徒数_条件なし'])}名 | {row['初回投稿完了率_条件なし']}% |"
+        )
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **ファイル**: `［最新版］mg_monthly_analysis_results_v1.1.xlsx` の **PP_Rawdata**",
+        f"- **対象**: 【SP】受講開始日から{lo}〜{hi}日の間に{session}回目セッションを実施した生徒",
+        f"- **初回投稿完了**: 1回目〜{session}回目の「前回からの増加投稿数」の合計が1以上",
+        f"- **月**: {session}回目実施日の年月",
+        "",
+        "---",
+        "*出力: PP_KPI_初回投稿完了率.py*",
+    ])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
+    print()
+    print(f"【PP KPI {session}回目セッション時の初回投稿完了率（{lo}〜{hi}日）】")
+    if head is not None:
+        print(f"  全体: {head['初回投稿完了率']}%（{int(head['初回投稿完了数'])}名 / {int(head['対象生徒数'])}名）")
+    for _, row in kpi_monthly.iterrows():
+        print(f"  {row['月']}: {row['初回投稿完了率']}%（{row['初回投稿完了数']}名 / {row['対象生徒数']}名）")
+    return kpi_total
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
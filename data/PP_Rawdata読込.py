@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+［最新版］mg_monthly_analysis_results_v1.1.xlsx の PP_Rawdata を読み込む共通モジュール。
+
+- load_pp_rawdata: 名前が入っている行のみ・列の型を整えた生徒単位の表
+- to_session_long: 1回目〜6回目のセッションを縦持ち（生徒 × 回）にした表
+
+【生徒キー】行番号（Excel上の行番号）。PP_Rawdata の No, は途中で振り直されており重複するため使わない
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from コミットプラン読込 import to_num_series
+
+BASE = Path(__file__).parent
+INPUT_PATH = BASE / "［最新版］mg_monthly_analysis_results_v1.1.xlsx"
+SHEET = "PP_Rawdata"
+HEADER_ROW = 2  # 3行目ヘッダー
+
+SESSION_COUNT = 6
+SESSION_COLS = [f"{n}回目実施日" for n in range(1, SESSION_COUNT + 1)]
+START_COLS = ["開始"] + [f"開始.{k}" for k in range(1, SESSION_COUNT)]
+AFTER_COLS = ["セッション後"] + [f"セッション後.{k}" for k in range(1, SESSION_COUNT)]
+INCR_COLS = ["前回からの増加投稿数"] + [f"前回からの増加投稿数.{k}" for k in range(1, SESSION_COUNT)]
+# 担当MG・チーム名 の列で、担当が決まっていない・集計用の値（MG別・チーム別の集計では除く）
+PLACEHOLDER_GROUPS = {"", "全体", "なし", "後日決定", "-", "ー"}
+
+
+def clean_text(s):
+    """文字列列の前後空白を除去（空文字は NaN）"""
+    out = s.astype("string").str.strip()
+    return out.mask(out == "")
+
+
+def load_pp_rawdata(input_path=None, df=None, exclude_anomalies=False):
+    """PP_Rawdata → 名前がある行のみ。実施日は日付、投稿数系は数値に変換済み。
+    exclude_anomalies=True なら増加投稿数に 投稿数異常検知.EXCLUDE_KINDS のフラグが付いた生徒を除く"""
+    if df is None:
+        df = pd.read_excel(input_path or INPUT_PATH, sheet_name=SHEET, header=HEADER_ROW)
+    df = df.copy()
+    df.insert(0, "行番号", df.index + HEADER_ROW + 2)
+    df = df[df["名前"].notna() & (df["名前"].astype(str).str.strip() != "")].copy()
+    for c in ["名前", "担当MG", "チーム名"]:
+        df[c] = clean_text(df[c])
+    for c in SESSION_COLS:
+        df[c] = pd.to_datetime(df[c], errors="coerce")
+    for c in START_COLS + AFTER_COLS + INCR_COLS + ["合計投稿数"]:
+        df[c] = to_num_series(df[c])
+    if exclude_anomalies:
+        import 投稿数異常検知  # 投稿数異常検知 がこのモジュールを読み込むため、ここで読み込む
+        df = df[~投稿数異常検知.has_anomaly(df[INCR_COLS].to_numpy(dtype=float))]
+    return df.reset_index(drop=True)
+
+
+def to_session_long(pp):
+    """生徒 × 回 の縦持ち表（行番号・名前・担当MG・チーム名・回・実施日・開始・セッション後・増加投稿数）。
+    実施日が入っていないセッションは除外"""
+    n = len(pp)
+    dates = pp[SESSION_COLS].to_numpy(dtype="datetime64[ns]")
+    long = pd.DataFrame({
+        "行番号": np.repeat(pp["行番号"].to_numpy(), SESSION_COUNT),
+        "名前": np.repeat(pp["名前"].to_numpy(), SESSION_COUNT),
+        "担当MG": np.repeat(pp["担当MG"].to_numpy(), SESSION_COUNT),
+        "チーム名": np.repeat(pp["チーム名"].to_numpy(), SESSION_COUNT),
+        "回": np.tile(np.arange(1, SESSION_COUNT + 1), n),
+        "実施日": dates.ravel(),
+        "開始": pp[START_COLS].to_numpy(dtype=float).ravel(),
+        "セッション後": pp[AFTER_COLS].to_numpy(dtype=float).ravel(),
+        "増加投稿数": pp[INCR_COLS].to_numpy(dtype=float).ravel(),
+    })
+    return long[long["実施日"].notna()].reset_index(drop=True)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+PP_Rawdata の 1回目〜6回目実施日・前回からの増加投稿数 から、
+生徒ごとのセッションタイムライン（索引）を作る。
+
+【索引の構造】
+- 生徒ごとにセッションを実施日順に並べ、全生徒分を1本の連続した配列に詰める
+  （dates: 実施日, cum_posts: 累計増加投稿数, offsets: 生徒ごとの開始位置）
+- 「生徒番号 × 日数」の合成キーも昇順なので、全生徒分の問い合わせを
+  np.searchsorted 1回（二分探索）でまとめて処理できる
+
+【問い合わせ例】
+- posts_as_of(日付): その日までの累計増加投稿数（日付は生徒ごとに変えてもよい）
+- sessions_between(A, B): A〜B の間に実施したセッション数
+
+【データ出所】［最新版］mg_monthly_analysis_results_v1.1.xlsx の PP_Rawdata
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import PP_Rawdata読込
+
+OUTPUT_PATH = Path(__file__).parent / "PPセッションタイムライン_月末時点集計結果.xlsx"
+
+# 月末時点集計の対象期間（実施日の入力ミスで1800年代・2027年などの日付が混ざるため期間を固定）
+REPORT_START_MONTH = "2025-01"
+REPORT_END_MONTH = "2026-01"
+
+# 合成キー用: 生徒番号 * DAY_SPAN + 日数（日数は ±DAY_LIMIT に丸めて生徒間で重ならないようにする）
+DAY_SPAN = 1 << 20
+DAY_LIMIT = DAY_SPAN // 2 - 1
+
+
+def to_days(values):
+    """日付（スカラー・配列）→ 1970-01-01 からの日数（int64）"""
+    arr = np.asarray(pd.to_datetime(values), dtype="datetime64[D]")
+    return np.clip(arr.astype(np.int64), -DAY_LIMIT, DAY_LIMIT)
+
+
+class SessionTimeline:
+    """生徒ごとのセッション実施日・累計増加投稿数を連続配列で持つ索引"""
+
+    def __init__(self, long):
+        """long: PP_Rawdata読込.to_session_long の結果（行番号・実施日・増加投稿数）"""
+        keys = long["行番号"].to_numpy()
+        days = to_days(long["実施日"])
+        incr = np.nan_to_num(long["増加投稿数"].to_numpy(dtype=float))
+        order = np.lexsort((days, keys))
+        keys, days, incr = keys[order], days[order], incr[order]
+
+        self.students, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+        self.offsets = np.append(starts, len(keys)).astype(np.int64)
+        self.student_idx = np.repeat(np.arange(len(self.students)), counts)
+        self.dates = days
+        self.increments = incr
+        # 生徒ごとの累計（全体の累計から生徒の開始位置直前の累計を引く）
+        total = np.cumsum(incr)
+        base = np.concatenate([[0.0], total])[starts]
+        self.cum_posts = total - np.repeat(base, counts)
+        self.composite = self.student_idx * DAY_SPAN + days
+        self._meta = (
+            long.drop_duplicates("行番号").set_index("行番号")[["名前", "担当MG", "チーム名"]]
+            .reindex(self.students)
+        )
+
+    @classmethod
+    def from_excel(cls, input_path=None):
+        pp = PP_Rawdata読込.load_pp_rawdata(input_path)
+        return cls(PP_Rawdata読込.to_session_long(pp))
+
+    def __len__(self):
+        return len(self.students)
+
+    def _query_keys(self, days):
+        """日数（スカラー or 生徒ごとの配列）→ 全生徒分の合成キー"""
+        days = np.broadcast_to(days, (len(self.students),))
+        return np.arange(len(self.students)) * DAY_SPAN + days
+
+    def _position_as_of(self, days):
+        """各生徒について、days 以前で最後のセッションの位置（なければ -1）"""
+        pos = np.searchsorted(self.composite, self._query_keys(days), side="right") - 1
+        return np.where(pos >= self.offsets[:-1], pos, -1)
+
+    def _posts_as_of_days(self, days):
+        pos = self._position_as_of(days)
+        return np.where(pos >= 0, self.cum_posts[np.maximum(pos, 0)], 0.0)
+
+    def posts_as_of(self, date):
+        """date 時点（当日を含む）の累計増加投稿数。セッション前の生徒は 0"""
+        vals = self._posts_as_of_days(to_days(date))
+        return pd.Series(vals, index=self.students, name="累計増加投稿数")
+
+    def sessions_as_of(self, date):
+        """date 時点（当日を含む）までに実施したセッション数"""
+        pos = self._position_as_of(to_days(date))
+        vals = np.where(pos >= 0, pos - self.offsets[:-1] + 1, 0)
+        return pd.Series(vals, index=self.students, name="セッション数")
+
+    def last_session_as_of(self, date):
+        """date 時点（当日を含む）の直近セッション実施日（なければ NaT）"""
+        pos = self._position_as_of(to_days(date))
+        days = np.where(pos >= 0, self.dates[np.maximum(pos, 0)], 0).astype("datetime64[D]")
+        out = pd.Series(pd.to_datetime(days), index=self.students, name="直近セッション日")
+        return out.where(pos >= 0)
+
+    def sessions_between(self, start, end):
+        """start〜end（両端を含む）に実施したセッション数"""
+        lo = np.searchsorted(self.composite, self._query_keys(to_days(start)), side="left")
+        hi = np.searchsorted(self.composite, self._query_keys(to_days(end)), side="right")
+        return pd.Series(hi - lo, index=self.students, name="期間内セッション数")
+
+    def posts_between(self, start, end):
+        """start〜end（両端を含む）に実施したセッションの増加投稿数の合計"""
+        vals = self._posts_as_of_days(to_days(end)) - self._posts_as_of_days(to_days(start) - 1)
+        return pd.Series(vals, index=self.students, name="期間内増加投稿数")
+
+    def students_frame(self):
+        """生徒の属性（名前・担当MG・チーム名）。index=行番号"""
+        return self._meta.copy()
+
+    def month_end_matrix(self, start_month, end_month):
+        """各月末時点の累計増加投稿数（生徒 × 月）"""
+        months = pd.period_range(start_month, end_month, freq="M")
+        cols = {str(m): self.posts_as_of(m.end_time.normalize()) for m in months}
+        return pd.DataFrame(cols)
+
+
+def main(input_path=None):
+    timeline = SessionTimeline.from_excel(input_path)
+    cum = timeline.month_end_matrix(REPORT_START_MONTH, REPORT_END_MONTH)
+    monthly_sessions = pd.DataFrame({
+        str(m): timeline.sessions_between(m.start_time, m.end_time.normalize())
+        for m in pd.period_range(REPORT_START_MONTH, REPORT_END_MONTH, freq="M")
+    })
+    meta = timeline.students_frame()
+
+    summary = pd.DataFrame({
+        "月": cum.columns,
+        "累計増加投稿数_合計": cum.sum().to_numpy(),
+        "セッション実施数": monthly_sessions.sum().to_numpy(),
+        "セッション実施生徒数": (monthly_sessions > 0).sum().to_numpy(),
+    })
+
+    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+        summary.to_excel(w, sheet_name="月別サマリ", index=False)
+        meta.join(cum).to_excel(w, sheet_name="月末時点_累計増加投稿数", index=True)
+        meta.join(monthly_sessions).to_excel(w, sheet_name="月別_セッション実施数", index=True)
+
+    print(f"出力: {OUTPUT_PATH}")
+    print(f"生徒数: {len(timeline)}名 / セッション数: {len(timeline.dates)}件")
+    print(summary.to_string(index=False))
+    return timeline
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
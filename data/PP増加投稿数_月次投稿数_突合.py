@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+PP_Rawdata の「前回からの増加投稿数」（セッション単位）と、
+コミットプラン (4).xlsx の「新 月次投稿数」（0ヶ月目〜6ヶ月目の月単位）を突き合わせ、
+食い違いを洗い出すスクリプト。
+
+【突合の方法】
+- 両シート共通のキーは生徒名のみのため、名前正規化.py でそろえた名前で生徒を対応付ける
+  （NFKC・括弧とその中身の除去・カタカナ→ひらがな・空白と中黒の除去・小文字化）
+- 新 月次投稿数の k ヶ月目 = 初回セッション（セッション実施状況管理 W列）の月 + k ヶ月
+- 各セッションの増加投稿数を、実施日以前で最も近い月初の月に帰属させる（merge_asof、生徒・日付順に1回）
+- 月ごとに「PPセッション増加合計」と「月次投稿数」を比べ、差が TOLERANCE を超えたら不一致
+
+※増加投稿数は「前回セッションからの増加」のため、月をまたぐ増加は後のセッションの月に計上される
+  （投稿数ランキング推移_集計.py と同じ月の割り当て方）
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import PP_Rawdata読込
+import コミットプラン読込
+from 名前正規化 import normalize_names as name_key
+
+OUTPUT_PATH = Path(__file__).parent / "PP増加投稿数_月次投稿数_突合結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "PP増加投稿数_月次投稿数_突合.md"
+
+TOLERANCE = 0  # 差の許容幅（投稿数）
+MONTH_COUNT = len(コミットプラン読込.MONTH_LABELS)  # 0〜6ヶ月目
+
+
+def monthly_buckets(month, sess):
+    """新 月次投稿数 → 生徒 × 相対月 の縦持ち（no.・名前キー・相対月・月初・月末・月次投稿数）"""
+    df = month.join(sess[["初回セッション日"]], on="no.", how="inner")
+    df = df[df["初回セッション日"].notna()]
+    n = len(df)
+    start = df["初回セッション日"].dt.to_period("M").to_numpy()
+    k = np.tile(np.arange(MONTH_COUNT), n)
+    periods = pd.PeriodIndex(np.repeat(start, MONTH_COUNT), freq="M") + k
+    return pd.DataFrame({
+        "no.": np.repeat(df["no."].to_numpy(), MONTH_COUNT),
+        "生徒名": np.repeat(df["生徒名"].to_numpy(), MONTH_COUNT),
+        "名前キー": np.repeat(name_key(df["生徒名"]).to_numpy(), MONTH_COUNT),
+        "相対月": k,
+        "年月": periods.strftime("%Y-%m"),
+        "月初": periods.start_time,
+        "月末": periods.end_time.normalize(),
+        "月次投稿数": df[コミットプラン読込.MONTH_LABELS].to_numpy(dtype=float).ravel(),
+    })
+
+
+def match_students(pp_long, buckets):
+    """名前キーで PP の行番号 ↔ 新 月次投稿数の no. を対応付ける（どちらかで重複する名前は除外）"""
+    pp_keys = pp_long[["行番号", "名前"]].drop_duplicates("行番号")
+    pp_keys = pp_keys.assign(名前キー=name_key(pp_keys["名前"]))
+    cc_keys = buckets[["no.", "名前キー"]].drop_duplicates("no.")
+    pp_unique = pp_keys[~pp_keys["名前キー"].duplicated(keep=False)]
+    cc_unique = cc_keys[~cc_keys["名前キー"].duplicated(keep=False)]
+    return pp_unique.merge(cc_unique, on="名前キー", how="inner")[["行番号", "no.", "名前キー"]]
+
+
+def reconcile(pp_long, buckets, tolerance=TOLERANCE):
+    """突合結果（生徒 × 相対月）と、帰属先のない PP セッション一覧を返す"""
+    pairs = match_students(pp_long, buckets)
+    sessions = pp_long.merge(pairs[["行番号", "no."]], on="行番号", how="inner")
+    sessions["実施日"] = sessions["実施日"].astype("datetime64[ns]")
+    target = buckets[buckets["no."].isin(pairs["no."])].copy()
+    target["月初"] = target["月初"].astype("datetime64[ns]")
+
+    # 生徒・日付順に1回の as-of 結合で、各セッションを実施日以前で最も近い月初に帰属させる
+    attributed = pd.merge_asof(
+        sessions.sort_values("実施日"),
+        target[["no.", "相対月", "月初", "月末"]].sort_values("月初"),
+        left_on="実施日", right_on="月初", by="no.", direction="backward",
+    )
+    in_range = attributed["相対月"].notna() & (attributed["実施日"] <= attributed["月末"])
+    out_of_range = attributed[~in_range]
+
+    per_month = (
+        attributed[in_range]
+        .groupby(["no.", "相対月"], as_index=False)
+        .agg(PPセッション数=("回", "count"), PP増加投稿数=("増加投稿数", "sum"))
+    )
+    per_month["相対月"] = per_month["相対月"].astype(int)
+    result = target.merge(per_month, on=["no.", "相対月"], how="left")
+    result["PPセッション数"] = result["PPセッション数"].fillna(0).astype(int)
+    result["PP増加投稿数"] = result["PP増加投稿数"].fillna(0)
+    result["差（月次 − PP）"] = result["月次投稿数"].fillna(0) - result["PP増加投稿数"]
+
+    no_monthly = result["月次投稿数"].isna() & (result["PPセッション数"] > 0)
+    mismatch = result["差（月次 − PP）"].abs() > tolerance
+    result["判定"] = np.select(
+        [no_monthly, mismatch],
+        ["月次なし（PPセッションあり）", "不一致"],
+        default="一致",
+    )
+    return result.drop(columns=["名前キー", "月初", "月末"]), out_of_range, pairs
+
+
+def main(input_path=None, pp_input_path=None, output_dir=None):
+    cc_path = input_path or コミットプラン読込.INPUT_PATH
+    output_path = Path(output_dir) / OUTPUT_PATH.name if output_dir else OUTPUT_PATH
+    report_path = Path(output_dir) / REPORT_PATH.name if output_dir else REPORT_PATH
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    sess = コミットプラン読込.load_sessions(
+        pd.read_excel(cc_path, sheet_name=コミットプラン読込.SESS_SHEET, header=None))
+    month = コミットプラン読込.load_monthly(
+        pd.read_excel(cc_path, sheet_name=コミットプラン読込.MONTH_SHEET, header=None))
+    pp_long = PP_Rawdata読込.to_session_long(PP_Rawdata読込.load_pp_rawdata(pp_input_path))
+
+    buckets = monthly_buckets(month, sess)
+    result, out_of_range, pairs = reconcile(pp_long, buckets)
+    mismatches = result[result["判定"] != "一致"]
+
+    summary = pd.DataFrame([
+        {"項目": "PP_Rawdata 生徒数（セッションあり）", "値": pp_long["行番号"].nunique()},
+        {"項目": "新 月次投稿数 生徒数（初回セッション日あり）", "値": buckets["no."].nunique()},
+        {"項目": "名前で対応付いた生徒数", "値": len(pairs)},
+        {"項目": "突合した生徒 × 月", "値": len(result)},
+        {"項目": "一致", "値": int((result["判定"] == "一致").sum())},
+        {"項目": "不一致", "値": int((result["判定"] == "不一致").sum())},
+        {"項目": "月次なし（PPセッションあり）", "値": int((result["判定"] == "月次なし（PPセッションあり）").sum())},
+        {"項目": "0〜6ヶ月目の範囲外のPPセッション", "値": len(out_of_range)},
+    ])
+
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
+        summary.to_excel(w, sheet_name="サマリ", index=False)
+        mismatches.to_excel(w, sheet_name="不一致一覧", index=False)
+        result.to_excel(w, sheet_name="突合結果", index=False)
+        out_of_range.to_excel(w, sheet_name="範囲外セッション", index=False)
+
+    report_lines = [
+        "# PP増加投稿数 × 新 月次投稿数 突合",
+        "",
+        "## サマリ",
+        "",
+        "| 項目 | 値 |",
+        "|------|----|",
+    ]
+    for _, row in summary.iterrows():
+        report_lines.append(f"| {row['項目']} | {row['値']} |")
+    report_lines.extend([
+        "",
+        "## 不一致一覧",
+        "",
+        "| 生徒名 | 年月 | 相対月 | 月次投稿数 | PP増加投稿数 | PPセッション数 | 差 | 判定 |",
+        "|--------|------|--------|-----------|-------------|---------------|----|------|",
+    ])
+    for _, row in mismatches.iterrows():
+        monthly = int(row["月次投稿数"]) if pd.notna(row["月次投稿数"]) else "ー"
+        report_lines.append(
+            f"| {row['生徒名']} | {row['年月']} | {row['相対月']}m | {monthly} | {int(row['PP増加投稿数'])} | "
+            f"{row['PPセッション数']} | {row['差（月次 − PP）']:+.0f} | {row['判定']} |"
+        )
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **PP**: `［最新版］mg_monthly_analysis_results_v1.1.xlsx` の **PP_Rawdata**（1〜6回目実施日・前回からの増加投稿数）",
+        "- **月次**: `コミットプラン (4).xlsx` の「新 月次投稿数」P〜V列（0〜6ヶ月目）",
+        "- **k ヶ月目の年月**: 「セッション実施状況管理」W列（初回の通常セッション日）の月 + k",
+        "- **生徒の対応付け**: 名前（名前正規化.py: NFKC・カナ統一・括弧除去・空白除去）が両シートで一意に一致する生徒のみ",
+        f"- **不一致**: |月次投稿数 − PP増加投稿数| > {TOLERANCE}",
+        "",
+        "---",
+        "*出力: PP増加投稿数_月次投稿数_突合.py*",
+    ])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
+    print()
+    print("【PP増加投稿数 × 新 月次投稿数 突合】")
+    for _, row in summary.iterrows():
+        print(f"  {row['項目']}: {row['値']}")
+    return result
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+卒業時アンケート・クレーム対応の Excel を読み込む共通モジュール。
+
+- load_survey : SnsClub卒業時アンケート（回答） (1).xlsx の「アンケート回答」（1行目の設問行を除く。列は番号のまま）
+- load_claims : クレーム対応 (1).xlsx の「シート1」（1行目の見出し行を除く。列は番号のまま）
+- claim_names : クレームの文面 → 名乗った名前（名前の列がないため「〇〇と申します」から取り出す）
+
+【列番号】アンケート: SURVEY_COL_*（満足度は10点満点）／クレーム: CLAIM_COL_*
+"""
+import re
+from pathlib import Path
+
+import pandas as pd
+
+BASE = Path(__file__).parent
+SURVEY_PATH = BASE / "SnsClub卒業時アンケート（回答） (1).xlsx"
+SURVEY_SHEET = "アンケート回答"
+SURVEY_COL_NAME = 1
+SURVEY_COL_SATISFACTION = 2  # サービス全体の満足度
+SURVEY_COL_MG_SATISFACTION = 12  # コーチングマネージャーへの満足度
+
+CLAIM_PATH = BASE / "クレーム対応 (1).xlsx"
+CLAIM_SHEET = "シート1"
+CLAIM_COL_NO = 0
+CLAIM_COL_STUDENT = 5  # 生徒の最初の文面
+
+CLAIM_NAME_PATTERN = re.compile(r"([^\s、。！!？?「」『』()（）#＃]{2,12})と申します")
+KANJI_NAME_PATTERN = re.compile(r"([一-龥々ァ-ヶー]+)$")
+
+
+def load_survey(path=SURVEY_PATH):
+    """卒業時アンケート → 回答1件 = 1行（列は番号。行番号は Excel の行 - 1）"""
+    return pd.read_excel(path, sheet_name=SURVEY_SHEET, header=None).iloc[1:]
+
+
+def load_claims(path=CLAIM_PATH):
+    """クレーム対応 → 1件 = 1行（列は番号）"""
+    return pd.read_excel(path, sheet_name=CLAIM_SHEET, header=None).iloc[1:]
+
+
+def claim_names(texts):
+    """クレーム文面 → 名乗った名前（「〇〇組の△△と申します」の △△）。
+    漢字・カタカナの名前は末尾の漢字・カタカナ部分（「在籍している谷口美樹」→「谷口美樹」）"""
+    found = texts.astype("string").str.extract(CLAIM_NAME_PATTERN, expand=False)
+    kanji = found.str.extract(KANJI_NAME_PATTERN, expand=False)
+    return kanji.fillna(found.str.split("の").str[-1])
@@ -7,13 +7,19 @@ KGI「特進コース(コミットコース)全体の卒業時平均投稿数80
 - 「セッション実施状況管理」の初回の通常セッション日(W列=col22)と照らし合わせ、
   入会タイミングを考慮してコホートを絞り込む
 - 6ヶ月目(V列)にデータがある人は卒業済み・古いデータのため除外
-- 初回セッション 2025/6/1〜2026/1/31 の生徒のみ対象（分析期間中にアクティブな生徒）
+- 初回セッションが 最初の対象月の COHORT_LEAD_MONTHS ヶ月前の月初〜最後の対象月の月末 の生徒のみ対象
+  （分析期間中にアクティブな生徒。既定の 11月〜1月 なら 2025/6/1〜2026/1/31）
+- 対象月は TARGET_MONTHS（分析コマンド.py kgi --months で差し替えられる。目標のない月は目標・GAP を「-」にする）
+- 既定の 11月〜1月 はレポートの見出しを「4期目1Q」、出力を OUTPUT_PATH・REPORT_PATH のままにする。
+  --months で別の月を指定したときだけ、見出しの期Q（期カレンダー.py）と出力ファイル名を対象月から付ける
 """
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+from 期カレンダー import assign_term_quarter
+
 # 入力パス（202602分析フォルダ or Downloads）
 BASE = Path(__file__).parent.parent
 INPUT_PATH = BASE / "コミットプラン (4).xlsx"
@@ -21,6 +27,10 @@ if not INPUT_PATH.exists():
     INPUT_PATH = Path.home() / "Downloads" / "コミットプラン (4).xlsx"
 OUTPUT_PATH = Path(__file__).parent / "コミット_11月12月1月投稿数_集計結果.xlsx"
 REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "4期1Q_KGI_コミット_11月12月1月結果.md"
+TERM_LABEL = "4期目1Q"  # 既定の対象月（TARGET_MONTHS）のレポートの見出し
+# 既定以外の対象月のときのファイル名（{months} は対象月（例: 12月1月2月）、{term} は期カレンダー.py の期Q）
+OUTPUT_NAME = "コミット_{months}投稿数_集計結果.xlsx"
+REPORT_NAME = "{term}_KGI_コミット_{months}結果.md"
 
 # セッション実施状況管理
 SESS_HEADER_ROW = 9
@@ -39,8 +49,7 @@ MONTH_COL_6M = 21   # V列: 6ヶ月目
 
 # 分析期間・コホート
 TARGET_MONTHS = [(2025, 11), (2025, 12), (2026, 1)]
-COHORT_START = datetime(2025, 6, 1)
-COHORT_END = datetime(2026, 1, 31)
+COHORT_LEAD_MONTHS = 5  # 最初の対象月の何ヶ月前の月初から初回セッションの生徒を含めるか
 
 # KGI目標（月別想定: 0,6,15,16,16,16,11 → 11月=2ヶ月目想定6, 12月=3ヶ月目15, 1月=4ヶ月目16）
 TARGET_BY_MONTH = {  # カレンダー月 -> 目標投稿数
@@ -62,9 +71,38 @@ def to_num(val):
         return 0
 
 
-def main():
-    df_sess = pd.read_excel(INPUT_PATH, sheet_name="セッション実施状況管理", header=None)
-    df_month = pd.read_excel(INPUT_PATH, sheet_name="新 月次投稿数", header=None)
+def cohort_window(months):
+    """対象月 → コホートの初回セッション日の範囲（最初の対象月の COHORT_LEAD_MONTHS ヶ月前の月初, 最後の対象月の月末）"""
+    first, last = min(months), max(months)
+    start = pd.Timestamp(year=first[0], month=first[1], day=1) - pd.DateOffset(months=COHORT_LEAD_MONTHS)
+    end = pd.Timestamp(year=last[0], month=last[1], day=1) + pd.offsets.MonthEnd(0)
+    return start, end
+
+
+def term_label(months):
+    """対象月 → 期Q（期カレンダー.py。2つ以上の期Qにまたがるときは「4期2Q・4期3Q」）"""
+    labels = assign_term_quarter([f"{y}-{m:02d}" for y, m in months])["期Q"]
+    return "・".join(dict.fromkeys(labels))
+
+
+def main(input_path=None, months=None, output_dir=None):
+    input_path = input_path or INPUT_PATH
+    months = list(months or TARGET_MONTHS)
+    labels = [f"{y}年{m}月" for y, m in months]
+    span = f"{len(months)}ヶ月"
+    cohort_start, cohort_end = cohort_window(months)
+    cohort_label = "〜".join(f"{d.year}/{d.month}/{d.day}" for d in (cohort_start, cohort_end))
+    if months == TARGET_MONTHS:
+        term, output_name, report_name = TERM_LABEL, OUTPUT_PATH.name, REPORT_PATH.name
+    else:
+        term = term_label(months)
+        month_tag = "".join(f"{m}月" for _, m in months)
+        output_name = OUTPUT_NAME.format(months=month_tag)
+        report_name = REPORT_NAME.format(term=term, months=month_tag)
+    output_path = Path(output_dir or OUTPUT_PATH.parent) / output_name
+    report_path = Path(output_dir or REPORT_PATH.parent) / report_name
+    df_sess = pd.read_excel(input_path, sheet_name="セッション実施状況管理", header=None)
+    df_month = pd.read_excel(input_path, sheet_name="新 月次投稿数", header=None)
 
     # no. -> 初回の通常セッション日
     sess_map = {}
@@ -96,8 +134,8 @@ def main():
         if first_sess is None or pd.isna(first_sess):
             continue
 
-        # コホート絞り込み: 初回セッション 2025/6/1 〜 2026/1/31
-        if first_sess < pd.Timestamp(COHORT_START) or first_sess > pd.Timestamp(COHORT_END):
+        # コホート絞り込み: 初回セッション cohort_start 〜 cohort_end
+        if first_sess < cohort_start or first_sess > cohort_end:
             continue
 
         # 0ヶ月目 = 初回セッションの月。カレンダー月 -> ヶ月目
@@ -106,66 +144,53 @@ def main():
         def months_diff(y1, m1, y2, m2):
             return (y2 - y1) * 12 + (m2 - m1)
 
-        nov_val = dec_val = jan_val = 0
-        for (y, m), val_name in [
-            ((2025, 11), "nov_val"),
-            ((2025, 12), "dec_val"),
-            ((2026, 1), "jan_val"),
-        ]:
+        values = []
+        for y, m in months:
             diff = months_diff(start_year, start_month, y, m)
-            if 0 <= diff <= 6:
-                col_idx = MONTH_COL_0M + diff
-                val = to_num(df_month.iloc[i, col_idx])
-                if val_name == "nov_val":
-                    nov_val = val
-                elif val_name == "dec_val":
-                    dec_val = val
-                else:
-                    jan_val = val
             # diff < 0: まだ開始前 → 0
             # diff > 6: 6ヶ月目超（卒業後）→ 0
+            values.append(to_num(df_month.iloc[i, MONTH_COL_0M + diff]) if 0 <= diff <= 6 else 0)
 
         name = df_month.iloc[i, MONTH_COL_NAME]
-        rows.append({
+        record = {
             "no.": no_int,
             "生徒名": name,
             "初回セッション日": first_sess.strftime("%Y-%m-%d"),
-            "2025年11月": nov_val,
-            "2025年12月": dec_val,
-            "2026年1月": jan_val,
-            "3ヶ月合計": nov_val + dec_val + jan_val,
-        })
+        }
+        record.update(zip(labels, values))
+        record[f"{span}合計"] = sum(values)
+        rows.append(record)
 
-    result_df = pd.DataFrame(rows)
+    result_df = pd.DataFrame(rows, columns=["no.", "生徒名", "初回セッション日"] + labels + [f"{span}合計"])
 
     # 全体集計（チーム別ではなく全生徒の平均）
     n = len(result_df)
-    total_nov = result_df["2025年11月"].sum()
-    total_dec = result_df["2025年12月"].sum()
-    total_jan = result_df["2026年1月"].sum()
-    avg_nov = round(total_nov / n, 2) if n > 0 else 0
-    avg_dec = round(total_dec / n, 2) if n > 0 else 0
-    avg_jan = round(total_jan / n, 2) if n > 0 else 0
-    avg_3m = round((total_nov + total_dec + total_jan) / n, 2) if n > 0 else 0
+    totals = [result_df[label].sum() for label in labels]
+    avgs = [round(total / n, 2) if n > 0 else 0 for total in totals]
+    avg_span = round(sum(totals) / n, 2) if n > 0 else 0
+    targets = [TARGET_BY_MONTH.get(ym) for ym in months]
 
     # Excel出力
-    summary_df = pd.DataFrame([
-        {"項目": "対象生徒数", "値": n},
-        {"項目": "2025年11月_合計", "値": total_nov},
-        {"項目": "2025年11月_1人あたり平均", "値": avg_nov},
-        {"項目": "2025年12月_合計", "値": total_dec},
-        {"項目": "2025年12月_1人あたり平均", "値": avg_dec},
-        {"項目": "2026年1月_合計", "値": total_jan},
-        {"項目": "2026年1月_1人あたり平均", "値": avg_jan},
-        {"項目": "3ヶ月合計_1人あたり平均", "値": avg_3m},
-    ])
-
-    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+    summary_rows = [{"項目": "対象生徒数", "値": n}]
+    for label, total, avg in zip(labels, totals, avgs):
+        summary_rows.append({"項目": f"{label}_合計", "値": total})
+        summary_rows.append({"項目": f"{label}_1人あたり平均", "値": avg})
+    summary_rows.append({"項目": f"{span}合計_1人あたり平均", "値": avg_span})
+    summary_df = pd.DataFrame(summary_rows)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
         result_df.to_excel(w, sheet_name="生徒別", index=False)
         summary_df.to_excel(w, sheet_name="全体サマリ", index=False)
 
     # 分析結果をキャプチャ形式でMarkdown出力
-    report = f"""# 4期目1Q KGI 特進コース(コミットコース) 11月・12月・1月 結果
+    month_names = "・".join(f"{m}月" for _, m in months)
+    month_rows = "\n".join(
+        f"| **{label}** | **{avg}** | {'-' if target is None else target} | "
+        f"{'-' if target is None else f'{avg - target:+.2f}'} |"
+        for label, avg, target in zip(labels, avgs, targets))
+    target_path = "→".join("-" if t is None else str(t) for t in targets)
+    report = f"""# {term} KGI 特進コース(コミットコース) {month_names} 結果
 
 ## KGI: 特進コース(コミットコース)全体の卒業時平均投稿数 80
 
@@ -173,37 +198,34 @@ def main():
 
 ---
 
-## 月別実績（コホート: 初回セッション 2025/6/1〜2026/1/31 の生徒）
+## 月別実績（コホート: 初回セッション {cohort_label} の生徒）
 
 | 月 | 1人あたり平均投稿数 | 目標 | GAP |
 |----|---------------------|------|-----|
-| **2025年11月** | **{avg_nov}** | {TARGET_BY_MONTH.get((2025, 11), "-")} | {avg_nov - TARGET_BY_MONTH.get((2025, 11), 0):+.2f} |
-| **2025年12月** | **{avg_dec}** | {TARGET_BY_MONTH.get((2025, 12), "-")} | {avg_dec - TARGET_BY_MONTH.get((2025, 12), 0):+.2f} |
-| **2026年1月** | **{avg_jan}** | {TARGET_BY_MONTH.get((2026, 1), "-")} | {avg_jan - TARGET_BY_MONTH.get((2026, 1), 0):+.2f} |
+{month_rows}
 
 ---
 
 ## サマリ
 
 - **対象生徒数**: {n}名（初回セッション日で絞り込み済み）
-- **3ヶ月合計 1人あたり平均**: {avg_3m}投稿
-- **KGI目標 卒業時80投稿** に対する進捗指標として、月別目標(6→15→16)との比較を参照
+- **{span}合計 1人あたり平均**: {avg_span}投稿
+- **KGI目標 卒業時80投稿** に対する進捗指標として、月別目標({target_path})との比較を参照
 
 ---
 *出力: コミット_11月12月1月投稿数_集計.py*
 """
-    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
         f.write(report)
 
-    print(f"出力完了: {OUTPUT_PATH}")
-    print(f"分析結果: {REPORT_PATH}")
-    print("\n【KGI 特進コース 11月・12月・1月 結果】")
+    print(f"出力完了: {output_path}")
+    print(f"分析結果: {report_path}")
+    print(f"\n【KGI 特進コース {month_names} 結果】")
     print(f"  対象生徒数: {n}名")
-    print(f"  2025年11月 1人あたり平均: {avg_nov} (目標{TARGET_BY_MONTH.get((2025, 11))})")
-    print(f"  2025年12月 1人あたり平均: {avg_dec} (目標{TARGET_BY_MONTH.get((2025, 12))})")
-    print(f"  2026年1月 1人あたり平均: {avg_jan} (目標{TARGET_BY_MONTH.get((2026, 1))})")
-    print(f"  3ヶ月合計 1人あたり平均: {avg_3m}")
+    for label, avg, target in zip(labels, avgs, targets):
+        print(f"  {label} 1人あたり平均: {avg} (目標{'-' if target is None else target})")
+    print(f"  {span}合計 1人あたり平均: {avg_span}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+コミットプラン (4).xlsx の「セッション実施状況管理」「新 月次投稿数」を読み込み、
+生徒単位の表に整形する共通モジュール。
+
+各集計スクリプトで行ループしていた処理を列単位（ベクトル演算）でまとめて行う。
+
+【卒業の定義】6回目実施日がある、または6ヶ月目のデータがある（0でもデータがあれば卒業）
+【卒業時投稿数】0-6ヶ月目の合計投稿数
+【卒業月】6回目実施日の年月、なければ初回セッションから6ヶ月後を推定
+"""
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE = Path(__file__).parent.parent
+INPUT_NAME = "コミットプラン (4).xlsx"
+
+# セッション実施状況管理
+SESS_SHEET = "セッション実施状況管理"
+SESS_HEADER_ROW = 9
+SESS_DATA_START = 10
+SESS_COL_NO = 0
+SESS_COL_NAME = 7
+SESS_COL_MG = 19  # T列: 担当MG名
+SESS_COL_FIRST_NORMAL = 22  # W列: 初回の通常セッション日
+SESS_COL_LAST_SUPPORT = 18  # S列: 最終サポート日
+SESS_COL_SESSION_DATES = range(21, 34)  # V〜AH列: 0〜12回目のセッション実施日（ヘッダーは数値 0〜12）
+SESS_COL_6TH_DATE = SESS_COL_SESSION_DATES[6]  # AB列: 6回目実施日（ヘッダーで見つからないときに使う）
+
+# 新 月次投稿数
+MONTH_SHEET = "新 月次投稿数"
+MONTH_HEADER_ROW = 10
+MONTH_DATA_START = 11
+MONTH_COL_NO = 0
+MONTH_COL_STATUS = 2  # C列: 在学
+MONTH_COL_NAME = 4
+MONTH_COL_0M = 15   # P列: 0ヶ月目
+MONTH_COL_6M = 21   # V列: 6ヶ月目
+ENROLLED_STATUS = "在学中"
+
+MONTH_LABELS = [f"{m}m" for m in range(7)]  # 0m〜6m
+# k ヶ月目（0m〜6m）に期待する投稿数（KGI 卒業時 80投稿の目標カーブ）
+EXPECTED_MONTHLY_POSTS = np.array([0, 6, 15, 16, 16, 16, 11], dtype=float)
+DASH_VALUES = ("ー", "－", "-", "")
+
+
+def find_input_path():
+    """コミットプラン (4).xlsx の場所を返す（202602分析フォルダ → Downloads の順）。
+    macOS からコピーしたファイルは名前が NFD になっていることがあるため両方の表記で探す。"""
+    for folder in (BASE, Path.home() / "Downloads"):
+        for form in ("NFC", "NFD"):
+            path = folder / unicodedata.normalize(form, INPUT_NAME)
+            if path.exists():
+                return path
+    return BASE / INPUT_NAME
+
+
+INPUT_PATH = find_input_path()
+
+
+def to_num_series(s):
+    """数値に一括変換（「ー」・空欄・変換不可は NaN、小数は切り捨て、全角数字も可）"""
+    text = s.astype(str).str.strip().str.normalize("NFKC")
+    num = pd.to_numeric(text.where(~text.isin(DASH_VALUES)), errors="coerce")
+    return np.trunc(num)
+
+
+def to_date_series(s):
+    """日付セルのみ Timestamp に変換（文字列・数値は NaT）"""
+    is_date = s.map(lambda v: isinstance(v, (pd.Timestamp, datetime)))
+    return pd.to_datetime(s.where(is_date), errors="coerce")
+
+
+def to_no_series(s):
+    """no. 列を整数に変換（変換できない行は NaN）"""
+    return pd.to_numeric(s, errors="coerce")
+
+
+def find_6th_session_col(df_sess):
+    """6回目実施日の列を探す"""
+    return find_6th_session_col_in(df_sess.iloc[SESS_HEADER_ROW])
+
+
+def find_6th_session_col_in(header_row):
+    """ヘッダー行の値の並びから6回目実施日の列を探す。
+    セッション列のヘッダーは回数の数値（0〜12）なので 6 の列を採用し、
+    「6回目実施日」のような文字の見出しも受け付ける。どちらもなければ SESS_COL_6TH_DATE。"""
+    for i, col in enumerate(header_row):
+        if col is None or isinstance(col, bool) or pd.isna(col):
+            continue
+        if isinstance(col, (int, float, np.number)):
+            if col == 6:
+                return i
+            continue
+        col_str = str(col).strip()
+        if "6回目" in col_str and ("実施日" in col_str or "日" in col_str):
+            return i
+    return SESS_COL_6TH_DATE
+
+
+def load_sessions(df_sess):
+    """セッション実施状況管理 → no. をキーにした 生徒名・担当MG・初回セッション日・6回目実施日"""
+    body = df_sess.iloc[SESS_DATA_START:]
+    no_ = to_no_series(body[SESS_COL_NO])
+    sess_6th_col = find_6th_session_col(df_sess)
+    out = pd.DataFrame({
+        "no.": no_,
+        "セッション生徒名": body[SESS_COL_NAME],
+        "担当MG": body[SESS_COL_MG].where(body[SESS_COL_MG].notna(), ""),
+        "初回セッション日": to_date_series(body[SESS_COL_FIRST_NORMAL]),
+        "6回目実施日": to_date_series(body[sess_6th_col]),
+    })
+    out = out[out["no."].notna()].copy()
+    out["no."] = out["no."].astype(int)
+    # 同じ no. が複数行ある場合は後の行を採用（辞書で上書きしていた挙動と同じ）
+    return out.drop_duplicates("no.", keep="last").set_index("no.")
+
+
+def load_session_dates(df_sess):
+    """セッション実施状況管理 → no. をキーにした 0〜12回目のセッション実施日（日付以外は NaT）と最終サポート日"""
+    body = df_sess.iloc[SESS_DATA_START:]
+    dates = pd.DataFrame(
+        {f"{k}回目": to_date_series(body[col]) for k, col in enumerate(SESS_COL_SESSION_DATES)},
+        index=body.index,
+    )
+    dates["最終サポート日"] = to_date_series(body[SESS_COL_LAST_SUPPORT])
+    dates.insert(0, "no.", to_no_series(body[SESS_COL_NO]))
+    dates = dates[dates["no."].notna()].copy()
+    dates["no."] = dates["no."].astype(int)
+    return dates.drop_duplicates("no.", keep="last").set_index("no.")
+
+
+def load_monthly(df_month, exclude_anomalies=False):
+    """新 月次投稿数 → no.・在学・生徒名・0m〜6m（表示用の生値と計算用の数値）。
+    exclude_anomalies=True なら 投稿数異常検知.EXCLUDE_KINDS のフラグが付いた生徒を除く"""
+    body = df_month.iloc[MONTH_DATA_START:]
+    out = pd.DataFrame({
+        "no.": to_no_series(body[MONTH_COL_NO]),
+        "在学": body[MONTH_COL_STATUS],
+        "生徒名": body[MONTH_COL_NAME],
+    })
+    raw = body.iloc[:, MONTH_COL_0M:MONTH_COL_6M + 1]
+    nums = raw.apply(to_num_series)
+    for k, label in enumerate(MONTH_LABELS):
+        out[label] = nums.iloc[:, k]
+    # 6ヶ月目にデータがある（0でも可。「音不」などの文字もデータありとみなす）
+    raw_6m = raw.iloc[:, 6]
+    out["6m_データあり"] = raw_6m.notna() & ~raw_6m.astype(str).str.strip().isin(DASH_VALUES)
+    valid = out["no."].notna() & out["生徒名"].notna() & (out["生徒名"].astype(str).str.strip() != "")
+    out = out[valid].copy()
+    out["no."] = out["no."].astype(int)
+    if exclude_anomalies:
+        import 投稿数異常検知  # 投稿数異常検知 がこのモジュールを読み込むため、ここで読み込む
+        out = out[~投稿数異常検知.has_anomaly(out[MONTH_LABELS].to_numpy(dtype=float))].copy()
+    return out
+
+
+def load_graduates(input_path=None, df_sess=None, df_month=None, exclude_anomalies=False):
+    """卒業生一覧（no.・生徒名・担当MG・卒業月・卒業時投稿数・0m〜6m・初回セッション日・6回目実施日）"""
+    path = input_path or INPUT_PATH
+    if df_sess is None:
+        df_sess = pd.read_excel(path, sheet_name=SESS_SHEET, header=None)
+    if df_month is None:
+        df_month = pd.read_excel(path, sheet_name=MONTH_SHEET, header=None)
+
+    sess = load_sessions(df_sess)
+    month = load_monthly(df_month, exclude_anomalies)
+    df = month.join(sess, on="no.", how="inner")
+
+    is_graduated = df["6回目実施日"].notna() | df["6m_データあり"]
+    df = df[is_graduated].copy()
+    if len(df) and df["6回目実施日"].isna().all():
+        print("警告: 卒業生の誰にも6回目実施日が入っていません。セッション実施状況管理の列がずれていないか確認してください。")
+
+    df["卒業時投稿数"] = df[MONTH_LABELS].fillna(0).sum(axis=1).astype(int)
+    estimated = df["初回セッション日"] + pd.DateOffset(months=6)
+    grad_date = df["6回目実施日"].fillna(estimated)
+    df["卒業月"] = grad_date.dt.strftime("%Y-%m").fillna("")
+    df["初回セッション日"] = df["初回セッション日"].dt.strftime("%Y-%m-%d").fillna("")
+    df["6回目実施日"] = df["6回目実施日"].dt.strftime("%Y-%m-%d").fillna("")
+    for label in MONTH_LABELS:
+        df[label] = df[label].astype(object).where(df[label].notna(), "ー")
+        df[label] = df[label].map(lambda v: v if v == "ー" else int(v))
+
+    cols = ["no.", "生徒名", "担当MG", "卒業月", "卒業時投稿数"] + MONTH_LABELS + ["初回セッション日", "6回目実施日"]
+    return df[cols].reset_index(drop=True)
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+mg_monthly_analysis_results などの Excel を「版（スナップショット）」として取り込み、
+過去の版の時点で KPI を再計算できるようにする追記専用の保存庫。
+
+報告の「4.85本 → 7.85本」のように、別々の版の Excel から出した数値を
+Excel を何十個も残して読み直さずに、同じ定義で再計算するためのもの。
+
+【保存の仕組み】
+- 取り込んだ Excel の全シートを header=None のセル表のまま保存する
+- 行ごとにハッシュを取り、過去の版に同じ行があれば保存しない（版をまたいだ重複除去）
+- 新しく出てきた行だけを列単位の圧縮ファイル（parts/<版ID>.npz）に追記する
+- 版ごとの「行ハッシュの並び」（manifests/<版ID>.npz）と版一覧（snapshots.jsonl）で元のシートを復元する
+- 既存のファイルは書き換えない（追記のみ）
+
+【使い方】
+    python スナップショット保存.py ingest "［最新版］mg_monthly_analysis_results_v1.1.xlsx" --date 2026-02-05
+    python スナップショット保存.py list
+    python スナップショット保存.py kgi --as-of 2025-10-31       # その日時点の最新版で KGI を再計算
+    python スナップショット保存.py kgi --snapshot 20260205-1a2b3c4d
+
+【基準日】その版のデータがいつ時点のものか。--date 省略時は Excel の更新日時
+"""
+import argparse
+import datetime as dt
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+STORE_DIR = Path(__file__).parent / "スナップショット"
+
+# セルの種類
+KIND_NULL, KIND_INT, KIND_FLOAT, KIND_TEXT, KIND_DATETIME, KIND_BOOL, KIND_TIME = range(7)
+
+# 行ハッシュ = Σ セルハッシュ × P^列番号（空セルは 0 なので末尾の空列の有無で変わらない）
+HASH_MULT = 0x100000001B3
+UINT64_MASK = (1 << 64) - 1
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cell_kinds(values):
+    """object 配列 → セルの種類（int8）"""
+    s = pd.Series(values, dtype=object)
+    kinds = np.full(len(s), KIND_TEXT, dtype=np.int8)
+    types = s.map(type)
+    kinds[types.map(lambda t: issubclass(t, (bool, np.bool_))).to_numpy(dtype=bool)] = KIND_BOOL
+    is_int = types.map(lambda t: issubclass(t, (int, np.integer)) and not issubclass(t, (bool, np.bool_)))
+    kinds[is_int.to_numpy(dtype=bool)] = KIND_INT
+    kinds[types.map(lambda t: issubclass(t, (float, np.floating))).to_numpy(dtype=bool)] = KIND_FLOAT
+    kinds[types.map(lambda t: issubclass(t, dt.datetime)).to_numpy(dtype=bool)] = KIND_DATETIME
+    kinds[types.map(lambda t: issubclass(t, dt.time)).to_numpy(dtype=bool)] = KIND_TIME
+    kinds[s.isna().to_numpy()] = KIND_NULL
+    return kinds
+
+
+def encode_column(values):
+    """object 配列 → (種類, 数値, 文字列) の3本の配列"""
+    values = np.asarray(values, dtype=object)
+    kinds = cell_kinds(values)
+    numeric = np.full(len(values), np.nan)
+    is_num = np.isin(kinds, (KIND_INT, KIND_FLOAT, KIND_BOOL))
+    numeric[is_num] = values[is_num].astype(float)
+    text = np.full(len(values), "", dtype=object)
+    is_text = kinds == KIND_TEXT
+    text[is_text] = [str(v) for v in values[is_text]]
+    is_temporal = (kinds == KIND_DATETIME) | (kinds == KIND_TIME)
+    text[is_temporal] = [v.isoformat() for v in values[is_temporal]]
+    return kinds, numeric, text.astype(str)
+
+
+def decode_column(kinds, numeric, text):
+    """(種類, 数値, 文字列) → object 配列（read_excel(header=None) と同じ型のセル）"""
+    out = np.full(len(kinds), np.nan, dtype=object)
+    m = kinds == KIND_INT
+    out[m] = [int(v) for v in numeric[m]]
+    m = kinds == KIND_FLOAT
+    out[m] = numeric[m].tolist()
+    m = kinds == KIND_BOOL
+    out[m] = [bool(v) for v in numeric[m]]
+    m = kinds == KIND_TEXT
+    out[m] = text[m].tolist()
+    m = kinds == KIND_DATETIME
+    out[m] = [pd.Timestamp(str(v)) for v in text[m]]
+    m = kinds == KIND_TIME
+    out[m] = [dt.time.fromisoformat(str(v)) for v in text[m]]
+    return out
+
+
+def row_hashes(columns):
+    """列ごとの (種類, 数値, 文字列) → 行ハッシュ（uint64）"""
+    n = len(columns[0][0]) if columns else 0
+    acc = np.zeros(n, dtype=np.uint64)
+    mult = 1
+    for kinds, numeric, text in columns:
+        keys = np.char.add(np.char.add(kinds.astype(str), numeric.astype(str)), np.char.add("|", text))
+        h = pd.util.hash_array(keys.astype(object))
+        h[kinds == KIND_NULL] = 0
+        acc += h * np.uint64(mult)
+        mult = (mult * HASH_MULT) & UINT64_MASK
+    # 仕上げの撹拌（splitmix64）
+    acc ^= acc >> np.uint64(30)
+    acc *= np.uint64(0xBF58476D1CE4E5B9)
+    acc ^= acc >> np.uint64(27)
+    acc *= np.uint64(0x94D049BB133111EB)
+    acc ^= acc >> np.uint64(31)
+    return acc
+
+
+class SnapshotStore:
+    """追記専用のスナップショット保存庫"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.catalog_path = self.root / "snapshots.jsonl"
+        self.parts_dir = self.root / "parts"
+        self.manifests_dir = self.root / "manifests"
+
+    # ---- 版一覧 ----
+    def records(self):
+        if not self.catalog_path.exists():
+            return []
+        with open(self.catalog_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def snapshots(self):
+        """版一覧（基準日順）"""
+        rows = [
+            {"版ID": r["id"], "基準日": r["基準日"], "ファイル": r["file"], "取込日時": r["ingested_at"],
+             "シート数": len(r["sheets"]), "新規行数": r["new_rows"], "総行数": r["total_rows"]}
+            for r in self.records()
+        ]
+        df = pd.DataFrame(rows, columns=["版ID", "基準日", "ファイル", "取込日時", "シート数", "新規行数", "総行数"])
+        return df.sort_values(["基準日", "取込日時"]).reset_index(drop=True)
+
+    def resolve(self, as_of=None, snapshot_id=None):
+        """版IDまたは日付 → 版の情報。as_of はその日以前で基準日が最も新しい版（どちらも省略時は最新版）"""
+        records = self.records()
+        if not records:
+            raise SystemExit(f"スナップショットがありません: {self.root}")
+        if snapshot_id is not None:
+            for r in records:
+                if r["id"] == snapshot_id:
+                    return r
+            raise SystemExit(f"版IDが見つかりません: {snapshot_id}")
+        records = sorted(records, key=lambda r: (r["基準日"], r["ingested_at"]))
+        if as_of is not None:
+            limit = pd.Timestamp(as_of).strftime("%Y-%m-%d")
+            records = [r for r in records if r["基準日"] <= limit]
+            if not records:
+                raise SystemExit(f"{limit} 以前のスナップショットがありません")
+        return records[-1]
+
+    # ---- 取り込み ----
+    def _known_hashes(self, sheet):
+        """既存パーティションに保存済みの行ハッシュ"""
+        known = []
+        for r in self.records():
+            if sheet in r["part_sheets"]:
+                with np.load(self.parts_dir / f"{r['id']}.npz") as part:
+                    known.append(part[f"h{r['part_sheets'][sheet]}"])
+        return np.concatenate(known) if known else np.array([], dtype=np.uint64)
+
+    def ingest(self, path, as_of=None):
+        """Excel を1版として取り込む。同じ内容のファイルが取り込み済みならその版を返す"""
+        path = Path(path)
+        sha = file_sha256(path)
+        for r in self.records():
+            if r["sha256"] == sha:
+                return r, False
+
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp(path.stat().st_mtime, unit="s")
+        snapshot_id = f"{as_of:%Y%m%d}-{sha[:8]}"
+        sheets = pd.read_excel(path, sheet_name=None, header=None)
+
+        part, manifest, sheet_meta, part_sheets = {}, {}, {}, {}
+        new_rows = total_rows = 0
+        for i, (name, grid) in enumerate(sheets.items()):
+            grid = grid.astype(object)
+            columns = [encode_column(grid[c].to_numpy()) for c in grid.columns]
+            hashes = row_hashes(columns) if columns else np.zeros(len(grid), dtype=np.uint64)
+            manifest[f"s{i}"] = hashes
+            sheet_meta[name] = {"key": f"s{i}", "rows": len(grid), "cols": grid.shape[1]}
+            total_rows += len(grid)
+
+            _, first = np.unique(hashes, return_index=True)
+            first = np.sort(first)
+            fresh = first[~np.isin(hashes[first], self._known_hashes(name))]
+            if len(fresh) == 0:
+                continue
+            j = len(part_sheets)
+            part_sheets[name] = j
+            part[f"h{j}"] = hashes[fresh]
+            for c, (kinds, numeric, text) in enumerate(columns):
+                part[f"k{j}_{c}"] = kinds[fresh]
+                part[f"n{j}_{c}"] = numeric[fresh]
+                part[f"t{j}_{c}"] = text[fresh]
+            new_rows += len(fresh)
+
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        if part:
+            np.savez_compressed(self.parts_dir / f"{snapshot_id}.npz", **part)
+        np.savez_compressed(self.manifests_dir / f"{snapshot_id}.npz", **manifest)
+        record = {
+            "id": snapshot_id,
+            "file": path.name,
+            "sha256": sha,
+            "基準日": f"{as_of:%Y-%m-%d}",
+            "ingested_at": dt.datetime.now().isoformat(timespec="seconds"),
+            "sheets": sheet_meta,
+            "part_sheets": part_sheets,
+            "new_rows": new_rows,
+            "total_rows": total_rows,
+        }
+        with open(self.catalog_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record, True
+
+    # ---- 復元 ----
+    def read_grid(self, sheet, as_of=None, snapshot_id=None):
+        """版のシートを read_excel(header=None) と同じセル表で復元する"""
+        record = self.resolve(as_of, snapshot_id)
+        if sheet not in record["sheets"]:
+            raise KeyError(f"{record['id']} にシート「{sheet}」がありません")
+        meta = record["sheets"][sheet]
+        with np.load(self.manifests_dir / f"{record['id']}.npz") as m:
+            wanted = m[meta["key"]]
+        n_cols = meta["cols"]
+
+        needed = np.unique(wanted)
+        found_hashes, found_cols = [], []
+        for r in self.records():
+            if sheet not in r["part_sheets"] or len(needed) == 0:
+                continue
+            j = r["part_sheets"][sheet]
+            with np.load(self.parts_dir / f"{r['id']}.npz") as part:
+                hashes = part[f"h{j}"]
+                take = np.isin(hashes, needed)
+                if not take.any():
+                    continue
+                cols = []
+                for c in range(n_cols):
+                    if f"k{j}_{c}" in part:
+                        cols.append(decode_column(part[f"k{j}_{c}"][take], part[f"n{j}_{c}"][take], part[f"t{j}_{c}"][take]))
+                    else:
+                        cols.append(np.full(int(take.sum()), np.nan, dtype=object))
+            found_hashes.append(hashes[take])
+            found_cols.append(np.column_stack(cols) if cols else np.empty((int(take.sum()), 0), dtype=object))
+            needed = needed[~np.isin(needed, hashes[take])]
+
+        if len(needed):
+            raise RuntimeError(f"{record['id']} の「{sheet}」で復元できない行があります（{len(needed)}行）")
+        if not found_hashes:
+            return pd.DataFrame(np.empty((len(wanted), n_cols), dtype=object))
+        hashes = np.concatenate(found_hashes)
+        rows = np.concatenate(found_cols)
+        order = np.argsort(hashes)
+        pos = order[np.searchsorted(hashes[order], wanted)]
+        return pd.DataFrame(rows[pos], columns=range(n_cols))
+
+    def read_excel(self, sheet_name, header=0, as_of=None, snapshot_id=None):
+        """pd.read_excel(path, sheet_name, header) の代わり（版のシートから同じ表を作る）"""
+        grid = self.read_grid(sheet_name, as_of, snapshot_id)
+        if grid.shape[1] == 0:
+            return pd.DataFrame()
+        rows = grid.where(grid.notna(), "").to_numpy().tolist()
+        return TextParser(rows, header=header).read()
+
+    def disk_usage(self):
+        """保存庫のファイルサイズ合計（バイト）"""
+        return sum(p.stat().st_size for p in self.root.rglob("*") if p.is_file())
+
+
+def kgi_as_of(store, as_of=None, snapshot_id=None):
+    """版の時点で KGI（全期間合計平均投稿数）を再計算する"""
+    from KGI_全期間合計平均投稿数_コミットとPP import compute_kgi
+
+    record = store.resolve(as_of, snapshot_id)
+    df_cc = store.read_excel("コミットRawdata", header=0, snapshot_id=record["id"])
+    df_pp = store.read_excel("PP_Rawdata", header=2, snapshot_id=record["id"])
+    return record, compute_kgi(df_cc, df_pp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Excel の版を保存し、過去の版の時点で再計算する")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="保存庫のディレクトリ")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="Excel を版として取り込む")
+    p_ingest.add_argument("paths", nargs="+", type=Path)
+    p_ingest.add_argument("--date", default=None, help="基準日（省略時はファイルの更新日時）")
+
+    sub.add_parser("list", help="版の一覧")
+
+    p_kgi = sub.add_parser("kgi", help="過去の版で KGI を再計算")
+    p_kgi.add_argument("--as-of", default=None, help="この日以前の最新版を使う")
+    p_kgi.add_argument("--snapshot", default=None, help="版ID")
+
+    args = parser.parse_args(argv)
+    store = SnapshotStore(args.store)
+
+    if args.command == "ingest":
+        for path in args.paths:
+            record, created = store.ingest(path, args.date)
+            if created:
+                print(f"取込: {path.name} → 版 {record['id']}（新規 {record['new_rows']}行 / 全 {record['total_rows']}行）")
+            else:
+                print(f"取込済み: {path.name}（版 {record['id']}）")
+        print(f"保存庫: {store.root}（{store.disk_usage() / 1024:.0f} KB）")
+        return
+
+    if args.command == "list":
+        print(store.snapshots().to_string(index=False))
+        return
+
+    record, kgi = kgi_as_of(store, args.as_of, args.snapshot)
+    print(f"【KGI 生徒一人当たり全期間合計平均投稿数（版 {record['id']}・基準日 {record['基準日']}）】")
+    for course, (avg, n) in kgi.items():
+        print(f"  {course}：{avg}本（{n}人）")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+大きなチャットログを、ファイル全体を読み込まずに並列で集計する。
+
+各ログを mmap で開き、CHUNK_BYTES ごとの位置から次のブロック見出しの行頭まで進めて
+チャンクに分ける（ブロックの途中で切らない）。チャンクはプロセスプールで数え、
+チャンクごとの件数を足し合わせる。ワーカーは自分のチャンクの範囲だけを読むので、
+ファイルがいくら大きくてもメモリは チャンク × ワーカー数 程度に収まる。
+
+【数える内容】チーム別_3ヶ月投稿数とチャット活発度_集計.py の count_chat_blocks_and_keywords と同じ
+- ブロック数: 番号形式の見出し行の数（なければ「— 2025/11/01 」の日付の数）
+- 注意・依頼系 / FB・振り返り系キーワードの出現数（部分一致の合計）
+
+【使い方】
+    python チャットログ並列集計.py                       # CHAT_DIR の全ログ
+    python チャットログ並列集計.py --chat-dir ログ --workers 4 --chunk-mb 16
+"""
+import argparse
+import mmap
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import チャットログ読込
+from チャットログ読込 import KEYWORDS_FEEDBACK, KEYWORDS_SUPERVISION
+
+CHUNK_BYTES = 8 * 1024 * 1024
+
+# チャンクの境目を探す見出し行（バイト列のまま mmap を検索する）
+NUMBERED_LINE = re.compile(rb"^\d+\.\s+###\s", re.MULTILINE)
+DATED_LINE = re.compile(rb"^[^\n]*\xe2\x80\x94\s*\d{4}/\d{2}/\d{2}\s", re.MULTILINE)  # \xe2\x80\x94 = "—"
+
+# 数える方（デコード後の文字列。count_chat_blocks_and_keywords と同じ正規表現）
+NUMBERED_BLOCK = re.compile(r"^\d+\.\s+###\s", re.MULTILINE)
+DATED_BLOCK = re.compile(r"—\s*\d{4}/\d{2}/\d{2}\s")
+COUNT_KEYS = ["ブロック数_番号", "ブロック数_日付", "注意・依頼系", "FB・振り返り系"]
+
+
+def chunk_bounds(mm, chunk_bytes=CHUNK_BYTES):
+    """mmap → [(開始, 終了), ...]。境目はブロック見出しの行頭（見出しがなければファイル全体で1チャンク）"""
+    size = len(mm)
+    header = NUMBERED_LINE if NUMBERED_LINE.search(mm) else DATED_LINE
+    bounds, start = [], 0
+    while start < size:
+        pos = start + chunk_bytes
+        if pos >= size:
+            bounds.append((start, size))
+            break
+        found = header.search(mm, pos)
+        end = found.start() if found else size
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def count_text(text):
+    """テキスト → COUNT_KEYS の件数"""
+    return {
+        "ブロック数_番号": len(NUMBERED_BLOCK.findall(text)),
+        "ブロック数_日付": len(DATED_BLOCK.findall(text)),
+        "注意・依頼系": sum(text.count(kw) for kw in KEYWORDS_SUPERVISION),
+        "FB・振り返り系": sum(text.count(kw) for kw in KEYWORDS_FEEDBACK),
+    }
+
+
+def scan_chunk(path, start, end):
+    """ファイルの [start, end) だけを mmap から読んで数える（ワーカーで実行）"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return str(path), count_text(mm[start:end].decode("utf-8"))
+
+
+def plan(paths, chunk_bytes=CHUNK_BYTES):
+    """ファイル一覧 → (path, 開始, 終了) のタスク一覧"""
+    tasks = []
+    for path in paths:
+        if Path(path).stat().st_size == 0:
+            continue
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            tasks.extend((str(path), start, end) for start, end in chunk_bounds(mm, chunk_bytes))
+    return tasks
+
+
+def scan_files(paths, workers=None, chunk_bytes=CHUNK_BYTES):
+    """ファイルごとの件数（チャンクの件数を合算）→ チーム名・ファイル・ブロック数・キーワード数・チャンク数の表"""
+    paths = [Path(p) for p in paths]
+    tasks = plan(paths, chunk_bytes)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        results = [scan_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(scan_chunk, *zip(*tasks)))
+
+    totals = {str(p): dict.fromkeys(COUNT_KEYS, 0) | {"チャンク数": 0} for p in paths}
+    for path, counts in results:
+        for key, value in counts.items():
+            totals[path][key] += value
+        totals[path]["チャンク数"] += 1
+    rows = []
+    for path in paths:
+        t = totals[str(path)]
+        team, term = チャットログ読込.team_of(path)
+        rows.append({
+            "チーム名": team,
+            "期Q": term,
+            "ファイル": path.name,
+            "サイズMB": round(path.stat().st_size / 1024 / 1024, 2),
+            # 番号形式の見出しが1つでもあればそれを、なければ日付の数をブロック数とする
+            "ブロック数": t["ブロック数_番号"] if t["ブロック数_番号"] > 0 else t["ブロック数_日付"],
+            "注意・依頼系キーワード出現数": t["注意・依頼系"],
+            "FB・振り返り系キーワード出現数": t["FB・振り返り系"],
+            "チャンク数": t["チャンク数"],
+        })
+    return pd.DataFrame(rows)
+
+
+def peak_memory_mb():
+    """このプロセスの最大常駐メモリ（MB。取得できない環境では NaN）"""
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="チャットログを mmap・プロセスプールで並列に集計する")
+    parser.add_argument("--chat-dir", type=Path, default=None, help="チャットログのフォルダ")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカー数（既定: CPU数）")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / 1024 / 1024, help="チャンクの大きさ（MB）")
+    args = parser.parse_args(argv)
+
+    paths = チャットログ読込.log_files(args.chat_dir)
+    if not paths:
+        print(f"チャットログがありません: {args.chat_dir or チャットログ読込.CHAT_DIR}")
+        return None
+    t0 = time.perf_counter()
+    result = scan_files(paths, args.workers, int(args.chunk_mb * 1024 * 1024))
+    elapsed = time.perf_counter() - t0
+
+    print(f"【チャットログ並列集計】{len(paths)}ファイル・{result['サイズMB'].sum():.1f}MB・"
+          f"{result['チャンク数'].sum()}チャンク（{elapsed:.2f}秒 / 最大メモリ {peak_memory_mb():.0f}MB）")
+    for _, row in result.iterrows():
+        print(f"  {row['チーム名']}: ブロック数={row['ブロック数']}, "
+              f"注意・依頼系={row['注意・依頼系キーワード出現数']}, FB・振り返り系={row['FB・振り返り系キーワード出現数']}")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
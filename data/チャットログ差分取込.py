@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+チャットログを差分だけ取り込み、チーム × 日 のブロック数・キーワード数を更新する。
+
+ログは後ろに追記されていくだけなので、ファイルごとに「どこまで読んだか」（最後のブロックの
+開始バイト位置）と、その最後のブロック・ファイル先頭 PREFIX_BYTES バイトのハッシュを覚えておき、
+次回はそこから後ろだけを読む。毎日の更新は新しいメッセージの分（＋先頭の確認）だけで済む。
+
+【前提】ログは追記のみ（書き出し直すときも、それまでの部分は変えない）。
+先頭 PREFIX_BYTES バイトと最後のブロックは毎回確かめるが、その間（先頭より後・最後のブロックより前）が
+大きさを変えずに書き換えられた場合は検知できず、件数は古いまま残る。手で直したログは --rebuild で取り込み直す。
+
+【取り込みの手順（ファイルごと）】
+1. 先頭のハッシュと、前回の最後のブロック（開始位置〜前回のファイル末尾）のハッシュが変わっていない → 追記とみなす
+   - 最後のブロックは追記で本文が伸びていることがあるため、前回数えた分を引いてから開始位置から読み直す
+   - 大きさも前回と同じなら何もしない
+2. ファイルが短くなった・どちらかのハッシュが違う → 書き換えられたとみなし、そのファイルの件数を消して最初から読む
+3. 形式（番号・日付）は最初のブロックより前から読むたびに決め直す。見出しがまだないログ（タイトルと
+   「## 2025/11/01」だけなど）を 日付 と決めたまま、後から追記された番号形式のブロックを数えないように
+
+【確かめ方】--verify: 各ログを先頭から1行ずつ（長いログは VERIFY_CUTS か所で区切って）書き足しながら
+一時DBに取り込み、最後の件数がログ全体を読み直したとき（チャットログ読込.parse_file）と同じか確かめる
+
+【保存先】チャット集計.sqlite
+- 取込状況 : ファイル・チーム名・形式・オフセット・ファイル末尾・最終ブロックのハッシュ・件数・番号・直前の日付・
+             先頭のハッシュ
+- 日別件数 : ファイル × 日付 のブロック数・注意・依頼系・FB・振り返り系（チーム × 日 は daily_counts で合算）
+キーワードの数え方は チャットログ読込.keyword_counts（ブロックの本文の部分一致）
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import チャットログ読込
+
+DB_PATH = Path(__file__).parent / "チャット集計.sqlite"
+PREFIX_BYTES = 1 << 20  # 書き換えの確認に毎回ハッシュする先頭の大きさ
+VERIFY_CUTS = 200  # --verify で1ファイルを区切る数の上限（行数がこれ以下なら1行ずつ書き足す）
+VERIFY_HEAD_LINES = 10  # --verify で長いログも1行ずつ書き足す先頭の行数（見出しがまだない段階を必ず通す）
+COUNT_COLUMNS = ["ブロック数", "注意・依頼系", "FB・振り返り系"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS 取込状況 (
+    ファイル TEXT PRIMARY KEY, チーム名 TEXT, 形式 TEXT,
+    オフセット INTEGER, 末尾 INTEGER, ハッシュ TEXT,
+    最終ブロック TEXT, 番号 INTEGER, 直前日付 TEXT, 更新日時 TEXT, 先頭ハッシュ TEXT
+);
+CREATE TABLE IF NOT EXISTS 日別件数 (
+    ファイル TEXT, チーム名 TEXT, 日付 TEXT,
+    ブロック数 INTEGER, "注意・依頼系" INTEGER, "FB・振り返り系" INTEGER,
+    PRIMARY KEY (ファイル, 日付)
+);
+"""
+
+
+def digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def connect(path=DB_PATH):
+    con = sqlite3.connect(str(path))
+    con.executescript(SCHEMA)
+    columns = [row[1] for row in con.execute("PRAGMA table_info(取込状況)")]
+    if "先頭ハッシュ" not in columns:
+        # 先頭ハッシュを持たない古いDB。空のままなので、次の取り込みで各ファイルを最初から読み直す
+        con.execute("ALTER TABLE 取込状況 ADD COLUMN 先頭ハッシュ TEXT DEFAULT ''")
+    return con
+
+
+def split_lines(data):
+    """バイト列 → (行の文字列の並び, 各行の開始バイト位置)。途中で切れた文字は置き換える"""
+    raw = data.split(b"\n")
+    starts, pos = [], 0
+    for line in raw:
+        starts.append(pos)
+        pos += len(line) + 1
+    return [line.decode("utf-8", errors="replace") for line in raw], starts
+
+
+def add_counts(con, file, team, rows, sign=1):
+    """日別件数に (日付, ブロック数, 注意・依頼系, FB・振り返り系) を足す（sign=-1 で引く）"""
+    con.executemany(
+        'INSERT INTO 日別件数 VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (ファイル, 日付) DO UPDATE SET '
+        'ブロック数 = ブロック数 + excluded.ブロック数, '
+        '"注意・依頼系" = "注意・依頼系" + excluded."注意・依頼系", '
+        '"FB・振り返り系" = "FB・振り返り系" + excluded."FB・振り返り系"',
+        [(file, team, day, sign * b, sign * s, sign * f) for day, b, s, f in rows])
+
+
+def ingest_file(con, path):
+    """1ファイルを差分で取り込む → (状態, 読んだバイト数, 数えたブロック数)"""
+    path = Path(path)
+    file = path.name
+    team, _ = チャットログ読込.team_of(path)
+    state = con.execute(
+        "SELECT 形式, オフセット, 末尾, ハッシュ, 最終ブロック, 番号, 直前日付, 先頭ハッシュ FROM 取込状況 "
+        "WHERE ファイル = ?", (file,)).fetchone()
+    size = path.stat().st_size
+    rewritten = False
+
+    with open(path, "rb") as f:
+        if state is not None:
+            layout, offset, end, last_hash, last_block, number, carry, head_hash = state
+            head = f.read(min(PREFIX_BYTES, end))
+            f.seek(offset)
+            previous = f.read(end - offset)
+            if size < end or digest(previous) != last_hash or digest(head) != head_hash:
+                con.execute("DELETE FROM 日別件数 WHERE ファイル = ?", (file,))
+                state, rewritten = None, True
+            elif size == end:
+                return "変更なし", len(head) + len(previous), 0
+        if state is None:
+            offset, number, carry, last_block = 0, 0, ["", ""], None
+        else:
+            carry = json.loads(carry)
+            last_block = json.loads(last_block) if last_block else None
+        f.seek(offset)
+        data = f.read(size - offset)
+    if offset == 0:
+        # 最初のブロックより前から読み直すとき（新規・書き換え・まだ見出しのないログへの追記）は、
+        # 読んだ全体で形式を決め直す。タイトルと日付見出しだけのログを 日付 と決めたままにしない
+        layout = チャットログ読込.detect_layout(data.decode("utf-8", errors="replace"))
+
+    lines, starts = split_lines(data)
+    blocks = list(チャットログ読込.iter_blocks(lines, layout, tuple(carry), number))
+    if last_block:
+        # 前回の最後のブロックは読み直すので、前回数えた分を引いておく
+        add_counts(con, file, team, [last_block], sign=-1)
+    if blocks:
+        text = pd.Series([b["本文"] for b in blocks])
+        counts = チャットログ読込.keyword_counts(text)
+        rows = [(b["日付"], 1, int(s), int(fb)) for b, s, fb in
+                zip(blocks, counts["注意・依頼系"], counts["FB・振り返り系"])]
+        add_counts(con, file, team, rows)
+        tail = blocks[-1]
+        new_offset = offset + starts[tail["見出し行"]]
+        last_row, new_number, new_carry = list(rows[-1]), tail["番号"] - 1, list(tail["直前日付"])
+    else:
+        new_offset, last_row, new_number, new_carry = offset, None, number, carry
+
+    with open(path, "rb") as f:
+        new_head_hash = digest(f.read(min(PREFIX_BYTES, size)))
+        f.seek(new_offset)
+        new_hash = digest(f.read(size - new_offset))
+    con.execute(
+        "INSERT OR REPLACE INTO 取込状況 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (file, team, layout, new_offset, size, new_hash, json.dumps(last_row, ensure_ascii=False) if last_row else "",
+         new_number, json.dumps(new_carry, ensure_ascii=False), datetime.now().isoformat(timespec="seconds"),
+         new_head_hash))
+    read_state = "書き換え（最初から）" if rewritten else ("追記" if offset else "新規")
+    new_blocks = len(blocks) - (1 if last_block else 0)
+    return read_state, size - offset, new_blocks
+
+
+def ingest(chat_dir=None, path=DB_PATH, rebuild=False):
+    """フォルダ内の全ログを差分で取り込む → ファイルごとの結果の表"""
+    path = Path(path)
+    if rebuild:
+        path.unlink(missing_ok=True)
+    con = connect(path)
+    rows = []
+    try:
+        for log in チャットログ読込.log_files(chat_dir):
+            state, read_bytes, new_blocks = ingest_file(con, log)
+            con.commit()
+            rows.append({"ファイル": log.name, "状態": state, "読んだバイト数": read_bytes, "新しいブロック数": new_blocks})
+    finally:
+        con.close()
+    return pd.DataFrame(rows, columns=["ファイル", "状態", "読んだバイト数", "新しいブロック数"])
+
+
+def daily_counts(path=DB_PATH):
+    """チーム名 × 日付 のブロック数・キーワード数"""
+    con = connect(path)
+    try:
+        return pd.read_sql_query(
+            'SELECT チーム名, 日付, SUM(ブロック数) AS ブロック数, SUM("注意・依頼系") AS "注意・依頼系", '
+            'SUM("FB・振り返り系") AS "FB・振り返り系" FROM 日別件数 GROUP BY チーム名, 日付 '
+            "HAVING SUM(ブロック数) > 0 ORDER BY チーム名, 日付", con)
+    finally:
+        con.close()
+
+
+def file_counts(con, file):
+    """取り込んだ1ファイルの 日付 → 件数（すべて0の日は除く）"""
+    df = pd.read_sql_query(
+        'SELECT 日付, ブロック数, "注意・依頼系", "FB・振り返り系" FROM 日別件数 WHERE ファイル = ? ORDER BY 日付',
+        con, params=(file,))
+    return df[(df[COUNT_COLUMNS] != 0).any(axis=1)].set_index("日付")[COUNT_COLUMNS].astype(int)
+
+
+def full_counts(path):
+    """ログ全体を読み直したときの 日付 → 件数（--verify の比較相手）"""
+    blocks = チャットログ読込.parse_file(path)
+    counts = チャットログ読込.keyword_counts(blocks["本文"])
+    df = pd.DataFrame({"日付": blocks["日付"], "ブロック数": 1,
+                       "注意・依頼系": counts["注意・依頼系"], "FB・振り返り系": counts["FB・振り返り系"]})
+    return df.groupby("日付")[COUNT_COLUMNS].sum().sort_index().astype(int)
+
+
+def cut_points(data, cuts=VERIFY_CUTS, head_lines=VERIFY_HEAD_LINES):
+    """ログのバイト列 → 書き足していく区切り（行の終わりのバイト位置。最後はファイル末尾）"""
+    ends = [start for start in split_lines(data)[1][1:] if start < len(data)]
+    if len(ends) > cuts:
+        rest = ends[head_lines:]
+        step = -(-len(rest) // (cuts - head_lines))
+        ends = ends[:head_lines] + rest[::step]
+    return ends + [len(data)]
+
+
+def verify(chat_dir=None, cuts=VERIFY_CUTS):
+    """各ログを先頭から書き足しながら一時DBに取り込み、全体を読み直したときと件数が同じか確かめる
+    → ファイルごとの 取込回数・ブロック数・一致・違う日付"""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for log in チャットログ読込.log_files(chat_dir):
+            data = log.read_bytes()
+            copy = Path(tmp) / log.name
+            con = connect(Path(tmp) / f"{log.stem}.sqlite")
+            try:
+                points = cut_points(data, cuts)
+                for end in points:
+                    copy.write_bytes(data[:end])
+                    ingest_file(con, copy)
+                    con.commit()
+                got = file_counts(con, log.name)
+            finally:
+                con.close()
+            want = full_counts(log)
+            days = sorted(set(got.index) | set(want.index))
+            got, want = got.reindex(days, fill_value=0), want.reindex(days, fill_value=0)
+            wrong = [day for day in days if not got.loc[day].equals(want.loc[day])]
+            rows.append({"ファイル": log.name, "取込回数": len(points), "ブロック数": int(want["ブロック数"].sum()),
+                         "一致": not wrong, "違う日付": ", ".join(wrong)})
+    return pd.DataFrame(rows, columns=["ファイル", "取込回数", "ブロック数", "一致", "違う日付"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="チャットログを差分で取り込み、チーム × 日 の件数を更新する")
+    parser.add_argument("--chat-dir", type=Path, default=None, help="チャットログのフォルダ")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="集計DBのパス")
+    parser.add_argument("--rebuild", action="store_true", help="取込状況を消して最初から取り込む")
+    parser.add_argument("--xlsx", type=Path, default=None, help="チーム × 日 の件数（--verify では確認結果）を Excel に出力")
+    parser.add_argument("--verify", action="store_true",
+                        help="--db は使わず、書き足しながらの取り込みが全体の読み直しと同じ件数になるか確かめる")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        checked = verify(args.chat_dir)
+        print(f"【チャットログ差分取込の確認】{len(checked)}ファイル・不一致 {int((~checked['一致']).sum())}件")
+        for _, row in checked.iterrows():
+            print(f"  {row['ファイル']}: {'一致' if row['一致'] else '不一致'}（{row['取込回数']}回取込・"
+                  f"ブロック {row['ブロック数']}件）" + (f" 違う日付: {row['違う日付']}" if row["違う日付"] else ""))
+        if args.xlsx:
+            args.xlsx.parent.mkdir(parents=True, exist_ok=True)
+            checked.to_excel(args.xlsx, index=False)
+            print(f"出力: {args.xlsx}")
+        if not checked["一致"].all():
+            raise SystemExit(1)
+        return checked
+
+    t0 = time.perf_counter()
+    result = ingest(args.chat_dir, args.db, args.rebuild)
+    elapsed = time.perf_counter() - t0
+    if result.empty:
+        print(f"チャットログがありません: {args.chat_dir or チャットログ読込.CHAT_DIR}")
+        return result
+    daily = daily_counts(args.db)
+
+    print(f"【チャットログ差分取込】{len(result)}ファイル・{result['読んだバイト数'].sum():,}バイト読込"
+          f"（{elapsed:.2f}秒）")
+    for _, row in result.iterrows():
+        print(f"  {row['ファイル']}: {row['状態']} / {row['読んだバイト数']:,}バイト / "
+              f"新しいブロック {row['新しいブロック数']}件")
+    for team, group in daily.groupby("チーム名"):
+        print(f"  {team}: {len(group)}日・ブロック数={group['ブロック数'].sum()}")
+    if args.xlsx:
+        daily.to_excel(args.xlsx, index=False)
+        print(f"出力: {args.xlsx}")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+チーム別チャットログ（Discord から書き出した Markdown）を読み込み、
+1メッセージ = 1行（チーム・日付・発言者・役割・本文）の表にする共通モジュール。
+
+【ログの形式（ファイルごとにどちらか）】
+- 番号形式: 「123. ### 【MG】名前」の行から次の同じ形式の行までが1ブロック。
+            日付は見出し行の中（「— 2025/11/01 10:23」など）、なければ直後の日付だけの行、
+            それもなければ直前に出てきた日付見出し（「## 2025/11/01」など）
+- 日付形式: 「名前 — 2025/11/01 10:23」の行から次の同じ形式の行までが1ブロック（ゆりチーム形式）
+
+【役割】発言者名の先頭の【】（例:【MG】→ MG）。なければ空欄
+【チーム】TEAM_FILE_MAP のファイル名から。載っていないファイルは「○○チーム_…」の ○○ + "T"
+"""
+import re
+from pathlib import Path
+
+import pandas as pd
+
+BASE = Path(__file__).parent
+CHAT_DIR = BASE.parent.parent / "コーチングチーム5チーム分析" / "チーム別チャットログ"
+
+# チーム名の対応（Excel表記 → チャットログファイル名）
+TEAM_FILE_MAP = {
+    "トミーT": "トミーチーム_4期1Q_チャットログ.md",
+    "そたかT": "そたかチーム_4期1Q_チャットログ.md",
+    "ちづるT": "ちづるチーム_4期1Q_チャットログ.md",
+    "ゆりT": "ゆりチーム_4期1Q_チャットログ.md",
+    "なつみT": "なつみチーム_4期1Q_チャットログ.md",
+}
+
+# 注意・訂正・指摘など「メンバーへの指揮」に関連しそうなキーワード（部分一致）
+KEYWORDS_SUPERVISION = [
+    "注意", "訂正", "指摘", "気をつけ", "改善して", "直して", "お願いします",
+    "〜ください", "確認お願い", "入力漏れ", "遅くなり", "申し訳",
+]
+KEYWORDS_FEEDBACK = ["FB", "フィードバック", "振り返り", "良い点", "改善点"]
+
+BLOCK_COLUMNS = ["チーム名", "期Q", "ファイル", "番号", "日付", "時刻", "発言者", "役割", "本文"]
+
+NUMBERED_HEADER = re.compile(r"^\d+\.\s+###\s+(.*)$")
+DATED_HEADER = re.compile(r"^(.*?)\s*—\s*(\d{4}/\d{2}/\d{2})(?:\s+(\d{1,2}:\d{2}))?(?:\s|$)")
+DATE_IN_TEXT = re.compile(r"(\d{4})[/年-](\d{1,2})[/月-](\d{1,2})日?(?:\s*(\d{1,2}:\d{2}))?")
+DATE_ONLY_LINE = re.compile(r"^[#\s>*_—\-]*(\d{4})[/年-](\d{1,2})[/月-](\d{1,2})日?(?:\s*(\d{1,2}:\d{2}))?[\s*_）)]*$")
+ROLE_PREFIX = re.compile(r"^【([^】]*)】\s*")
+TERM_IN_NAME = re.compile(r"(\d+期\dQ)")
+
+
+def team_of(path):
+    """ファイル名 → (チーム名, 期Q)"""
+    name = Path(path).name
+    term = TERM_IN_NAME.search(name)
+    for team, filename in TEAM_FILE_MAP.items():
+        if filename == name:
+            break
+    else:
+        team = name.split("チーム")[0] + "T" if "チーム" in name else Path(path).stem
+    return team, term.group(1) if term else ""
+
+
+def detect_layout(text):
+    """番号形式の見出しが1つでもあれば "番号"、なければ "日付" """
+    if re.search(r"^\d+\.\s+###\s", text, re.MULTILINE):
+        return "番号"
+    return "日付"
+
+
+def _date_parts(match):
+    y, m, d, hm = match.groups()
+    return f"{int(y):04d}-{int(m):02d}-{int(d):02d}", hm or ""
+
+
+def split_speaker(text):
+    """見出しの発言者部分 → (発言者, 役割)"""
+    text = text.strip().strip("*").strip()
+    role = ROLE_PREFIX.match(text)
+    if role:
+        return text[role.end():].strip().strip("*").strip(), role.group(1).strip()
+    return text, ""
+
+
+def iter_blocks(lines, layout, current=("", ""), number=0):
+    """行の並び → ブロックの dict（番号・日付・時刻・発言者・役割・本文）を順に返す。
+    途中から読むときは current（その位置で有効な日付見出しの日付・時刻）と number（それまでのブロック数）を渡す。
+    dict には見出しの行の位置（見出し行）と、見出しの時点の日付見出し（直前日付）も入れる"""
+    current_date, current_time = current
+    block, body, dated = None, [], False
+    for i, line in enumerate(lines):
+        line = line.rstrip("\r\n")
+        header = (NUMBERED_HEADER if layout == "番号" else DATED_HEADER).match(line)
+        if header:
+            if block is not None:
+                yield {**block, "本文": "\n".join(body).strip()}
+            number += 1
+            if layout == "番号":
+                head = header.group(1)
+                found = DATE_IN_TEXT.search(head)
+                speaker, role = split_speaker((head[:found.start()] if found else head).rstrip(" —-（("))
+                day, hm = _date_parts(found) if found else (current_date, current_time)
+                dated = found is not None
+            else:
+                speaker, role = split_speaker(header.group(1))
+                day, hm = header.group(2).replace("/", "-"), header.group(3) or ""
+                dated = True
+            block = {"番号": number, "日付": day, "時刻": hm, "発言者": speaker, "役割": role,
+                     "見出し行": i, "直前日付": (current_date, current_time)}
+            body = []
+            continue
+        if layout == "番号":
+            only = DATE_ONLY_LINE.match(line)
+            if only:
+                # 日付見出し・見出し直後の日付行（本文には入れない）
+                current_date, current_time = _date_parts(only)
+                if block is not None and not body and not dated:
+                    block["日付"], block["時刻"] = current_date, current_time
+                    dated = True
+                continue
+        if block is not None:
+            body.append(line)
+    if block is not None:
+        yield {**block, "本文": "\n".join(body).strip()}
+
+
+def parse_text(text, team="", term="", file=""):
+    """ログの本文 → ブロックの表（BLOCK_COLUMNS）"""
+    rows = list(iter_blocks(text.splitlines(), detect_layout(text)))
+    df = pd.DataFrame(rows, columns=["番号", "日付", "時刻", "発言者", "役割", "本文"])
+    df.insert(0, "チーム名", team)
+    df.insert(1, "期Q", term)
+    df.insert(2, "ファイル", file)
+    return df[BLOCK_COLUMNS]
+
+
+def parse_file(path):
+    """チャットログ1ファイル → ブロックの表"""
+    path = Path(path)
+    team, term = team_of(path)
+    return parse_text(path.read_text(encoding="utf-8"), team, term, path.name)
+
+
+def log_files(chat_dir=None):
+    """チャットログのファイル一覧（フォルダがなければ空）"""
+    chat_dir = Path(chat_dir or CHAT_DIR)
+    return sorted(chat_dir.glob("*.md")) if chat_dir.exists() else []
+
+
+def load_blocks(chat_dir=None):
+    """フォルダ内の全ログ → ブロックの表"""
+    frames = [parse_file(path) for path in log_files(chat_dir)]
+    if not frames:
+        return pd.DataFrame(columns=BLOCK_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def keyword_counts(text):
+    """本文の列 → 注意・依頼系・FB・振り返り系キーワードの出現数（キーワードごとの部分一致の合計）"""
+    text = pd.Series(text, dtype="string").fillna("")
+    return pd.DataFrame({
+        "注意・依頼系": sum(text.str.count(re.escape(kw)) for kw in KEYWORDS_SUPERVISION),
+        "FB・振り返り系": sum(text.str.count(re.escape(kw)) for kw in KEYWORDS_FEEDBACK),
+    }, index=text.index).astype(int)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+チーム別チャットログを1メッセージ1行に分解して SQLite の全文検索（FTS5）索引に入れ、
+全チーム・全期間をキーワード・フレーズでその場検索できるようにする。
+
+これまではキーワードを数えるたびに全ファイルを読み直して正規表現で数えていたが、
+索引を1回作れば検索はミリ秒で返る（ログが増えたら build で作り直す）。
+
+【使い方】
+    python チャット検索.py build                              # ログ → 索引（チャット検索.sqlite）
+    python チャット検索.py search "入力漏れ"                   # 本文にキーワードを含むメッセージ
+    python チャット検索.py search "改善点 導線" --team ゆりT   # 空白区切りは AND
+    python チャット検索.py search '"投稿頑張り"' --role MG --month 2025-11
+    python チャット検索.py count "フィードバック"              # チーム × 年月 の件数
+
+【索引】
+- ブロック       : チーム名・期Q・ファイル・番号・日付・時刻・年月・発言者・役割・本文
+- ブロック検索   : ブロック の 本文・発言者 の FTS5 索引（trigram。日本語の部分一致に対応）
+3文字未満の語（「FB」「注意」など）は trigram で引けないため、その語だけ LIKE で絞り込む。
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import チャットログ読込
+
+INDEX_PATH = Path(__file__).parent / "チャット検索.sqlite"
+TRIGRAM = 3
+SNIPPET_TOKENS = 24
+DEFAULT_LIMIT = 50
+
+SCHEMA = """
+CREATE TABLE ブロック (
+    id INTEGER PRIMARY KEY,
+    チーム名 TEXT, 期Q TEXT, ファイル TEXT, 番号 INTEGER,
+    日付 TEXT, 時刻 TEXT, 年月 TEXT, 発言者 TEXT, 役割 TEXT, 本文 TEXT
+);
+CREATE INDEX idx_ブロック_チーム名_年月 ON ブロック (チーム名, 年月);
+CREATE INDEX idx_ブロック_役割 ON ブロック (役割);
+CREATE VIRTUAL TABLE ブロック検索 USING fts5(
+    本文, 発言者, content='ブロック', content_rowid='id', tokenize='trigram'
+);
+"""
+
+
+def build(chat_dir=None, path=INDEX_PATH):
+    """ログ → 索引を作り直す → 取り込んだブロックの表"""
+    blocks = チャットログ読込.load_blocks(chat_dir)
+    blocks["年月"] = blocks["日付"].str[:7]
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    con = sqlite3.connect(str(path))
+    try:
+        con.executescript(SCHEMA)
+        cols = list(チャットログ読込.BLOCK_COLUMNS) + ["年月"]
+        con.executemany(
+            f"INSERT INTO ブロック ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+            blocks[cols].itertuples(index=False, name=None))
+        con.execute("INSERT INTO ブロック検索 (ブロック検索) VALUES ('rebuild')")
+        con.commit()
+    finally:
+        con.close()
+    return blocks
+
+
+def parse_query(text):
+    """検索語 → 語の並び（"..." はフレーズ、それ以外は空白区切り）"""
+    terms, rest = [], text
+    while '"' in rest:
+        before, _, after = rest.partition('"')
+        phrase, _, rest = after.partition('"')
+        terms.extend(before.split())
+        if phrase.strip():
+            terms.append(phrase.strip())
+    terms.extend(rest.split())
+    return terms
+
+
+def where_clause(terms, team=None, month=None, speaker=None, role=None):
+    """(FTS5 の MATCH 式, WHERE 句, パラメータ)。3文字以上の語は MATCH、短い語は LIKE"""
+    long_terms = [t for t in terms if len(t) >= TRIGRAM]
+    short_terms = [t for t in terms if len(t) < TRIGRAM]
+    match = " AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+    conditions, params = [], []
+    if match:
+        conditions.append("ブロック検索 MATCH ?")
+        params.append(match)
+    for t in short_terms:
+        conditions.append("b.本文 LIKE ?")
+        params.append(f"%{t}%")
+    for col, value in (("チーム名", team), ("年月", month), ("発言者", speaker), ("役割", role)):
+        if value:
+            conditions.append(f"b.{col} = ?")
+            params.append(value)
+    return match, " AND ".join(conditions) or "1", params
+
+
+def search(text, team=None, month=None, speaker=None, role=None, limit=DEFAULT_LIMIT, path=INDEX_PATH):
+    """キーワード・フレーズを含むメッセージ（新しい順）"""
+    match, where, params = where_clause(parse_query(text), team, month, speaker, role)
+    snippet = (f"snippet(ブロック検索, 0, '【', '】', '…', {SNIPPET_TOKENS})" if match
+               else f"substr(b.本文, 1, {SNIPPET_TOKENS * 2})")
+    source = "ブロック検索 JOIN ブロック b ON b.id = ブロック検索.rowid" if match else "ブロック b"
+    sql = (f"SELECT b.チーム名, b.日付, b.時刻, b.発言者, b.役割, {snippet} AS 抜粋, b.ファイル, b.番号 "
+           f"FROM {source} WHERE {where} ORDER BY b.日付 DESC, b.時刻 DESC, b.番号 DESC LIMIT ?")
+    con = sqlite3.connect(str(path))
+    try:
+        return pd.read_sql_query(sql, con, params=params + [limit])
+    finally:
+        con.close()
+
+
+def count(text, group_by=("チーム名", "年月"), team=None, month=None, speaker=None, role=None, path=INDEX_PATH):
+    """キーワード・フレーズを含むメッセージの件数（group_by ごと）"""
+    match, where, params = where_clause(parse_query(text), team, month, speaker, role)
+    source = "ブロック検索 JOIN ブロック b ON b.id = ブロック検索.rowid" if match else "ブロック b"
+    keys = ", ".join(f"b.{c}" for c in group_by)
+    sql = (f"SELECT {keys}, COUNT(*) AS 件数 FROM {source} WHERE {where} "
+           f"GROUP BY {keys} ORDER BY {keys}")
+    con = sqlite3.connect(str(path))
+    try:
+        return pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="チャットログの全文検索索引（SQLite FTS5）")
+    parser.add_argument("--index", type=Path, default=INDEX_PATH, help="索引ファイルのパス")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="チャットログから索引を作り直す")
+    p_build.add_argument("--chat-dir", type=Path, default=None, help="チャットログのフォルダ")
+
+    for name, help_text in (("search", "キーワード・フレーズで検索"), ("count", "チーム × 年月 の件数")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("query", help='空白区切りは AND、"..." はフレーズ')
+        p.add_argument("--team", default=None)
+        p.add_argument("--month", default=None, help="年月（例: 2025-11）")
+        p.add_argument("--speaker", default=None)
+        p.add_argument("--role", default=None, help="役割（例: MG）")
+        p.add_argument("--xlsx", type=Path, default=None, help="結果を Excel に出力")
+        if name == "search":
+            p.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        blocks = build(args.chat_dir, args.index)
+        print(f"索引作成: {args.index}（{time.perf_counter() - t0:.1f}秒）")
+        if blocks.empty:
+            print(f"  チャットログがありません: {args.chat_dir or チャットログ読込.CHAT_DIR}")
+        for team, n in blocks.groupby("チーム名").size().items():
+            print(f"  {team}: {n}ブロック")
+        return blocks
+
+    if not Path(args.index).exists():
+        raise SystemExit(f"索引がありません: {args.index}（先に build を実行してください）")
+    filters = dict(team=args.team, month=args.month, speaker=args.speaker, role=args.role, path=args.index)
+    t0 = time.perf_counter()
+    if args.command == "search":
+        result = search(args.query, limit=args.limit, **filters)
+    else:
+        result = count(args.query, **filters)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(result.to_string(index=False))
+    print(f"\n{len(result)}行（{elapsed_ms:.1f}ms）")
+    if args.xlsx:
+        result.to_excel(args.xlsx, index=False)
+        print(f"出力: {args.xlsx}")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+チャットの活発度（ブロック数・キーワード数）とチームの投稿数を チーム × 年月 で突き合わせ、
+チャットが投稿に先行するのか・後追いなのかをラグ相関で見る。
+
+チーム別_3ヶ月投稿数とチャット活発度_集計.py は期間全体のチャット件数を3ヶ月の投稿数の横に並べるだけなので、
+どちらが先に動いたかは分からない。ここでは月ごとに数えてから1回の merge で投稿数とつなぎ、
+全チーム・全ラグの相関を配列演算でまとめて計算する。
+
+【チャット】チャットログ読込.py でブロックに分解し、日付の年月ごとに
+- ブロック数、注意・依頼系 / FB・振り返り系キーワード数（数え方は チーム別_3ヶ月… と同じ部分一致）
+ログの最初の月〜最後の月の間で発言がない月は 0
+
+【投稿数】PP_Rawdata の各回の「前回からの増加投稿数」を実施日の年月・チーム名で合計（投稿数ランキング推移と同じ）
+PP の最初の実施月〜最後の実施月の間でセッションがない月は 0
+
+【ラグ相関】ラグ L = チャットの月 t と 投稿数の月 t+L の相関（L > 0: チャットが先行、L < 0: 投稿が先行）
+チーム間の規模の差が混ざらないよう、チームごとに平均を引いてから全チーム分をまとめて相関を取る
+"""
+import argparse
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import PP_Rawdata読込
+import チャットログ読込
+
+OUTPUT_PATH = Path(__file__).parent / "チーム別_チャット活発度と投稿数_月次結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "チーム別_チャット活発度と投稿数_月次.md"
+
+MAX_LAG = 2
+MIN_PAIRS = 6  # これ未満の組しかないラグは相関を出さない
+CHAT_METRICS = ["ブロック数", "注意・依頼系", "FB・振り返り系"]
+POST_METRIC = "投稿数"
+
+
+def month_range(months):
+    """年月文字列の列 → 最初の月〜最後の月の PeriodIndex"""
+    periods = pd.PeriodIndex(pd.Series(months).dropna(), freq="M")
+    if len(periods) == 0:
+        return pd.PeriodIndex([], freq="M")
+    return pd.period_range(periods.min(), periods.max(), freq="M")
+
+
+def chat_monthly(blocks):
+    """ブロックの表 → チーム名 × 年月 のブロック数・キーワード数（ログの期間内の空白月は 0）"""
+    blocks = blocks[blocks["日付"].astype(str).str.len() >= 7]
+    counts = チャットログ読込.keyword_counts(blocks["本文"])
+    df = pd.concat([blocks[["チーム名"]], counts], axis=1).assign(
+        年月=blocks["日付"].str[:7], ブロック数=1)
+    agg = df.groupby(["チーム名", "年月"])[CHAT_METRICS].sum()
+    frames = []
+    for team, group in agg.groupby(level="チーム名"):
+        months = month_range(group.index.get_level_values("年月")).strftime("%Y-%m")
+        full = group.droplevel("チーム名").reindex(months, fill_value=0)
+        frames.append(full.rename_axis("年月").reset_index().assign(チーム名=team))
+    if not frames:
+        return pd.DataFrame(columns=["チーム名", "年月"] + CHAT_METRICS)
+    return pd.concat(frames, ignore_index=True)[["チーム名", "年月"] + CHAT_METRICS]
+
+
+def posts_monthly(pp_long, months=None):
+    """PPセッション（生徒 × 回）→ チーム名 × 年月 の増加投稿数の合計（PP の期間内の空白月は 0）。
+    months を渡すとその月だけ（PP の期間外の月は含めない）"""
+    df = pp_long[pp_long["チーム名"].notna() & ~pp_long["チーム名"].isin(PP_Rawdata読込.PLACEHOLDER_GROUPS)]
+    df = df.assign(年月=df["実施日"].dt.strftime("%Y-%m"))
+    agg = df.groupby(["チーム名", "年月"])["増加投稿数"].sum().rename(POST_METRIC)
+    covered = month_range(df["年月"])
+    if months is not None:
+        covered = covered.intersection(pd.PeriodIndex(months, freq="M"))
+    months = covered.strftime("%Y-%m")
+    teams = sorted(agg.index.get_level_values("チーム名").unique())
+    full = agg.reindex(pd.MultiIndex.from_product([teams, months], names=["チーム名", "年月"]), fill_value=0)
+    return full.reset_index()
+
+
+def join_monthly(chat, posts):
+    """チャットと投稿数を チーム名 × 年月 で1回の merge でつなぐ（片方しかない月は NaN）"""
+    joined = chat.merge(posts, on=["チーム名", "年月"], how="outer")
+    joined = joined[joined["チーム名"].isin(chat["チーム名"].unique())]
+    return joined.sort_values(["チーム名", "年月"]).reset_index(drop=True)
+
+
+def lagged_correlations(joined, max_lag=MAX_LAG):
+    """チャットの各指標 × ラグ（-max_lag〜max_lag）の相関を一括計算 → 指標・ラグ・相関・組数"""
+    if joined.empty:
+        return pd.DataFrame(columns=["指標", "ラグ", "相関", "組数"])
+    panel = joined.set_index(["チーム名", "年月"])
+    months = month_range(joined["年月"]).strftime("%Y-%m")
+    teams = sorted(joined["チーム名"].unique())
+    index = pd.MultiIndex.from_product([teams, months])
+    shape = (len(teams), len(months))
+
+    def matrix(col):
+        x = panel[col].reindex(index).to_numpy(dtype=float).reshape(shape)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # 値が1つもないチーム
+            return x - np.nanmean(x, axis=1, keepdims=True)
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    y = matrix(POST_METRIC)
+    # ys[l, team, t] = 投稿数の月 t + lags[l]
+    ys = np.full((len(lags),) + shape, np.nan)
+    for i, lag in enumerate(lags):
+        if lag >= 0:
+            ys[i, :, :shape[1] - lag] = y[:, lag:]
+        else:
+            ys[i, :, -lag:] = y[:, :lag]
+    x = np.stack([matrix(col) for col in CHAT_METRICS])[:, None]  # (指標, 1, チーム, 月)
+    valid = ~np.isnan(x) & ~np.isnan(ys[None])
+    n = valid.sum(axis=(2, 3))
+    xv = np.where(valid, x, 0.0)
+    yv = np.where(valid, ys[None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xm = xv.sum(axis=(2, 3), keepdims=True) / n[..., None, None]
+        ym = yv.sum(axis=(2, 3), keepdims=True) / n[..., None, None]
+        xc = np.where(valid, xv - xm, 0.0)
+        yc = np.where(valid, yv - ym, 0.0)
+        r = (xc * yc).sum(axis=(2, 3)) / np.sqrt((xc ** 2).sum(axis=(2, 3)) * (yc ** 2).sum(axis=(2, 3)))
+    r = np.where(n >= MIN_PAIRS, r, np.nan)
+    metric, lag = np.meshgrid(np.arange(len(CHAT_METRICS)), np.arange(len(lags)), indexing="ij")
+    return pd.DataFrame({
+        "指標": np.asarray(CHAT_METRICS)[metric.ravel()],
+        "ラグ": lags[lag.ravel()],
+        "相関": np.round(r.ravel(), 3),
+        "組数": n.ravel(),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="チャット活発度と投稿数を チーム × 年月 で突き合わせ、ラグ相関を出す")
+    parser.add_argument("--chat-dir", type=Path, default=None, help="チャットログのフォルダ")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--max-lag", type=int, default=MAX_LAG, help=f"最大ラグ（月。既定: {MAX_LAG}）")
+    parser.add_argument("--output-dir", type=Path, default=None, help="出力先フォルダ（既定: data/ と 分析結果/）")
+    args = parser.parse_args(argv)
+    output_path = args.output_dir / OUTPUT_PATH.name if args.output_dir else OUTPUT_PATH
+    report_path = args.output_dir / REPORT_PATH.name if args.output_dir else REPORT_PATH
+
+    blocks = チャットログ読込.load_blocks(args.chat_dir)
+    if blocks.empty:
+        print(f"チャットログがありません: {args.chat_dir or チャットログ読込.CHAT_DIR}")
+        return None
+    chat = chat_monthly(blocks)
+    span = month_range(chat["年月"])
+    months = pd.period_range(span.min() - args.max_lag, span.max() + args.max_lag, freq="M")  # ラグの分だけ前後に広げる
+    pp_long = PP_Rawdata読込.to_session_long(PP_Rawdata読込.load_pp_rawdata(args.mg_results))
+    posts = posts_monthly(pp_long, months)
+    joined = join_monthly(chat, posts)
+    corr = lagged_correlations(joined, args.max_lag)
+    wide = corr.pivot(index="指標", columns="ラグ", values="相関").reindex(CHAT_METRICS)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
+        joined.to_excel(w, sheet_name="チーム×年月", index=False)
+        corr.to_excel(w, sheet_name="ラグ相関", index=False)
+        wide.to_excel(w, sheet_name="ラグ相関_表")
+
+    lags = list(wide.columns)
+    report_lines = [
+        "# チーム別 チャット活発度と投稿数（月次・ラグ相関）",
+        "",
+        "## ラグ相関（チームごとに平均を引いた値の相関）",
+        "",
+        "ラグ L: チャットの月 t と投稿数の月 t+L（L > 0 はチャットが先行）",
+        "",
+        "| 指標 | " + " | ".join(f"L={lag:+d}" for lag in lags) + " |",
+        "|------|" + "|".join("------" for _ in lags) + "|",
+    ]
+    for metric, row in wide.iterrows():
+        report_lines.append(f"| {metric} | " + " | ".join(
+            f"{row[lag]:+.3f}" if pd.notna(row[lag]) else "ー" for lag in lags) + " |")
+    report_lines.extend([
+        "",
+        "## チーム × 年月",
+        "",
+        "| チーム名 | 年月 | ブロック数 | 注意・依頼系 | FB・振り返り系 | 投稿数 |",
+        "|----------|------|-----------|-------------|---------------|--------|",
+    ])
+
+    def cell(v):
+        return int(v) if pd.notna(v) else "ー"
+
+    for _, row in joined.iterrows():
+        report_lines.append(
+            f"| {row['チーム名']} | {row['年月']} | {cell(row['ブロック数'])} | {cell(row['注意・依頼系'])} | "
+            f"{cell(row['FB・振り返り系'])} | {cell(row[POST_METRIC])} |")
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **チャット**: チーム別チャットログ（`チャットログ読込.py` でブロックに分解。日付の年月ごとに集計）",
+        "- **投稿数**: `［最新版］mg_monthly_analysis_results_v1.1.xlsx` の PP_Rawdata 増加投稿数（実施日の年月・チーム名）。"
+        "チャットの期間の前後 最大ラグ ヶ月まで",
+        f"- **相関**: 組数 {MIN_PAIRS} 未満のラグは「ー」",
+        "",
+        "---",
+        "*出力: チーム別_チャット活発度と投稿数_月次.py*",
+    ])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
+    print()
+    print(f"【チャット活発度 × 投稿数】{joined['チーム名'].nunique()}チーム・{len(joined)}行")
+    for metric, row in wide.iterrows():
+        print(f"  {metric}: " + " / ".join(
+            f"L={lag:+d} {row[lag]:+.2f}" if pd.notna(row[lag]) else f"L={lag:+d} ー" for lag in lags))
+    return corr
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -9,6 +9,7 @@
 【卒業の定義】6回目実施日が入っている＝6回セッション完了＝卒業とする
 【卒業時投稿数】合計投稿数列
 【卒業月】6回目実施日の年月
+【対象月】TARGET_MONTHS（分析コマンド.py pp-monthly --months で差し替えられる）
 """
 import pandas as pd
 from pathlib import Path
@@ -35,8 +36,11 @@ def to_num(val):
         return None
 
 
-def main():
-    df = pd.read_excel(INPUT_PATH, sheet_name="PP_Rawdata", header=2)
+def main(input_path=None, months=None, output_dir=None):
+    target_months = [(f"{y}年{m}月", f"{y:04d}-{m:02d}") for y, m in months] if months else TARGET_MONTHS
+    output_path = Path(output_dir) / OUTPUT_PATH.name if output_dir else OUTPUT_PATH
+    report_path = Path(output_dir) / REPORT_PATH.name if output_dir else REPORT_PATH
+    df = pd.read_excel(input_path or INPUT_PATH, sheet_name="PP_Rawdata", header=2)
 
     # 卒業＝6回目実施日あり
     graduated = df[df["6回目実施日"].notna()].copy()
@@ -62,7 +66,7 @@ def main():
 
     # 画像形式: 各月の「全体」と「当月卒業生のみ」
     rows_display = []
-    for label, period in TARGET_MONTHS:
+    for label, period in target_months:
         # 全体＝その月までに卒業した全員（卒業月 <= period）
         up_to = valid[valid["卒業月_str"] <= period]
         n_zen = len(up_to)
@@ -96,7 +100,7 @@ def main():
     ])
 
     # Excel出力
-    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
         display_df.to_excel(w, sheet_name="月別_全体と当月卒業生のみ", index=False)
         monthly.to_excel(w, sheet_name="月別_平均卒業時投稿数", index=False)
         summary_df.to_excel(w, sheet_name="全体サマリ", index=False)
@@ -136,12 +140,12 @@ def main():
         "---",
         "*出力: プレミアムプラス_卒業生_月次平均卒業時投稿数_集計.py*",
     ])
-    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
         f.write("\n".join(report_lines))
 
-    print(f"出力: {OUTPUT_PATH}")
-    print(f"レポート: {REPORT_PATH}")
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
     print()
     print("【プレミアムプラス 卒業生 月次 平均卒業時投稿数】（画像形式）")
     for _, row in display_df.iterrows():
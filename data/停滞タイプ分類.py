@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+アンケートの自由記述・セッションメモを、6タイプ（手が止まっている理由）に一括で振り分ける。
+
+これまでは文章を読んで手で「コンセプト迷子」「完璧主義」… を付けていたが、
+ラベル付きの例文から各タイプの重心（TF-IDF ベクトルの平均）を作り、
+全文の TF-IDF 行列 × 重心 の1回の掛け算で、数千件のタイプと類似度をまとめて出す。
+
+【6タイプ】分析結果/notebookLMによる分析結果/報告_6タイプ分析の前提とデータソースの作られ方.md
+コンセプト迷子 / 完璧主義 / モチベ低下 / マネタイズ不安 / 比較と焦り / 行動限界
+
+【ベクトル化】
+- 文字 n-gram（NGRAMS。分かち書き不要）。NFKC で全角英数・半角カナをそろえ、空白・記号は区切りとして扱う
+- TF = 1 + log(出現回数)、IDF = log((1 + 文書数) / (1 + 出現文書数)) + 1（分類する文章と例文の全体で数える）
+- 行ごとに L2 正規化。行列は CSR（行の開始位置・列番号・値の3配列）で持ち、0 の要素は持たない
+
+【分類】最近傍重心（コサイン類似度）。最大の類似度が MIN_SCORE 未満、または1位と2位の差が MIN_MARGIN 未満の文章は「未分類」
+【例文】SEED_EXAMPLES（6タイプの説明から作った例文）＋ --labels の Excel/CSV（列: タイプ, テキスト）
+- 組み込みの例文だけ（--labels なし）のときは、レポートを「暫定」として出す。例文が各タイプ5件しかなく、
+  「投稿できなかった」のような短い回答が「投稿できない」を含む例文のタイプ（完璧主義）に寄るため、件数は報告に使わない
+
+【使い方】
+    python 停滞タイプ分類.py                                  # 卒業時アンケートの自由記述
+    python 停滞タイプ分類.py --labels 手付けラベル.xlsx --notes セッションメモ.xlsx --notes-col メモ
+"""
+import argparse
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import アンケート読込
+from アンケート読込 import SURVEY_COL_NAME, SURVEY_PATH
+
+OUTPUT_PATH = Path(__file__).parent / "停滞タイプ分類結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "停滞タイプ分類.md"
+
+TYPES = ["コンセプト迷子", "完璧主義", "モチベ低下", "マネタイズ不安", "比較と焦り", "行動限界"]
+UNCLASSIFIED = "未分類"
+NGRAMS = (2, 3)
+MIN_SCORE = 0.1  # 組み込みの例文では、これ未満の類似度はほぼ共通の言い回しが当たっているだけ
+MIN_MARGIN = 0.05  # 1位と2位の類似度の差がこれ未満ならどちらとも決めない
+MIN_CHARS = 5  # これより短い回答（「特になし」など）は分類しない
+
+# 卒業時アンケートの自由記述（列番号 → 出所の表示名）
+SURVEY_TEXT_COLS = {
+    9: "満足していない点",
+    15: "自己評価の理由",
+    20: "コンテンツの不満点",
+    23: "目標達成度の理由",
+    30: "始める前の悩み",
+}
+
+# 6タイプの説明（報告_6タイプ分析の前提…md）から作った例文。--labels の手付けラベルに追加される
+SEED_EXAMPLES = {
+    "コンセプト迷子": [
+        "コンセプトが決まらず何を発信すればいいか分からない",
+        "方向性が定まらなくて準備ばかりで投稿に進めない",
+        "ジャンルやターゲットに迷って発信内容が決められない",
+        "自分の強みや誰に向けて発信するのかが分からないまま止まっている",
+        "プロフィールや設計を何度も作り直して足踏みしている",
+    ],
+    "完璧主義": [
+        "完璧な投稿を作ろうとして手が止まってしまう",
+        "100点のクオリティじゃないと投稿できない",
+        "講師の指摘を重く受け止めすぎて直してばかりで出せない",
+        "デザインや文章にこだわりすぎて時間がかかり投稿できない",
+        "失敗したくなくて納得できるまで作り込んでしまう",
+    ],
+    "モチベ低下": [
+        "成果が出なくてやる気がなくなってしまった",
+        "伸びないので疲れてしまい投稿が続かない",
+        "やる気はあるのに体が動かない",
+        "モチベーションが下がって気持ちが追いつかない",
+        "頑張っても反応がなく心が折れて投稿をやめてしまった",
+    ],
+    "マネタイズ不安": [
+        "フォロワーは増えたのに収益化の方法が見えず不安",
+        "万垢を達成したがマネタイズにつながらず焦っている",
+        "どうやって稼ぐのか案件や収入につながるのか分からない",
+        "マネタイズの道筋が見えないまま続けていいのか不安",
+        "売上や収益が出ないので投稿する意味を感じられない",
+    ],
+    "比較と焦り": [
+        "周りの人が伸びているのを見て落ち込んでしまう",
+        "同期と比べて自分だけ成果が出ていなくて焦る",
+        "他の人の成功を見ると自信をなくしてしまう",
+        "周囲と比較してしまい自分には無理だと感じる",
+        "みんなが万垢を達成しているのに自分は遅れていて焦りがある",
+    ],
+    "行動限界": [
+        "仕事が忙しくて投稿する時間がない",
+        "育児や家事で物理的に時間が取れない",
+        "本業と両立できずキャパオーバーで止まっている",
+        "体調を崩して作業する時間が確保できない",
+        "残業や家庭の事情で手が回らず投稿できない",
+    ],
+}
+
+SEPARATORS = re.compile(r"[\s　、。，．,.!！?？・「」『』（）()\[\]【】〜~\-―…:：;；/／\"'“”]+")
+
+
+def normalize_text(text):
+    """NFKC・小文字にそろえ、空白・記号を区切り（半角スペース1つ）にする"""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    return SEPARATORS.sub(" ", text).strip()
+
+
+def char_ngrams(text, ngrams=NGRAMS):
+    """文章 → 文字 n-gram の並び（区切りをまたぐ n-gram は作らない）"""
+    grams = []
+    for word in normalize_text(text).split(" "):
+        for n in range(ngrams[0], ngrams[1] + 1):
+            grams.extend(word[i:i + n] for i in range(len(word) - n + 1))
+        if 0 < len(word) < ngrams[0]:
+            grams.append(word)
+    return grams
+
+
+class SparseRows:
+    """CSR 形式の行列（indptr: 各行の開始位置、indices: 列番号、data: 値）"""
+
+    def __init__(self, indptr, indices, data, n_cols):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=float)
+        self.shape = (len(self.indptr) - 1, n_cols)
+
+    def row_ids(self):
+        """要素ごとの行番号"""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def rows(self, selected):
+        """選んだ行だけの SparseRows"""
+        selected = np.asarray(selected, dtype=np.int64)
+        starts, ends = self.indptr[selected], self.indptr[selected + 1]
+        take = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if len(selected) else np.array([], int)
+        indptr = np.concatenate([[0], np.cumsum(ends - starts)])
+        return SparseRows(indptr, self.indices[take], self.data[take], self.shape[1])
+
+    def dot(self, dense):
+        """行列 × 密行列（列数 × k）→ 行数 × k。0 でない要素だけを掛けて行ごとに足す"""
+        dense = np.asarray(dense, dtype=float)
+        out = np.zeros((self.shape[0], dense.shape[1]))
+        if len(self.data) == 0:
+            return out
+        # CSR は行ごとに要素が並んでいるので、行の開始位置で区切って足せばよい（空の行は 0 のまま）
+        filled = np.diff(self.indptr) > 0
+        out[filled] = np.add.reduceat(self.data[:, None] * dense[self.indices], self.indptr[:-1][filled], axis=0)
+        return out
+
+    def column_sums(self, rows=None):
+        """列ごとの合計（rows を渡すとその行だけ）"""
+        part = self if rows is None else self.rows(rows)
+        return np.bincount(part.indices, weights=part.data, minlength=self.shape[1])
+
+
+def tfidf(texts, ngrams=NGRAMS):
+    """文章の並び → (TF-IDF の SparseRows（行は L2 正規化済み）, 語彙 {n-gram: 列番号})"""
+    vocab, indptr, indices, counts = {}, [0], [], []
+    for text in texts:
+        ids, n = np.unique([vocab.setdefault(g, len(vocab)) for g in char_ngrams(text, ngrams)], return_counts=True)
+        indices.append(ids)
+        counts.append(n)
+        indptr.append(indptr[-1] + len(ids))
+    indices = np.concatenate(indices).astype(np.int64) if indices else np.array([], np.int64)
+    counts = np.concatenate(counts).astype(float) if counts else np.array([])
+    n_docs = len(indptr) - 1
+    doc_freq = np.bincount(indices, minlength=len(vocab))
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+    data = (1 + np.log(counts)) * idf[indices]
+    matrix = SparseRows(indptr, indices, data, len(vocab))
+    norms = np.sqrt(np.bincount(matrix.row_ids(), weights=data ** 2, minlength=n_docs))
+    matrix.data = data / np.where(norms > 0, norms, 1)[matrix.row_ids()]
+    return matrix, vocab
+
+
+def centroids(matrix, labels, types=TYPES):
+    """ラベル付きの行 → タイプごとの重心（L2 正規化済み。列数 × タイプ数）"""
+    labels = np.asarray(labels)
+    columns = []
+    for t in types:
+        rows = np.flatnonzero(labels == t)
+        c = matrix.column_sums(rows) / max(len(rows), 1)
+        norm = np.linalg.norm(c)
+        columns.append(c / norm if norm > 0 else c)
+    return np.column_stack(columns)
+
+
+def classify(texts, examples, types=TYPES, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+    """文章の並び・例文の表（タイプ, テキスト）→ 文章ごとのタイプ・類似度・差（1位 − 2位）と各タイプの類似度"""
+    texts = list(texts)
+    matrix, _ = tfidf(list(examples["テキスト"]) + texts)
+    n_examples = len(examples)
+    center = centroids(matrix.rows(np.arange(n_examples)), examples["タイプ"], types)
+    scores = matrix.rows(np.arange(n_examples, matrix.shape[0])).dot(center)  # 文章数 × タイプ数
+    ranked = np.sort(scores, axis=1)
+    best = ranked[:, -1]
+    second = ranked[:, -2] if len(types) > 1 else np.zeros(len(texts))
+    result = pd.DataFrame({
+        "タイプ": np.where((best >= min_score) & (best - second >= min_margin),
+                        np.asarray(types)[scores.argmax(axis=1)], UNCLASSIFIED),
+        "類似度": np.round(best, 3),
+        "差": np.round(best - second, 3),
+    })
+    return pd.concat([result, pd.DataFrame(np.round(scores, 3), columns=types)], axis=1)
+
+
+def load_examples(labels_path=None, types=TYPES):
+    """SEED_EXAMPLES ＋ 手付けラベル（Excel/CSV。列: タイプ, テキスト）→ 例文の表"""
+    frames = [pd.DataFrame([(t, s) for t, lines in SEED_EXAMPLES.items() for s in lines], columns=["タイプ", "テキスト"])
+              .assign(出所="例文")]
+    if labels_path:
+        path = Path(labels_path)
+        df = pd.read_csv(path) if path.suffix.lower() == ".csv" else pd.read_excel(path)
+        df = df[["タイプ", "テキスト"]].dropna()
+        df["タイプ"] = df["タイプ"].astype(str).str.strip().str.replace("タイプ", "", regex=False)
+        unknown = sorted(set(df["タイプ"]) - set(types))
+        if unknown:
+            raise ValueError(f"知らないタイプがあります: {unknown}（使えるのは {types}）")
+        frames.append(df.assign(出所=path.name))
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_survey_texts(path=SURVEY_PATH):
+    """卒業時アンケート → 名前・出所・テキスト（SURVEY_TEXT_COLS の回答1つ = 1行）"""
+    survey = アンケート読込.load_survey(path)
+    cols = [c for c in SURVEY_TEXT_COLS if c in survey.columns]
+    long = survey[[SURVEY_COL_NAME] + cols].melt(id_vars=SURVEY_COL_NAME, var_name="列", value_name="テキスト")
+    return pd.DataFrame({
+        "名前": long[SURVEY_COL_NAME].astype("string").str.strip(),
+        "出所": long["列"].map(SURVEY_TEXT_COLS),
+        "テキスト": long["テキスト"],
+    })
+
+
+def load_notes(path, text_col, name_col=None):
+    """セッションメモ（Excel/CSV）→ 名前・出所・テキスト"""
+    path = Path(path)
+    df = pd.read_csv(path) if path.suffix.lower() == ".csv" else pd.read_excel(path)
+    return pd.DataFrame({
+        "名前": df[name_col].astype("string").str.strip() if name_col else pd.NA,
+        "出所": f"セッションメモ（{path.stem}）",
+        "テキスト": df[text_col],
+    })
+
+
+def clean_texts(df, min_chars=MIN_CHARS):
+    """空・短すぎる回答を除く"""
+    text = df["テキスト"].astype("string").str.strip()
+    keep = text.notna() & (text.str.len() >= min_chars)
+    return df[keep].assign(テキスト=text[keep]).reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="自由記述を6タイプに一括分類する（文字 n-gram TF-IDF・最近傍重心）")
+    parser.add_argument("--survey", type=Path, default=SURVEY_PATH, help="卒業時アンケートの xlsx")
+    parser.add_argument("--no-survey", action="store_true", help="アンケートを読まない（--notes だけ分類）")
+    parser.add_argument("--notes", type=Path, default=None, help="セッションメモの Excel/CSV")
+    parser.add_argument("--notes-col", default="メモ", help="セッションメモの本文の列名")
+    parser.add_argument("--notes-name-col", default=None, help="セッションメモの名前の列名")
+    parser.add_argument("--labels", type=Path, default=None, help="手付けラベルの Excel/CSV（列: タイプ, テキスト）")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE, help=f"これ未満は未分類（既定: {MIN_SCORE}）")
+    parser.add_argument("--min-margin", type=float, default=MIN_MARGIN,
+                        help=f"1位と2位の類似度の差がこれ未満は未分類（既定: {MIN_MARGIN}）")
+    args = parser.parse_args(argv)
+
+    frames = []
+    if not args.no_survey:
+        frames.append(load_survey_texts(args.survey))
+    if args.notes:
+        frames.append(load_notes(args.notes, args.notes_col, args.notes_name_col))
+    if not frames:
+        raise SystemExit("分類する文章がありません（--notes を指定してください）")
+    texts = clean_texts(pd.concat(frames, ignore_index=True))
+    examples = load_examples(args.labels)
+
+    t0 = time.perf_counter()
+    predicted = classify(texts["テキスト"], examples, min_score=args.min_score, min_margin=args.min_margin)
+    elapsed = time.perf_counter() - t0
+    result = pd.concat([texts[["名前", "出所"]], predicted, texts[["テキスト"]]], axis=1)
+    result = result.sort_values(["タイプ", "類似度"], ascending=[True, False]).reset_index(drop=True)
+    order = TYPES + [UNCLASSIFIED]
+    counts = pd.crosstab(result["出所"], result["タイプ"]).reindex(columns=order, fill_value=0)
+    counts["合計"] = counts.sum(axis=1)
+
+    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+        result.to_excel(w, sheet_name="分類結果", index=False)
+        counts.to_excel(w, sheet_name="出所×タイプ")
+        examples.to_excel(w, sheet_name="例文", index=False)
+
+    total = result["タイプ"].value_counts().reindex(order, fill_value=0)
+    provisional = args.labels is None
+    provisional_note = (f"※ 暫定: 組み込みの例文 {len(examples)}件だけで分類した結果です。"
+                        "件数を報告に使うときは --labels で手付けラベルを足して分類し直してください")
+    report_lines = [
+        "# 停滞タイプ分類（自由記述 → 6タイプ）" + ("【暫定】" if provisional else ""),
+        "",
+        f"対象: {len(result)}件（例文 {len(examples)}件・未分類の基準 類似度 < {args.min_score} "
+        f"または1位と2位の差 < {args.min_margin}）",
+        "",
+    ]
+    if provisional:
+        report_lines.extend([provisional_note, ""])
+    report_lines += [
+        "## タイプ別件数",
+        "",
+        "| タイプ | 件数 | 割合 |",
+        "|--------|------|------|",
+    ]
+    for t, n in total.items():
+        report_lines.append(f"| {t} | {n} | {n / max(len(result), 1):.1%} |")
+    report_lines.extend([
+        "",
+        "## 出所 × タイプ",
+        "",
+        "| 出所 | " + " | ".join(counts.columns) + " |",
+        "|------|" + "|".join("------" for _ in counts.columns) + "|",
+    ])
+    for source, row in counts.iterrows():
+        report_lines.append(f"| {source} | " + " | ".join(str(int(v)) for v in row) + " |")
+    report_lines.extend(["", "## タイプ別 類似度の高い文章（上位3件）", ""])
+    for t in TYPES:
+        top = result[result["タイプ"] == t].head(3)
+        report_lines.append(f"### {t}")
+        report_lines.append("")
+        if top.empty:
+            report_lines.append("- ー")
+        for _, row in top.iterrows():
+            text = row["テキスト"].replace("\n", " ").replace("|", "／")
+            report_lines.append(f"- （{row['類似度']:.2f}）{text[:80]}{'…' if len(text) > 80 else ''}")
+        report_lines.append("")
+    report_lines.extend([
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **文章**: `SnsClub卒業時アンケート（回答） (1).xlsx` の自由記述（" + "・".join(SURVEY_TEXT_COLS.values()) + "）"
+        + (f"、セッションメモ `{args.notes.name}`" if args.notes else ""),
+        f"- **ベクトル化**: 文字 {NGRAMS[0]}〜{NGRAMS[1]}-gram の TF-IDF（行ごとに L2 正規化）",
+        "- **分類**: 例文から作ったタイプごとの重心とのコサイン類似度が最大のタイプ"
+        + (f"（例文: 組み込み＋`{args.labels.name}`）" if args.labels else "（例文: 組み込みのみ）"),
+        "",
+        "---",
+        "*出力: 停滞タイプ分類.py*",
+    ])
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {OUTPUT_PATH}")
+    print(f"レポート: {REPORT_PATH}")
+    print()
+    print(f"【停滞タイプ分類】{len(result)}件（{elapsed * 1000:.0f}ms・例文 {len(examples)}件）")
+    for t, n in total.items():
+        print(f"  {t}: {n}件")
+    if provisional:
+        print(f"  {provisional_note}")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+コミットプラン (4).xlsx と ［最新版］mg_monthly_analysis_results_v1.1.xlsx の主要シートを
+ローカルの組み込みDB（SQLite。duckdb が入っていれば DuckDB も可）に読み込み、
+SQL でその場集計できるようにする。
+
+新しい問い（例:「2025年Q2に開始した生徒の担当MG別 平均卒業時投稿数」）のたびに
+集計スクリプトを複製する代わりに、DB を1回作ってから SQL を投げる。
+
+【使い方】
+    python 分析DB.py build                      # Excel → DB（数十秒。Excel 更新時のみ）
+    python 分析DB.py tables                     # テーブル・列一覧
+    python 分析DB.py query "SELECT 担当MG, ROUND(AVG(卒業時投稿数), 2) AS 平均, COUNT(*) AS 人数
+                            FROM 卒業生 WHERE 開始期Q = '4期1Q' GROUP BY 担当MG ORDER BY 平均 DESC"
+    python 分析DB.py query "..." --xlsx 結果.xlsx   # 結果を Excel にも出力
+
+【テーブル】
+- 卒業生       : コミット卒業生（卒業の定義・卒業時投稿数は コミットプラン読込.py と同じ。チーム名は コミットRawdata から）
+- 月次投稿数   : 新 月次投稿数（在学・0m〜6m）＋ セッション実施状況管理（担当MG・初回セッション日）
+- コミット生徒 : コミットRawdata
+- PP生徒       : PP_Rawdata（生徒単位）
+- PPセッション : PP_Rawdata（生徒 × 回）
+- 異常フラグ   : 投稿数異常検知.py のフラグ一覧（集計前に除外・確認する用。キー = no. / 行番号）
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import PP_Rawdata読込
+import コミットプラン読込
+import 投稿数異常検知
+from 期カレンダー import assign_term_quarter
+
+DB_PATH = Path(__file__).parent / "分析DB.sqlite"
+DUCKDB_PATH = Path(__file__).parent / "分析DB.duckdb"
+MG_RESULTS_PATH = PP_Rawdata読込.INPUT_PATH
+
+# テーブル → インデックスを張る列（生徒no.・担当MG・チーム名・卒業月）
+INDEXES = {
+    "卒業生": ["no.", "担当MG", "チーム名", "卒業月", "卒業期Q", "開始期Q"],
+    "月次投稿数": ["no.", "担当MG", "在学", "開始期Q"],
+    "コミット生徒": ["no.", "担当MG", "チーム名", "在学"],
+    "PP生徒": ["行番号", "担当MG", "チーム名", "卒業月"],
+    "PPセッション": ["行番号", "担当MG", "チーム名", "年月"],
+    "異常フラグ": ["ソース", "キー", "種類"],
+}
+
+COMMIT_RAW_COLUMNS = {
+    "no.": "no.", "万垢達成": "万垢達成", "在学": "在学", "user ID": "user ID", "生徒名": "生徒名",
+    "Unnamed: 6": "担当MG", "卒業時フォロワー数": "卒業時フォロワー数", "投稿開始時投稿数": "投稿開始時投稿数",
+    "現在投稿数合計": "現在投稿数合計", "卒業時投稿数": "卒業時投稿数", "個人平均月間投稿数": "個人平均月間投稿数",
+    "0ヶ月目": "0m", "1ヶ月目": "1m", "2ヶ月目": "2m", "3ヶ月目": "3m", "4ヶ月目": "4m", "5ヶ月目": "5m",
+    "6ヶ月目": "6m", "講師": "講師", "ジャンル": "ジャンル", "年齢": "年齢", "家族構成": "家族構成",
+    "合計投稿数": "合計投稿数", "チーム名": "チーム名",
+}
+NUMERIC_COMMIT_COLS = [
+    "no.", "万垢達成", "卒業時フォロワー数", "投稿開始時投稿数", "現在投稿数合計", "卒業時投稿数",
+    "個人平均月間投稿数", "0m", "1m", "2m", "3m", "4m", "5m", "6m", "合計投稿数",
+]
+
+
+def dates_to_text(df):
+    """日付列を 'YYYY-MM-DD' 文字列に（SQLite で比較・LIKE しやすくする）"""
+    df = df.copy()
+    for c in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = df[c].dt.strftime("%Y-%m-%d")
+    return df
+
+
+def start_term_quarter(dates):
+    """初回セッション日 → 開始期Q"""
+    return assign_term_quarter(pd.to_datetime(dates, errors="coerce"))["期Q"]
+
+
+def build_tables(commit_path=None, mg_results_path=None):
+    """各シートを読み込み、テーブル名 → DataFrame の辞書を返す"""
+    commit_path = commit_path or コミットプラン読込.INPUT_PATH
+    mg_results_path = mg_results_path or MG_RESULTS_PATH
+    df_sess = pd.read_excel(commit_path, sheet_name=コミットプラン読込.SESS_SHEET, header=None)
+    df_month = pd.read_excel(commit_path, sheet_name=コミットプラン読込.MONTH_SHEET, header=None)
+
+    graduates = コミットプラン読込.load_graduates(df_sess=df_sess, df_month=df_month)
+    for label in コミットプラン読込.MONTH_LABELS:
+        graduates[label] = pd.to_numeric(graduates[label], errors="coerce")
+    graduates["卒業期Q"] = assign_term_quarter(graduates["卒業月"])["期Q"]
+    graduates["開始期Q"] = start_term_quarter(graduates["初回セッション日"])
+
+    sess = コミットプラン読込.load_sessions(df_sess)
+    monthly = コミットプラン読込.load_monthly(df_month).drop(columns=["6m_データあり"])
+    monthly = monthly.join(sess[["担当MG", "初回セッション日"]], on="no.", how="left")
+    monthly["開始期Q"] = start_term_quarter(monthly["初回セッション日"])
+
+    commit_raw = pd.read_excel(mg_results_path, sheet_name="コミットRawdata", header=0)
+    commit_raw = commit_raw[list(COMMIT_RAW_COLUMNS)].rename(columns=COMMIT_RAW_COLUMNS)
+    commit_raw = commit_raw[commit_raw["生徒名"].notna()].copy()
+    for c in NUMERIC_COMMIT_COLS:
+        commit_raw[c] = コミットプラン読込.to_num_series(commit_raw[c])
+    teams = pd.DataFrame({
+        "no.": commit_raw["no."],
+        "チーム名": PP_Rawdata読込.clean_text(commit_raw["チーム名"]),
+    }).dropna(subset=["no."]).drop_duplicates("no.", keep="last")
+    teams["no."] = teams["no."].astype(int)
+    graduates = graduates.merge(teams, on="no.", how="left")
+
+    pp = PP_Rawdata読込.load_pp_rawdata(mg_results_path)
+    pp_long = PP_Rawdata読込.to_session_long(pp)
+    pp_long["年月"] = pp_long["実施日"].dt.strftime("%Y-%m")
+    pp_students = pp[
+        ["行番号", "名前", "担当MG", "チーム名", "クラス", "ステータス", "【SP】受講開始日", "合計投稿数"]
+        + PP_Rawdata読込.SESSION_COLS
+    ].rename(columns={"【SP】受講開始日": "SP受講開始日"})
+    pp_students["SP受講開始日"] = pd.to_datetime(pp_students["SP受講開始日"], errors="coerce")
+    pp_students["卒業月"] = pp_students["6回目実施日"].dt.strftime("%Y-%m")
+
+    return {
+        "卒業生": graduates,
+        "月次投稿数": monthly,
+        "コミット生徒": commit_raw,
+        "PP生徒": pp_students,
+        "PPセッション": pp_long,
+        "異常フラグ": 投稿数異常検知.scan(monthly, pp),
+    }
+
+
+def connect(engine="sqlite", path=None):
+    """DB に接続する（engine="duckdb" は duckdb パッケージがある場合のみ）"""
+    if engine == "duckdb":
+        try:
+            import duckdb
+        except ImportError:
+            raise SystemExit("duckdb が入っていません（pip install duckdb）。--engine sqlite を使ってください。")
+        return duckdb.connect(str(path or DUCKDB_PATH))
+    return sqlite3.connect(str(path or DB_PATH))
+
+
+def build(engine="sqlite", path=None, commit_path=None, mg_results_path=None):
+    """Excel → DB を作り直す（テーブルは毎回置き換え）"""
+    tables = build_tables(commit_path, mg_results_path)
+    con = connect(engine, path)
+    try:
+        for name, df in tables.items():
+            df = dates_to_text(df)
+            if engine == "duckdb":
+                con.register("_df", df)
+                con.execute(f'CREATE OR REPLACE TABLE "{name}" AS SELECT * FROM _df')
+                con.unregister("_df")
+            else:
+                df.to_sql(name, con, if_exists="replace", index=False)
+            for col in INDEXES.get(name, []):
+                con.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_{col}" ON "{name}" ("{col}")')
+        con.commit()
+    finally:
+        con.close()
+    return {name: len(df) for name, df in tables.items()}
+
+
+def query(sql, engine="sqlite", path=None, params=None):
+    """SQL を実行して DataFrame で返す"""
+    con = connect(engine, path)
+    try:
+        if engine == "duckdb":
+            return con.execute(sql, params or []).df()
+        return pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+
+def list_tables(engine="sqlite", path=None):
+    """テーブル名と列名の一覧"""
+    if engine == "duckdb":
+        sql = ("SELECT table_name AS テーブル, string_agg(column_name, ', ') AS 列 "
+               "FROM information_schema.columns GROUP BY table_name ORDER BY table_name")
+        return query(sql, engine, path)
+    names = query("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name", engine, path)["name"]
+    rows = []
+    for name in names:
+        cols = query(f'PRAGMA table_info("{name}")', engine, path)["name"]
+        rows.append({"テーブル": name, "列": ", ".join(cols)})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分析用の組み込みDB（SQLite / DuckDB）")
+    parser.add_argument("--engine", choices=["sqlite", "duckdb"], default="sqlite")
+    parser.add_argument("--db", type=Path, default=None, help="DBファイルのパス")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Excel から DB を作り直す")
+    p_build.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    p_build.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+
+    sub.add_parser("tables", help="テーブル・列の一覧")
+
+    p_query = sub.add_parser("query", help="SQL を実行")
+    p_query.add_argument("sql")
+    p_query.add_argument("--xlsx", type=Path, default=None, help="結果を Excel に出力")
+    p_query.add_argument("--csv", type=Path, default=None, help="結果を CSV に出力")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        counts = build(args.engine, args.db, args.commit_plan, args.mg_results)
+        print(f"DB作成: {args.db or (DUCKDB_PATH if args.engine == 'duckdb' else DB_PATH)}（{time.perf_counter() - t0:.1f}秒）")
+        for name, n in counts.items():
+            print(f"  {name}: {n}行")
+        return
+
+    if args.command == "tables":
+        for _, row in list_tables(args.engine, args.db).iterrows():
+            print(f"{row['テーブル']}: {row['列']}")
+        return
+
+    t0 = time.perf_counter()
+    result = query(args.sql, args.engine, args.db)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    print(result.to_string(index=False))
+    print(f"\n{len(result)}行（{elapsed_ms:.1f}ms）")
+    if args.xlsx:
+        result.to_excel(args.xlsx, index=False)
+        print(f"出力: {args.xlsx}")
+    if args.csv:
+        result.to_csv(args.csv, index=False, encoding="utf-8-sig")
+        print(f"出力: {args.csv}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
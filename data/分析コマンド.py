@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+集計スクリプトを1つのコマンドから呼び出す入口。
+
+各スクリプトは先頭で pandas・openpyxl・matplotlib を読み込むため、どれか1つを動かすだけでも
+毎回その読み込み待ちが発生していた。ここでは argparse だけで引数を解釈し、選んだサブコマンドの
+スクリプトだけをその場で読み込む（--help やキャッシュに当たったときは pandas を読み込まない）。
+
+【サブコマンド → スクリプト】
+- graduates       : 卒業生_卒業時投稿数_集計.py
+- ranking         : 投稿数ランキング推移_集計.py
+- kgi             : コミット_11月12月1月投稿数_集計.py
+- pp-monthly      : プレミアムプラス_卒業生_月次平均卒業時投稿数_集計.py
+- instructor-cube : ../講師ジャンル年齢家族別_月次投稿と初速分析.py（講師・ジャンル・年齢・家族構成別）
+- charts          : ../分析結果/ の投稿数レンジ別の図（2枚）
+- chat            : チーム別_3ヶ月投稿数とチャット活発度_集計.py（ranking の出力を読む）
+
+【共通オプション】各スクリプトの INPUT_PATH・TARGET_MONTHS・出力先の代わり
+- --input      : 入力の Excel（既定: 各スクリプトの既定。NFD のファイル名・Downloads も探す）
+- --months     : 対象月（例: 2025-11 2025-12 2026-01。ranking・kgi・pp-monthly・chat）
+- --output-dir : 出力先フォルダ（既定: 各スクリプトの既定の場所）
+
+【キャッシュ】分析コマンド_キャッシュ.json
+入力ファイル・スクリプト（data/*.py）の大きさと更新日時、オプションが前回と同じで、
+前回の出力ファイルがそのまま残っていれば、再実行せずに前回の出力を表示する（--force で再実行）。
+--no-cache はキャッシュを読まず書きもしない（一時フォルダへ出力する回帰チェックなど）。
+書き込むときは、出力ファイルがなくなったエントリ（消した出力先など）を取り除く。
+
+【使い方】
+    python 分析コマンド.py --help
+    python 分析コマンド.py kgi --months 2025-11 2025-12 2026-01
+    python 分析コマンド.py ranking --input 別の版.xlsx --output-dir 出力
+"""
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent
+ROOT = DATA_DIR.parent
+REPORT_DIR = ROOT / "分析結果"
+CACHE_PATH = DATA_DIR / "分析コマンド_キャッシュ.json"
+
+COMMIT_PLAN = "コミットプラン (4).xlsx"
+MG_RESULTS = "［最新版］mg_monthly_analysis_results_v1.1.xlsx"
+RANKING_XLSX = "投稿数ランキング推移_11月〜1月_チーム別.xlsx"
+CHAT_DIR = ROOT.parent / "コーチングチーム5チーム分析" / "チーム別チャットログ"  # チャットログ読込.CHAT_DIR と同じ
+OUTPUT_SUFFIXES = (".xlsx", ".md", ".png")
+WATCH_DIRS = [DATA_DIR, REPORT_DIR, REPORT_DIR / "notebookLMによる分析結果"]
+
+# サブコマンド → 説明・スクリプト・既定の入力・--months を受け付けるか
+COMMANDS = {
+    "graduates": {
+        "help": "卒業生の卒業時投稿数（全体・月別の新規卒業生）",
+        "scripts": [DATA_DIR / "卒業生_卒業時投稿数_集計.py"],
+        "input": COMMIT_PLAN,
+        "months": False,
+    },
+    "ranking": {
+        "help": "チーム別 投稿数ランキング推移",
+        "scripts": [DATA_DIR / "投稿数ランキング推移_集計.py"],
+        "input": MG_RESULTS,
+        "months": True,
+    },
+    "kgi": {
+        "help": "KGI 特進コース（コミット）の月別1人あたり投稿数",
+        "scripts": [DATA_DIR / "コミット_11月12月1月投稿数_集計.py"],
+        "input": COMMIT_PLAN,
+        "months": True,
+    },
+    "pp-monthly": {
+        "help": "プレミアムプラス卒業生の月次平均卒業時投稿数",
+        "scripts": [DATA_DIR / "プレミアムプラス_卒業生_月次平均卒業時投稿数_集計.py"],
+        "input": MG_RESULTS,
+        "months": True,
+    },
+    "instructor-cube": {
+        "help": "講師・ジャンル・年齢・家族構成別の月間投稿数と初速",
+        "scripts": [ROOT / "講師ジャンル年齢家族別_月次投稿と初速分析.py"],
+        "input": COMMIT_PLAN,
+        "months": False,
+    },
+    "charts": {
+        "help": "投稿数レンジ別の図（PNG）",
+        "scripts": [REPORT_DIR / "卒業生投稿数レンジ別万垢達成率_図.py",
+                    REPORT_DIR / "notebookLMによる分析結果" / "投稿数レンジ別_フォロワー数と万垢達成率_グラフ.py"],
+        "input": None,
+        "months": False,
+    },
+    "chat": {
+        "help": "チーム別 投稿数トレンドとチャット活発度（先に ranking を実行）",
+        "scripts": [DATA_DIR / "チーム別_3ヶ月投稿数とチャット活発度_集計.py"],
+        "input": RANKING_XLSX,
+        "months": True,
+    },
+}
+
+
+def parse_month(text):
+    """"2025-11" / "2025/11" → (2025, 11)"""
+    try:
+        year, month = (int(part) for part in text.replace("/", "-").split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"年月は 2025-11 の形式で指定してください: {text}")
+    if not 1 <= month <= 12:
+        raise argparse.ArgumentTypeError(f"月が範囲外です: {text}")
+    return year, month
+
+
+def find_workbook(name):
+    """既定の入力ファイルを data/ → 202602分析フォルダ → Downloads の順に探す（NFC・NFD の両方）。なければ None"""
+    for folder in (DATA_DIR, ROOT, Path.home() / "Downloads"):
+        for form in ("NFC", "NFD"):
+            path = folder / unicodedata.normalize(form, name)
+            if path.exists():
+                return path
+    return None
+
+
+def fingerprint(paths):
+    """ファイルの並び → [(パス, 大きさ, 更新日時)]（ないファイルは大きさ・更新日時を None）"""
+    rows = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            rows.append([str(path), st.st_size, st.st_mtime_ns])
+        except OSError:
+            rows.append([str(path), None, None])
+    return rows
+
+
+def output_files(dirs):
+    """出力を置くフォルダ → {ファイル: 更新日時}"""
+    files = {}
+    for folder in dirs:
+        if folder.exists():
+            for entry in os.scandir(folder):
+                if entry.is_file() and entry.name.endswith(OUTPUT_SUFFIXES):
+                    files[entry.path] = entry.stat().st_mtime_ns
+    return files
+
+
+def cache_key(args):
+    return json.dumps({
+        "command": args.command,
+        "input": str(args.input) if args.input else None,
+        "months": args.months,
+        "output_dir": str(args.output_dir) if args.output_dir else None,
+        "chat_dir": str(args.chat_dir) if args.chat_dir else None,
+    }, ensure_ascii=False, sort_keys=True)
+
+
+def dependencies(args):
+    """キャッシュの判定に使うファイル（入力・スクリプト・共通モジュール・チャットログ）"""
+    spec = COMMANDS[args.command]
+    paths = [args.input] if args.input else []
+    paths += spec["scripts"] + sorted(DATA_DIR.glob("*.py"))
+    if args.command == "chat":
+        chat_dir = Path(args.chat_dir or CHAT_DIR)
+        paths += sorted(chat_dir.glob("*.md")) if chat_dir.exists() else []
+    return fingerprint(paths)
+
+
+def load_cache(path=CACHE_PATH):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def prune_cache(cache):
+    """出力ファイルが1つでもなくなったエントリを除いたキャッシュ"""
+    return {key: entry for key, entry in cache.items()
+            if entry.get("outputs") and all(os.path.exists(path) for path in entry["outputs"])}
+
+
+def cached_outputs(args, cache):
+    """前回と入力・スクリプト・オプションが同じで、出力も手つかずなら前回の出力一覧。違えば None"""
+    entry = cache.get(cache_key(args))
+    if not entry or entry["dependencies"] != dependencies(args):
+        return None
+    outputs = entry["outputs"]
+    if not outputs or any(fingerprint([path])[0][2] != mtime for path, mtime in outputs.items()):
+        return None
+    return list(outputs)
+
+
+def load_script(path):
+    """スクリプトをモジュールとして読み込む（ここで初めて pandas などが読み込まれる）"""
+    if str(DATA_DIR) not in sys.path:
+        sys.path.insert(0, str(DATA_DIR))  # data/ のスクリプトは共通モジュールを名前で import する
+    if path.parent == DATA_DIR:
+        return importlib.import_module(path.stem)
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(args):
+    """選んだサブコマンドのスクリプトの main を共通オプションで呼ぶ"""
+    modules = [load_script(path) for path in COMMANDS[args.command]["scripts"]]
+    output_dir = args.output_dir
+    if args.command == "charts":
+        return [module.main(output_dir=output_dir) for module in modules]
+    module = modules[0]
+    if args.command in ("graduates", "instructor-cube"):
+        return module.main(args.input, output_dir=output_dir)
+    if args.command == "chat":
+        return module.main(args.input, months=args.months, chat_dir=args.chat_dir, output_dir=output_dir)
+    return module.main(args.input, months=args.months, output_dir=output_dir)
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--input", type=Path, default=None, help="入力の Excel（既定: スクリプトの既定）")
+    common.add_argument("--output-dir", type=Path, default=None, help="出力先フォルダ（既定: スクリプトの既定）")
+    common.add_argument("--force", action="store_true", help="キャッシュを使わず再実行する")
+    common.add_argument("--no-cache", action="store_true", help="キャッシュを読まず、書き込みもしない")
+    months = argparse.ArgumentParser(add_help=False)
+    months.add_argument("--months", type=parse_month, nargs="+", default=None,
+                        help="対象月（例: 2025-11 2025-12 2026-01。既定: スクリプトの TARGET_MONTHS）")
+
+    parser = argparse.ArgumentParser(description="集計スクリプトをまとめて呼び出す（選んだものだけ読み込む）")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="サブコマンド")
+    for name, spec in COMMANDS.items():
+        p = sub.add_parser(name, help=spec["help"], description=spec["help"],
+                           parents=[common, months] if spec["months"] else [common])
+        if name == "chat":
+            p.add_argument("--chat-dir", type=Path, default=None, help="チャットログのフォルダ")
+    parser.set_defaults(months=None, chat_dir=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    spec = COMMANDS[args.command]
+    if args.input is None and spec["input"]:
+        args.input = find_workbook(spec["input"])
+    if args.output_dir:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    cache = load_cache()
+    if not (args.force or args.no_cache):
+        outputs = cached_outputs(args, cache)
+        if outputs is not None:
+            print("キャッシュ: 入力・スクリプトが前回から変わっていないため再実行しません（--force で再実行）")
+            for path in outputs:
+                print(f"出力: {path}")
+            return outputs
+
+    watch = [args.output_dir] if args.output_dir else WATCH_DIRS
+    before = output_files(watch)
+    t0 = time.perf_counter()
+    run(args)
+    elapsed = time.perf_counter() - t0
+    after = output_files(watch)
+    outputs = {path: mtime for path, mtime in after.items() if before.get(path) != mtime}
+
+    if not args.no_cache:
+        cache = prune_cache(cache)
+        cache[cache_key(args)] = {"dependencies": dependencies(args), "outputs": outputs}
+        CACHE_PATH.write_text(json.dumps(cache, ensure_ascii=False, indent=1), encoding="utf-8")
+    print(f"\n【分析コマンド】{args.command}: {len(outputs)}ファイル出力（{elapsed:.1f}秒）")
+    return list(outputs)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
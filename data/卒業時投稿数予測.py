@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""
+最初の数ヶ月の投稿数から卒業時投稿数を予測する（6ヶ月待たずにコホートの着地見込みを出す）。
+
+卒業生で「最初の k ヶ月の投稿数・初速・コース・担当MG」→ 卒業時投稿数 のリッジ回帰を学習し、
+在学中の生徒を経過月数 k ごとのモデルで一括スコアリングする。
+学習は XᵀX・Xᵀy を足し込むだけなので、保存した状態に新しく卒業した生徒の分を加えれば
+作り直さずに更新できる。学習した生徒の行（キー＝生徒ID）も保存しておき、同じ生徒は2回足さず、
+値が変わった生徒は前の行の分を引いてから足し直し、学習データから消えた生徒は引く（作り直したときと同じになる）。
+--verify で、2回に分けて更新した状態と1回で作り直した状態の予測が同じか確かめる
+
+【学習データ】特徴量ストア.py の版（--version。省略時は今の Excel の版）から読む
+- コミット: 卒業生の 0m〜6m（「ー」は 0）→ 卒業時投稿数
+- PP      : 6回目実施日がある生徒（再登録は最後の行）。k 回目の「前回からの増加投稿数」を k ヶ月目、0m は 0 とし
+            → 合計投稿数（入っている行のみ）
+
+【特徴量（k = 経過月数。k ヶ月目のモデルは 0m〜(k-1)m を使う）】
+- 0m〜(k-1)m の投稿数、初速（初めて投稿した月。まだなら k）と「初速なし」
+- コース（PP なら 1）、担当MG（コースごとのダミー。学習に出てこない MG は基準と同じ扱い）
+
+【在学中の生徒】
+- コミット: 在学=在学中 の未卒業生。基準日（--as-of。省略時は今日）の月より前の月数 = k
+- PP      : ステータス=在学中。版の基準日までに実施したセッション数 + 1 = k
+- 7ヶ月分そろっている生徒は実績の合計をそのまま使う。予測は実績の合計を下回らないようにする
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import コミットプラン読込
+import 特徴量ストア
+from コミットプラン読込 import MONTH_LABELS
+
+OUTPUT_PATH = Path(__file__).parent / "卒業時投稿数予測結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "卒業時投稿数予測.md"
+MODEL_PATH = Path(__file__).parent / "予測モデル" / "卒業時投稿数予測.npz"
+VERIFY_NAME = "卒業時投稿数予測_確認.xlsx"
+
+ALPHA = 1.0  # リッジの正則化（切片には掛けない）
+FOLDS = 5
+MONTHS = len(MONTH_LABELS)
+INTERCEPT = "切片"
+NO_MG = ("", "後日決定", "<NA>", "nan")
+TRAIN_COLUMNS = ["キー", "コース", "担当MG"] + MONTH_LABELS + ["目的変数"]
+VERIFY_TOLERANCE = 1e-6
+
+
+class IncrementalRidge:
+    """XᵀX・Xᵀy を足し込んで更新するリッジ回帰（列は出てきた順に増やす）"""
+
+    def __init__(self, columns=(), xtx=None, xty=None, n=0):
+        self.columns = [INTERCEPT] + [c for c in columns if c != INTERCEPT]
+        size = len(self.columns)
+        self.xtx = np.zeros((size, size)) if xtx is None else xtx
+        self.xty = np.zeros(size) if xty is None else xty
+        self.n = int(n)
+
+    def _expand(self, columns):
+        new = [c for c in columns if c not in self.columns]
+        if new:
+            size = len(self.columns) + len(new)
+            xtx = np.zeros((size, size))
+            xtx[:len(self.columns), :len(self.columns)] = self.xtx
+            self.xtx = xtx
+            self.xty = np.concatenate([self.xty, np.zeros(len(new))])
+            self.columns += new
+
+    def design(self, X):
+        """特徴量の表 → 切片付きの行列（列は self.columns の順。知らない列は捨てる）"""
+        return X.reindex(columns=self.columns, fill_value=0).assign(**{INTERCEPT: 1.0}).to_numpy(dtype=float)
+
+    def partial_fit(self, X, y, sign=1):
+        """X・y の分を足し込む（sign=-1 なら前に足した分を引く）"""
+        self._expand(list(X.columns))
+        A = self.design(X)
+        self.xtx += sign * (A.T @ A)
+        self.xty += sign * (A.T @ np.asarray(y, dtype=float))
+        self.n += sign * len(A)
+        return self
+
+    def coef(self, alpha=ALPHA, xtx=None, xty=None):
+        xtx = self.xtx if xtx is None else xtx
+        xty = self.xty if xty is None else xty
+        penalty = np.full(len(self.columns), float(alpha))
+        penalty[self.columns.index(INTERCEPT)] = 0.0
+        return np.linalg.lstsq(xtx + np.diag(penalty), xty, rcond=None)[0]
+
+    def predict(self, X, alpha=ALPHA):
+        return self.design(X) @ self.coef(alpha)
+
+
+def month_features(posts, k):
+    """生徒 × 7ヶ月 の投稿数 → 最初の k ヶ月の投稿数と初速の表"""
+    head = np.nan_to_num(posts[:, :k])
+    X = pd.DataFrame(head, columns=MONTH_LABELS[:k])
+    if k:
+        positive = head > 0
+        started = positive.any(axis=1)
+        X["初速"] = np.where(started, positive.argmax(axis=1), k).astype(float)
+        X["初速なし"] = (~started).astype(float)
+    return X
+
+
+def features(frame, k):
+    """学習・スコアリング共通の特徴量（frame: コース・担当MG・0m〜6m）"""
+    X = month_features(frame[MONTH_LABELS].to_numpy(dtype=float), k)
+    X["コース_PP"] = (frame["コース"].to_numpy() == "プレミアムプラス").astype(float)
+    mg = frame["コース"].astype(str) + ":" + frame["担当MG"].astype(str).str.strip()
+    mg = mg.where(~frame["担当MG"].astype(str).str.strip().isin(NO_MG))
+    dummies = pd.get_dummies(mg, prefix="MG", dtype=float)
+    return pd.concat([X, dummies.reset_index(drop=True)], axis=1)
+
+
+def course_rows(features, course, prefix):
+    """特徴量（特徴量ストア.load の結果）→ そのコースの (学習用の卒業生, 在学中の生徒の行)。
+    キーは「コミット:生徒ID」「PP:生徒ID」（行の挿入でずれないように。生徒IDがない行だけ「PP:行<行番号>」）"""
+    df = 特徴量ストア.course_frame(features, course)
+    key = df["生徒ID"].astype("string").fillna("行" + df["ソースキー"].astype(str))
+    df.insert(0, "キー", prefix + ":" + key)
+    graduated = (df["卒業"] == 1) & df["卒業時投稿数"].notna()
+    train = df.loc[graduated, TRAIN_COLUMNS[:-1]].assign(目的変数=df.loc[graduated, "卒業時投稿数"])
+    current = df[~graduated & (df["在学"] == コミットプラン読込.ENROLLED_STATUS)]
+    return train.reset_index(drop=True), current.reset_index(drop=True)
+
+
+def current_frame(rows, elapsed):
+    """在学中の生徒の行・経過月数 → スコアリング用の表"""
+    current = rows[["キー", "コース", "生徒名", "担当MG"]].copy()
+    current["開始月"] = rows["初回セッション日"].dt.strftime("%Y-%m")
+    current["経過月数"] = np.clip(elapsed, 0, MONTHS)
+    for label in MONTH_LABELS:
+        current[label] = rows[label].to_numpy(dtype=float)
+    return current
+
+
+def commit_frames(features, as_of):
+    """コミットの (学習用の卒業生, 在学中の生徒)。経過月数 = 基準日の月より前の月数"""
+    train, rows = course_rows(features, "コミット", "コミット")
+    start = pd.PeriodIndex(rows["初回セッション日"], freq="M")
+    closed = pd.Period(as_of, freq="M").ordinal - np.where(start.isna(), np.nan, start.asi8)
+    current = current_frame(rows, closed)
+    return train, current[current["経過月数"].notna()].reset_index(drop=True)
+
+
+def pp_frames(features):
+    """PP の (学習用の卒業生, 在学中の生徒)。k 回目の増加投稿数を k ヶ月目とみなす（特徴量の 0m〜6m）。
+    経過月数 = 版の基準日までに実施したセッション数 + 1"""
+    train, rows = course_rows(features, "プレミアムプラス", "PP")
+    return train, current_frame(rows, rows["セッション回数"].to_numpy(dtype=float) + 1)
+
+
+def empty_state():
+    return {k: IncrementalRidge() for k in range(MONTHS)}, pd.DataFrame(columns=TRAIN_COLUMNS)
+
+
+def load_state(path=MODEL_PATH):
+    """保存した学習状態 → (k → IncrementalRidge, 足し込んだ卒業生の行（TRAIN_COLUMNS）)"""
+    if not Path(path).exists():
+        return empty_state()
+    models = {}
+    with np.load(path) as data:
+        if "train_posts" not in data:  # 行を保存していない古い状態は引けないので作り直す
+            return empty_state()
+        for k in range(MONTHS):
+            models[k] = IncrementalRidge(
+                [str(c) for c in data[f"k{k}_columns"]], data[f"k{k}_xtx"], data[f"k{k}_xty"], data[f"k{k}_n"])
+        trained = pd.DataFrame(data["train_posts"], columns=MONTH_LABELS)
+        trained.insert(0, "キー", data["train_keys"].astype(str))
+        trained.insert(1, "コース", data["train_courses"].astype(str))
+        trained.insert(2, "担当MG", data["train_mgs"].astype(str))
+        trained["目的変数"] = data["train_target"]
+    return models, trained
+
+
+def save_state(models, trained, path=MODEL_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "train_keys": trained["キー"].to_numpy(dtype=str),
+        "train_courses": trained["コース"].to_numpy(dtype=str),
+        "train_mgs": trained["担当MG"].astype(str).to_numpy(dtype=str),
+        "train_posts": trained[MONTH_LABELS].to_numpy(dtype=float),
+        "train_target": trained["目的変数"].to_numpy(dtype=float),
+    }
+    for k, model in models.items():
+        arrays[f"k{k}_columns"] = np.array(model.columns, dtype=str)
+        arrays[f"k{k}_xtx"] = model.xtx
+        arrays[f"k{k}_xty"] = model.xty
+        arrays[f"k{k}_n"] = np.array(model.n)
+    np.savez_compressed(path, **arrays)
+
+
+def row_hashes(train):
+    """卒業生の行 → キーごとのハッシュ（値が変わったかどうかの判定用）"""
+    rows = train[TRAIN_COLUMNS].astype({"コース": str, "担当MG": str}).astype({c: float for c in MONTH_LABELS})
+    return pd.Series(pd.util.hash_pandas_object(rows, index=False).astype(str).to_numpy(), index=train["キー"].to_numpy())
+
+
+def update(models, trained, train):
+    """学習状態を train に合わせる: 新しい卒業生は足し、値が変わった卒業生は前の行を引いて足し直し、
+    train にいない卒業生は引く → (新しい学習済みの行, 追加した件数, 置き換えた件数, 引いた件数)"""
+    train = train[TRAIN_COLUMNS].drop_duplicates("キー", keep="last").reset_index(drop=True)
+    old, new = row_hashes(trained), row_hashes(train)
+    stale = trained[~trained["キー"].map(new).eq(trained["キー"].map(old))].reset_index(drop=True)
+    fresh = train[~train["キー"].map(old).eq(train["キー"].map(new))].reset_index(drop=True)
+    for k, model in models.items():
+        if len(stale):
+            model.partial_fit(features(stale, k), stale["目的変数"], sign=-1)
+        if len(fresh):
+            model.partial_fit(features(fresh, k), fresh["目的変数"])
+    replaced = int(fresh["キー"].isin(stale["キー"]).sum())
+    return train, len(fresh) - replaced, replaced, len(stale) - replaced
+
+
+def verify(train, seed=0):
+    """2回に分けた更新（1回目は卒業生の 2/3・一部の値を変えた行・あとで消える行）と、
+    1回の作り直しで、全 k のモデルの予測が同じか確かめる → k ごとの 学習件数・作り直しの学習件数・一致"""
+    train = train[TRAIN_COLUMNS].drop_duplicates("キー", keep="last").reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    first = train[rng.random(len(train)) < 2 / 3].copy()
+    changed = rng.random(len(first)) < 0.1
+    first.loc[changed, "目的変数"] = first.loc[changed, "目的変数"] + 10
+    first = pd.concat([first, train.head(1).assign(キー="確認用:消える卒業生")], ignore_index=True)
+
+    models, trained = empty_state()
+    for step in (first, train):
+        trained, *_ = update(models, trained, step)
+    rebuilt, _ = empty_state()
+    update(rebuilt, pd.DataFrame(columns=TRAIN_COLUMNS), train)
+
+    rows = []
+    for k in range(MONTHS):
+        X = features(train, k)
+        diff = np.abs(models[k].predict(X) - rebuilt[k].predict(X)).max()
+        rows.append({"経過月数": k, "学習件数": models[k].n, "作り直しの学習件数": rebuilt[k].n,
+                     "一致": bool(models[k].n == rebuilt[k].n and diff < VERIFY_TOLERANCE)})
+    return pd.DataFrame(rows, columns=["経過月数", "学習件数", "作り直しの学習件数", "一致"])
+
+
+def cross_validate(train, k, folds=FOLDS, seed=0):
+    """k ヶ月目のモデルの交差検証（全体の XᵀX から fold の分を引いて解く）→ MAE（全体・コース別）・RMSE・R²"""
+    model = IncrementalRidge().partial_fit(features(train, k), train["目的変数"])
+    A = model.design(features(train, k))
+    y = train["目的変数"].to_numpy(dtype=float)
+    fold = np.random.default_rng(seed).integers(0, folds, len(y))
+    pred = np.empty_like(y)
+    for f in range(folds):
+        rows = fold == f
+        coef = model.coef(xtx=model.xtx - A[rows].T @ A[rows], xty=model.xty - A[rows].T @ y[rows])
+        pred[rows] = A[rows] @ coef
+    err = pred - y
+    commit = (train["コース"] == "コミット").to_numpy()
+    return {
+        "経過月数": k,
+        "学習件数": len(y),
+        "MAE": round(float(np.abs(err).mean()), 2),
+        "MAE_コミット": round(float(np.abs(err[commit]).mean()), 2) if commit.any() else np.nan,
+        "MAE_PP": round(float(np.abs(err[~commit]).mean()), 2) if (~commit).any() else np.nan,
+        "RMSE": round(float(np.sqrt((err ** 2).mean())), 2),
+        "R2": round(float(1 - (err ** 2).sum() / ((y - y.mean()) ** 2).sum()), 3),
+    }
+
+
+def score(models, current):
+    """在学中の生徒を経過月数ごとのモデルで一括予測"""
+    out = current.copy()
+    k_all = out["経過月数"].to_numpy(dtype=int)
+    posts = np.nan_to_num(out[MONTH_LABELS].to_numpy(dtype=float))
+    observed = np.where(np.arange(MONTHS)[None, :] < k_all[:, None], posts, 0).sum(axis=1)
+    pred = observed.copy()
+    for k, model in models.items():
+        rows = k_all == k
+        if rows.any() and model.n:
+            pred[rows] = model.predict(features(out[rows].reset_index(drop=True), k))
+    out["実績投稿数"] = observed
+    out["予測卒業時投稿数"] = np.round(np.maximum(pred, observed), 1)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="最初の数ヶ月の投稿数から卒業時投稿数を予測する")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--survey", type=Path, default=特徴量ストア.SURVEY_PATH, help="卒業時アンケートの xlsx（生徒IDの名寄せ）")
+    parser.add_argument("--claims", type=Path, default=特徴量ストア.CLAIM_PATH, help="クレーム対応の xlsx（生徒IDの名寄せ）")
+    parser.add_argument("--version", default=None, help="特徴量ストアの版（既定: 今の Excel の版）")
+    parser.add_argument("--as-of", default=None, help="基準日（既定: 今日。--version 指定時はその版の基準日）")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="学習状態の保存先")
+    parser.add_argument("--rebuild", action="store_true", help="保存した学習状態を使わずに作り直す")
+    parser.add_argument("--verify", action="store_true",
+                        help="--model は使わず、2回に分けた更新が1回の作り直しと同じになるか確かめる")
+    parser.add_argument("--store", type=Path, default=特徴量ストア.STORE_DIR, help="特徴量ストアのフォルダ")
+    parser.add_argument("--output-dir", type=Path, default=None, help="出力先フォルダ（既定: data/ と 分析結果/）")
+    args = parser.parse_args(argv)
+    output_path = args.output_dir / OUTPUT_PATH.name if args.output_dir else OUTPUT_PATH
+    report_path = args.output_dir / REPORT_PATH.name if args.output_dir else REPORT_PATH
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    features, record = 特徴量ストア.load_or_build(
+        args.version, args.commit_plan, args.mg_results, args.store, as_of=args.as_of,
+        survey_path=args.survey, claim_path=args.claims)
+    # PP の経過月数は版の基準日までのセッションで決まるので、コミットの経過月数も同じ日で数える
+    as_of = pd.Timestamp(args.as_of or record["基準日"])
+    commit_train, commit_now = commit_frames(features, as_of)
+    pp_train, pp_now = pp_frames(features)
+    train = pd.concat([commit_train, pp_train], ignore_index=True)
+    current = pd.concat([commit_now, pp_now], ignore_index=True)
+
+    if args.verify:
+        checked = verify(train)
+        verify_path = output_path.parent / VERIFY_NAME
+        checked.to_excel(verify_path, index=False)
+        print(f"【卒業時投稿数予測の確認】不一致 {int((~checked['一致']).sum())}件（出力: {verify_path}）")
+        if not checked["一致"].all():
+            raise SystemExit(1)
+        return checked
+
+    models, trained = empty_state() if args.rebuild else load_state(args.model)
+    trained, added, replaced, removed = update(models, trained, train)
+    save_state(models, trained, args.model)
+
+    result = score(models, current)
+    per_student = result[["コース", "キー", "生徒名", "担当MG", "開始月", "経過月数", "実績投稿数", "予測卒業時投稿数"]]
+    per_student = per_student.sort_values(["コース", "開始月", "予測卒業時投稿数"], ascending=[True, True, False])
+    cohorts = result.groupby(["コース", "開始月"]).agg(
+        人数=("キー", "count"),
+        平均経過月数=("経過月数", "mean"),
+        実績平均=("実績投稿数", "mean"),
+        予測卒業時平均=("予測卒業時投稿数", "mean"),
+    ).round(1).reset_index()
+    evaluation = pd.DataFrame([
+        cross_validate(train, k) for k in range(MONTHS)
+    ])
+
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
+        cohorts.to_excel(w, sheet_name="コホート別", index=False)
+        per_student.to_excel(w, sheet_name="生徒別", index=False)
+        evaluation.to_excel(w, sheet_name="精度", index=False)
+
+    report_lines = [
+        f"# 卒業時投稿数予測（基準日: {as_of:%Y-%m-%d}）",
+        "",
+        f"- **特徴量**: {record['version']}（{record['基準日']} 時点）",
+        f"- **学習データ**: 卒業生 {len(trained)}名（今回追加 {added}名・置き換え {replaced}名・削除 {removed}名）",
+        f"- **予測対象**: 在学中 {len(result)}名",
+        "",
+        "## コホート別 予測卒業時平均投稿数",
+        "",
+        "| コース | 開始月 | 人数 | 平均経過月数 | 実績平均 | 予測卒業時平均 |",
+        "|--------|--------|------|-------------|---------|---------------|",
+    ]
+    for _, row in cohorts.iterrows():
+        report_lines.append(
+            f"| {row['コース']} | {row['開始月']} | {row['人数']} | {row['平均経過月数']} | "
+            f"{row['実績平均']} | **{row['予測卒業時平均']}** |")
+    report_lines.extend([
+        "",
+        f"## 精度（{FOLDS}分割の交差検証）",
+        "",
+        "| 経過月数 | 学習件数 | MAE | MAE（コミット） | MAE（PP） | RMSE | R² |",
+        "|---------|---------|-----|----------------|-----------|------|----|",
+    ])
+    for _, row in evaluation.iterrows():
+        report_lines.append(
+            f"| {int(row['経過月数'])} | {int(row['学習件数'])} | {row['MAE']} | {row['MAE_コミット']} | {row['MAE_PP']} | "
+            f"{row['RMSE']} | {row['R2']} |")
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **コミット**: `コミットプラン (4).xlsx`「新 月次投稿数」0m〜6m（卒業生で学習、在学=在学中 を予測）",
+        "- **PP**: `［最新版］mg_monthly_analysis_results_v1.1.xlsx` の PP_Rawdata（k 回目の増加投稿数を k ヶ月目とみなす）",
+        "- **特徴量**: 最初の k ヶ月の投稿数・初速・コース・担当MG",
+        f"- **モデル**: リッジ回帰（α={ALPHA}）。学習状態（XᵀX・Xᵀy・学習した行）は `予測モデル/` に保存し、増えた・変わった卒業生の分だけ足し引きする",
+        "",
+        "---",
+        "*出力: 卒業時投稿数予測.py*",
+    ])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
+    print()
+    print(f"【卒業時投稿数予測】基準日 {as_of:%Y-%m-%d}")
+    print(f"  学習: {len(trained)}名（今回追加 {added}名・置き換え {replaced}名・削除 {removed}名） / 予測: {len(result)}名")
+    for course, group in result.groupby("コース"):
+        print(f"  {course}: 予測卒業時平均 {group['予測卒業時投稿数'].mean():.1f}（{len(group)}名）")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -8,6 +8,8 @@
 import pandas as pd
 from pathlib import Path
 
+from 名前正規化 import names_match as name_matches
+
 BASE = Path(__file__).parent.parent
 INPUT_PATH = BASE / "コミットプラン (4).xlsx"
 if not INPUT_PATH.exists():
@@ -42,18 +44,10 @@ def to_num(val):
         return 0
 
 
-def norm(s):
-    return str(s).strip().replace(" ", "").replace("　", "").lower()
-
-
-def name_matches(a, b):
-    """名前の部分一致（スペース除去）"""
-    na, nb = norm(a), norm(b)
-    return na == nb or (len(na) >= 3 and na in nb) or (len(nb) >= 3 and nb in na)
-
-
-def main():
-    df = pd.read_excel(INPUT_PATH, sheet_name="新 月次投稿数", header=None)
+def main(input_path=None, output_dir=None):
+    output_path = Path(output_dir) / OUTPUT_PATH.name if output_dir else OUTPUT_PATH
+    report_path = Path(output_dir) / REPORT_PATH.name if output_dir else REPORT_PATH
+    df = pd.read_excel(input_path or INPUT_PATH, sheet_name="新 月次投稿数", header=None)
 
     # 卒業生のみ抽出（在学=卒業）。1月卒業は在学中の可能性あり → 名簿にいれば含める
     all_grads = []
@@ -119,7 +113,7 @@ def main():
         {"項目": "1月新規卒業_人数", "値": len(jan_vals)},
         {"項目": "1月新規卒業_平均投稿数", "値": avg_jan},
     ])
-    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
         detail.to_excel(w, sheet_name="卒業生一覧", index=False)
         summary.to_excel(w, sheet_name="サマリ", index=False)
 
@@ -155,12 +149,12 @@ def main():
 ---
 *P列〜V列（0〜6ヶ月目）の合計＝卒業時投稿数として算出*
 """
-    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
         f.write(report)
 
-    print(f"出力: {OUTPUT_PATH}")
-    print(f"レポート: {REPORT_PATH}")
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
     print()
     print("【卒業生 卒業時投稿数 累計結果】")
     print(f"  卒業時全体 平均投稿数: {avg_all}投稿（{n_all}名）")
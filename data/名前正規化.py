@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+生徒名の正規化（全スクリプト共通）。
+
+シートごとに「いまむら やすえ」「いまむらやすえ」「イマムラ ヤスエ」「ｲﾏﾑﾗﾔｽｴ」「いまむらやすえ（旧姓）」と
+表記がゆれるため、突合・名寄せの前に同じキーへそろえる。
+
+【正規化の手順】
+1. NFKC（全角英数→半角、半角カナ→全角カナ、全角括弧→半角括弧 など）
+2. 括弧とその中身を除く（(旧姓)・【MG】・[PP] など。名前全体が括弧書きのときは括弧だけ外す）
+3. カタカナ → ひらがな
+4. 空白・中黒を除いて小文字化
+
+同じ名前は何度も出てくるため、正規化結果は上限付きのメモ（直近 CACHE_SIZE 件）に保持する。
+Series には normalize_names() を使う（ユニークな値だけを正規化して割り当てる）。
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+CACHE_SIZE = 8192
+
+# NFKC 後の括弧（全角（）・【】・［］は NFKC で () 【】 [] になる）
+BRACKET_PATTERN = re.compile(r"\([^()]*\)|【[^【】]*】|\[[^\[\]]*\]|〔[^〔〕]*〕|「[^「」]*」|『[^『』]*』")
+BRACKET_CHARS = re.compile(r"[()【】\[\]〔〕「」『』]")
+SPACE_PATTERN = re.compile(r"[\s・･]+")
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize(name):
+    s = unicodedata.normalize("NFKC", name)
+    stripped = BRACKET_PATTERN.sub("", s)
+    if not SPACE_PATTERN.sub("", stripped):
+        stripped = s
+    s = BRACKET_CHARS.sub("", stripped)
+    s = s.translate(KATAKANA_TO_HIRAGANA)
+    return SPACE_PATTERN.sub("", s).lower()
+
+
+def normalize_name(name):
+    """名前1つを正規化したキーを返す（欠損は ""）"""
+    if name is None or (not isinstance(name, str) and pd.isna(name)):
+        return ""
+    return _normalize(str(name))
+
+
+def normalize_names(s):
+    """Series の名前を正規化（同じ値は1回だけ正規化する）"""
+    s = pd.Series(s)
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    keys = pd.Series([normalize_name(v) for v in uniques] + [""], dtype=object).to_numpy()
+    return pd.Series(keys[codes], index=s.index, dtype=object)
+
+
+def names_match(a, b, min_length=3):
+    """正規化した名前が一致、または min_length 文字以上で一方が他方に含まれるか"""
+    na, nb = normalize_name(a), normalize_name(b)
+    if not na or not nb:
+        return False
+    return na == nb or (len(na) >= min_length and na in nb) or (len(nb) >= min_length and nb in na)
+
+
+def cache_info():
+    """正規化メモの状況（hits・misses・maxsize・currsize）"""
+    return _normalize.cache_info()
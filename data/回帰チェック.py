@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+集計の結果が変わっていないか・遅くなっていないかを確かめる回帰チェック。
+
+高速化や整理のたびに、社長報告に載る数字が知らないうちに変わる危険がある。
+ここでは決まった入力（フィクスチャ）で各集計を 分析コマンド.py 経由で（分析コマンドにない集計は
+スクリプトを直接）実行し、出力 Excel の全シートと Markdown の全表を、保存しておいた正解と1つずつ突き合わせる。
+あわせて集計ごとの実行時間・最大メモリを履歴に追記し、直近の実行より THRESHOLD 以上遅くなったら失敗にする。
+
+【入力（フィクスチャ）】回帰チェック/入力/ の FIXTURES のブック（--fixtures-dir で別の場所）
+- コミットプラン (4).xlsx・mg_monthly_analysis_results を 2026/2/5 の版で凍結した写し。集計が読むシート
+  （セッション実施状況管理・新 月次投稿数／コミットRawdata・PP_Rawdata）だけを値で残している。
+  毎月更新される本番のブックとは別物なので、本番が更新されても正解はそのまま使える
+- 卒業時アンケート・クレーム対応（特徴量ストアの生徒IDの名寄せに使う）は、名前・満足度の列と
+  クレームの名乗り（「〇〇と申します」）だけを残した写し
+- 正解を作ったときのハッシュを 正解/入力.json に保存し、入力が違えば比較せずに止める
+chat・chat-monthly は 回帰チェック/チャットログ/ の小さなログを読む（chat は ranking の出力も読む）
+
+【集計】
+- ANALYSES: 分析コマンド.py のサブコマンド（graduates・ranking・kgi・pp-monthly・instructor-cube・chat）
+- SCRIPTS : 分析コマンドにない数値の集計。基準日（FIXTURE_DATE）・乱数の seed を固定し、
+  DB・特徴量ストア・学習状態は一時フォルダに作る
+  forecast-update は 卒業時投稿数予測.py の学習状態を2回に分けて更新し、1回の作り直しと同じ予測になるか確かめる
+  student-id は PP_Rawdata・コミットRawdata の先頭に1行足しても元の生徒の生徒IDが変わらないか確かめる
+  chat-ingest は 回帰チェック/チャットログ/ を1行ずつ書き足しながら差分で取り込み、全体の読み直しと比べる
+【正解】回帰チェック/正解/<集計>/<出力ファイル>/<シート>.csv と <レポート>.md（表の行だけ）
+- シートは CSV（小数は有効数字 FLOAT_DIGITS 桁）にして文字列で比較
+【履歴】回帰チェック/履歴.csv（日時・ホスト・コミット・集計・秒・最大メモリMB・一致）
+- 同じホストの直近 HISTORY_WINDOW 回の中央値より THRESHOLD 以上かつ MIN_SLOWDOWN 秒以上遅ければ「速度低下」
+
+【使い方】
+    python 回帰チェック.py                    # 全集計を実行して比較・履歴に追記
+    python 回帰チェック.py --only kgi ranking
+    python 回帰チェック.py --update-golden    # 今の出力を正解として保存し直す（数字が変わるのが正しいときだけ）
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+BASE = Path(__file__).parent
+CHECK_DIR = BASE / "回帰チェック"
+GOLDEN_DIR = CHECK_DIR / "正解"
+HISTORY_PATH = CHECK_DIR / "履歴.csv"
+COMMAND = BASE / "分析コマンド.py"
+
+# 入力（フィクスチャ）: 名前 → 既定のブックのファイル名
+FIXTURES = {
+    "コミットプラン": "コミットプラン (4).xlsx",
+    "mg_results": "［最新版］mg_monthly_analysis_results_v1.1.xlsx",
+    "アンケート": "SnsClub卒業時アンケート（回答） (1).xlsx",
+    "クレーム": "クレーム対応 (1).xlsx",
+}
+# 集計（分析コマンドのサブコマンド）→ 使うフィクスチャ（None は前の集計の出力を読む）。上から順に実行する
+ANALYSES = {
+    "graduates": "コミットプラン",
+    "ranking": "mg_results",
+    "kgi": "コミットプラン",
+    "pp-monthly": "mg_results",
+    "instructor-cube": "コミットプラン",
+    "chat": None,
+}
+CHAT_INPUT = "投稿数ランキング推移_11月〜1月_チーム別.xlsx"  # chat は ranking の出力を読む
+CHAT_DIR = CHECK_DIR / "チャットログ"  # chat 用の小さなログ（本物のログの有無で結果が変わらないように）
+FIXTURES_DIR = CHECK_DIR / "入力"
+FIXTURE_DATE = "2026-02-05"  # フィクスチャを凍結した日。SCRIPTS の基準日に使う
+
+# 分析コマンドにない集計 → スクリプトと引数。上から順に実行する
+# {コミットプラン}・{mg_results} はフィクスチャ、{出力} は出力フォルダ、{作業} は DB などを置く一時フォルダ
+STORE_ARGS = ["--commit-plan", "{コミットプラン}", "--mg-results", "{mg_results}", "--store", "{作業}/特徴量ストア",
+              "--survey", "{アンケート}", "--claims", "{クレーム}", "--as-of", FIXTURE_DATE, "--output-dir", "{出力}"]
+SCRIPTS = {
+    "kpi-view": ["KPIビュー.py", "--commit-plan", "{コミットプラン}", "--mg-results", "{mg_results}",
+                 "--db", "{作業}/分析DB.sqlite", "--xlsx", "{出力}/KPIビュー.xlsx"],
+    "pp-reconcile": ["PP増加投稿数_月次投稿数_突合.py", "{コミットプラン}", "{mg_results}", "{出力}"],
+    "target-curve": ["目標カーブ進捗.py"] + STORE_ARGS,
+    "kgi-simulation": ["KGI_卒業時投稿数シミュレーション.py"] + STORE_ARGS + ["--draws", "20000", "--seed", "0"],
+    "forecast": ["卒業時投稿数予測.py"] + STORE_ARGS + ["--model", "{作業}/予測モデル.npz", "--rebuild"],
+    "forecast-update": ["卒業時投稿数予測.py"] + STORE_ARGS + ["--verify"],
+    "churn-risk": ["退会リスクスコア.py"] + STORE_ARGS,
+    "student-id": ["生徒ID名寄せ.py", "--commit-plan", "{コミットプラン}", "--mg-results", "{mg_results}",
+                   "--survey", "{アンケート}", "--claims", "{クレーム}", "--verify", "--xlsx", "{出力}/生徒ID名寄せ_確認.xlsx"],
+    "chat-monthly": ["チーム別_チャット活発度と投稿数_月次.py", "--chat-dir", str(CHAT_DIR), "--mg-results", "{mg_results}",
+                     "--output-dir", "{出力}"],
+    "chat-ingest": ["チャットログ差分取込.py", "--chat-dir", str(CHAT_DIR), "--verify",
+                    "--xlsx", "{出力}/チャットログ差分取込_確認.xlsx"],
+}
+
+FLOAT_DIGITS = 10
+THRESHOLD = 0.25
+MIN_SLOWDOWN = 0.5  # 秒。これより小さい差は揺らぎとみなす
+HISTORY_WINDOW = 5
+DIFF_LINES = 12
+
+
+def sha1_of(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fixture_paths(fixtures_dir=FIXTURES_DIR):
+    """フィクスチャ名 → ブックのパス（fixtures_dir の中。NFC・NFD のファイル名の両方を探す）"""
+    paths = {}
+    for name, filename in FIXTURES.items():
+        found = [Path(fixtures_dir) / unicodedata.normalize(form, filename) for form in ("NFC", "NFD")]
+        found = [path for path in found if path.exists()]
+        if not found:
+            raise SystemExit(f"入力が見つかりません: {Path(fixtures_dir) / filename}")
+        paths[name] = found[0]
+    return paths
+
+
+def sheet_texts(path):
+    """Excel → {シート名: CSV の文字列}"""
+    sheets = pd.read_excel(path, sheet_name=None)
+    return {name: df.to_csv(index=False, float_format=f"%.{FLOAT_DIGITS}g", lineterminator="\n")
+            for name, df in sheets.items()}
+
+
+def markdown_tables(path):
+    """Markdown → 表の行（| で始まる行）だけ。表と表の間は空行1つ"""
+    lines, previous = [], False
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        is_table = line.lstrip().startswith("|")
+        if is_table:
+            if not previous and lines:
+                lines.append("")
+            lines.append(line.rstrip())
+        previous = is_table
+    return "\n".join(lines) + "\n"
+
+
+def snapshot(output_dir):
+    """出力フォルダ → {正解の相対パス: 内容の文字列}"""
+    result = {}
+    for path in sorted(Path(output_dir).iterdir()):
+        if path.suffix == ".xlsx":
+            for sheet, text in sheet_texts(path).items():
+                result[f"{path.name}/{sheet}.csv"] = text
+        elif path.suffix == ".md":
+            result[path.name] = markdown_tables(path)
+    return result
+
+
+def load_golden(analysis):
+    folder = GOLDEN_DIR / analysis
+    if not folder.exists():
+        return None
+    return {str(p.relative_to(folder)): p.read_text(encoding="utf-8")
+            for p in sorted(folder.rglob("*")) if p.is_file()}
+
+
+def save_golden(analysis, outputs):
+    folder = GOLDEN_DIR / analysis
+    shutil.rmtree(folder, ignore_errors=True)
+    for rel, text in outputs.items():
+        path = folder / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def compare(golden, outputs):
+    """正解と今回の出力 → 違いの説明の並び（一致なら空）"""
+    problems = []
+    for rel in sorted(set(golden) | set(outputs)):
+        if rel not in outputs:
+            problems.append(f"出力がありません: {rel}")
+        elif rel not in golden:
+            problems.append(f"正解にない出力です: {rel}")
+        elif golden[rel] != outputs[rel]:
+            diff = list(difflib.unified_diff(golden[rel].splitlines(), outputs[rel].splitlines(),
+                                             "正解", "今回", lineterm="", n=0))
+            problems.append(f"内容が違います: {rel}\n    " + "\n    ".join(diff[2:2 + DIFF_LINES]))
+    return problems
+
+
+def analysis_command(analysis, input_path, output_dir):
+    """分析コマンドのサブコマンドを実行するコマンドライン"""
+    cmd = [sys.executable, str(COMMAND), analysis, "--input", str(input_path),
+           "--output-dir", str(output_dir), "--no-cache"]
+    if analysis == "chat":
+        cmd += ["--chat-dir", str(CHAT_DIR)]
+    return cmd
+
+
+def script_command(analysis, fixtures, output_dir, work_dir):
+    """SCRIPTS の集計を実行するコマンドライン（引数の {…} をフィクスチャ・出力・作業フォルダに置き換える）"""
+    script, *args = SCRIPTS[analysis]
+    values = {"{" + name + "}": str(path) for name, path in fixtures.items()}
+    values.update({"{出力}": str(output_dir), "{作業}": str(work_dir)})
+    for key, value in values.items():
+        args = [arg.replace(key, value) for arg in args]
+    return [sys.executable, str(BASE / script)] + args
+
+
+def run_analysis(analysis, cmd):
+    """集計を子プロセスで実行 → (秒, その子プロセスの最大メモリMB)。失敗したら出力を付けて止める"""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=BASE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    out = proc.stdout.read()
+    proc.stdout.close()
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        rss = usage.ru_maxrss
+        memory = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+    else:  # Windows では子プロセスごとのメモリが取れない
+        proc.wait()
+        memory = float("nan")
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise SystemExit(f"{analysis} が失敗しました:\n{out.decode('utf-8', errors='replace')}")
+    return elapsed, memory
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def slowdowns(history, current, host, threshold=THRESHOLD, window=HISTORY_WINDOW):
+    """履歴（今回の分を足す前）・今回の結果 → 集計ごとの 基準秒・速度低下"""
+    past = history[history["ホスト"] == host] if not history.empty else history
+    rows = []
+    for _, row in current.iterrows():
+        times = past[past["集計"] == row["集計"]]["秒"].tail(window) if not past.empty else pd.Series(dtype=float)
+        baseline = times.median() if len(times) else float("nan")
+        slower = (pd.notna(baseline) and row["秒"] > baseline * (1 + threshold)
+                  and row["秒"] - baseline > MIN_SLOWDOWN)
+        rows.append({"集計": row["集計"], "基準秒": round(baseline, 2) if pd.notna(baseline) else None,
+                     "速度低下": bool(slower)})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="決まった入力で集計を実行し、正解との一致と実行時間を確かめる")
+    parser.add_argument("--only", nargs="+", choices=list(ANALYSES) + list(SCRIPTS), default=None, help="この集計だけ")
+    parser.add_argument("--fixtures-dir", type=Path, default=FIXTURES_DIR,
+                        help="入力のブックを置いたフォルダ（既定: 回帰チェック/入力）")
+    parser.add_argument("--update-golden", action="store_true", help="今回の出力を正解として保存し直す")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"直近の中央値よりこの割合以上遅ければ失敗（既定: {THRESHOLD}）")
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH, help="実行時間の履歴 CSV")
+    args = parser.parse_args(argv)
+
+    fixtures = fixture_paths(args.fixtures_dir)
+    hashes = {name: sha1_of(path) for name, path in fixtures.items()}
+    manifest_path = GOLDEN_DIR / "入力.json"
+    if not args.update_golden:
+        if not manifest_path.exists():
+            raise SystemExit(f"正解がありません: {GOLDEN_DIR}（先に --update-golden で作ってください）")
+        expected = json.loads(manifest_path.read_text(encoding="utf-8"))
+        changed = [name for name in hashes if expected.get(name) != hashes[name]]
+        if changed:
+            raise SystemExit(f"入力が正解を作ったときと違います: {changed}（--fixtures-dir で正解と同じブックを指定）")
+
+    selected = [a for a in list(ANALYSES) + list(SCRIPTS)
+                if not args.only or a in args.only or (a == "ranking" and "chat" in args.only)]
+    started = datetime.now().isoformat(timespec="seconds")
+    host = platform.node()
+    revision = git_revision()
+    rows, problems = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp) / "作業"
+        work_dir.mkdir()
+        for analysis in selected:
+            output_dir = Path(tmp) / analysis
+            output_dir.mkdir()
+            if analysis in SCRIPTS:
+                cmd = script_command(analysis, fixtures, output_dir, work_dir)
+            else:
+                source = ANALYSES[analysis]
+                input_path = fixtures[source] if source else Path(tmp) / "ranking" / CHAT_INPUT
+                cmd = analysis_command(analysis, input_path, output_dir)
+            elapsed, memory = run_analysis(analysis, cmd)
+            outputs = snapshot(output_dir)
+            if args.update_golden:
+                save_golden(analysis, outputs)
+                found = []
+            else:
+                golden = load_golden(analysis)
+                found = compare(golden, outputs) if golden is not None else [f"正解がありません: {analysis}"]
+            problems[analysis] = found
+            rows.append({"日時": started, "ホスト": host, "コミット": revision,
+                         "集計": analysis, "秒": round(elapsed, 3), "最大メモリMB": round(memory, 1),
+                         "一致": not found})
+            print(f"  {analysis}: {'一致' if not found else '不一致'}（{elapsed:.2f}秒・最大メモリ {memory:.0f}MB）")
+    if args.update_golden:
+        GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(hashes, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+
+    current = pd.DataFrame(rows)
+    history = pd.read_csv(args.history) if args.history.exists() else pd.DataFrame(columns=current.columns)
+    speed = slowdowns(history, current, host, args.threshold)
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    current.to_csv(args.history, mode="a", header=not args.history.exists(), index=False)
+
+    result = current.merge(speed, on="集計")
+    print()
+    print(f"【回帰チェック】{len(result)}集計・不一致 {int((~result['一致']).sum())}件・速度低下 {int(result['速度低下'].sum())}件"
+          f"（履歴: {args.history}）")
+    for analysis, found in problems.items():
+        for problem in found:
+            print(f"  [{analysis}] {problem}")
+    for _, row in result[result["速度低下"]].iterrows():
+        print(f"  [{row['集計']}] 速度低下: {row['秒']:.2f}秒（直近の中央値 {row['基準秒']:.2f}秒・許容 +{args.threshold:.0%}）")
+    if args.update_golden:
+        print(f"正解を保存しました: {GOLDEN_DIR}")
+    elif not result["一致"].all() or result["速度低下"].any():
+        raise SystemExit(1)
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
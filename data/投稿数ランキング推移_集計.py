@@ -2,6 +2,7 @@
 """
 投稿数ランキング推移（11月1日〜2026年1月31日）をチーム別に集計し、
 見やすいExcelに出力するスクリプト。
+対象月は TARGET_MONTHS（分析コマンド.py ranking --months で差し替えられる）。
 """
 import pandas as pd
 import numpy as np
@@ -9,13 +10,15 @@ from pathlib import Path
 
 EXCEL_PATH = Path(__file__).parent / "［最新版］mg_monthly_analysis_results_v1.1.xlsx"
 OUTPUT_PATH = Path(__file__).parent / "投稿数ランキング推移_11月〜1月_チーム別.xlsx"
+TARGET_MONTHS = [(2025, 11), (2025, 12), (2026, 1)]
 
 def clean_team(s):
     if pd.isna(s): return s
     return str(s).strip()
 
-def main():
-    xl = pd.ExcelFile(EXCEL_PATH)
+def main(input_path=None, months=None, output_dir=None):
+    output_path = Path(output_dir) / OUTPUT_PATH.name if output_dir else OUTPUT_PATH
+    xl = pd.ExcelFile(input_path or EXCEL_PATH)
     df = pd.read_excel(xl, sheet_name="PP_Rawdata", header=2)
 
     df["チーム名"] = df["チーム名"].apply(clean_team)
@@ -60,8 +63,9 @@ def main():
     monthly["チーム名"] = monthly["チーム名"].str.strip()
     agg = monthly.groupby(["チーム名", "年", "月"], as_index=False)["投稿増加"].sum()
 
-    target_months = [(2025, 11), (2025, 12), (2026, 1)]
-    month_labels = ["2025年11月", "2025年12月", "2026年1月"]
+    target_months = list(months or TARGET_MONTHS)
+    month_labels = [f"{y}年{m}月" for y, m in target_months]
+    span = f"{len(target_months)}ヶ月"
 
     # 各月の投稿数と順位
     result_list = []
@@ -83,25 +87,17 @@ def main():
         col = f"{label}_投稿数"
         result_df[f"{label}_順位"] = result_df[col].rank(ascending=False, method="min").astype(int)
 
-    # 3ヶ月合計・平均順位
-    result_df["3ヶ月合計投稿数"] = (
-        result_df["2025年11月_投稿数"]
-        + result_df["2025年12月_投稿数"]
-        + result_df["2026年1月_投稿数"]
-    )
-    result_df["3ヶ月合計順位"] = result_df["3ヶ月合計投稿数"].rank(ascending=False, method="min").astype(int)
-    result_df["平均順位"] = (
-        result_df["2025年11月_順位"]
-        + result_df["2025年12月_順位"]
-        + result_df["2026年1月_順位"]
-    ).round(1)
+    # 期間合計・平均順位
+    result_df[f"{span}合計投稿数"] = sum(result_df[f"{label}_投稿数"] for label in month_labels)
+    result_df[f"{span}合計順位"] = result_df[f"{span}合計投稿数"].rank(ascending=False, method="min").astype(int)
+    result_df["平均順位"] = sum(result_df[f"{label}_順位"] for label in month_labels).round(1)
 
     # 列順を整理
     cols = ["チーム名"]
     for label in month_labels:
         cols.append(f"{label}_投稿数")
         cols.append(f"{label}_順位")
-    cols.extend(["3ヶ月合計投稿数", "3ヶ月合計順位", "平均順位"])
+    cols.extend([f"{span}合計投稿数", f"{span}合計順位", "平均順位"])
     result_df = result_df[cols]
 
     # Excel出力（複数シートで見やすく）
@@ -109,7 +105,7 @@ def main():
     from openpyxl.styles import Font, Alignment, Border, Side
     from openpyxl.utils import get_column_letter
 
-    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as writer:
+    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
         # シート1: 推移一覧（メイン）
         result_df.to_excel(writer, sheet_name="投稿数ランキング推移_一覧", index=False)
 
@@ -128,23 +124,20 @@ def main():
         # シート3: チーム別サマリ（チームごとに行で見る）
         summary_rows = []
         for team in teams:
-            summary_rows.append({
-                "チーム名": team,
-                "11月投稿数": result_df.loc[result_df["チーム名"] == team, "2025年11月_投稿数"].values[0],
-                "11月順位": result_df.loc[result_df["チーム名"] == team, "2025年11月_順位"].values[0],
-                "12月投稿数": result_df.loc[result_df["チーム名"] == team, "2025年12月_投稿数"].values[0],
-                "12月順位": result_df.loc[result_df["チーム名"] == team, "2025年12月_順位"].values[0],
-                "1月投稿数": result_df.loc[result_df["チーム名"] == team, "2026年1月_投稿数"].values[0],
-                "1月順位": result_df.loc[result_df["チーム名"] == team, "2026年1月_順位"].values[0],
-                "3ヶ月合計": result_df.loc[result_df["チーム名"] == team, "3ヶ月合計投稿数"].values[0],
-                "合計順位": result_df.loc[result_df["チーム名"] == team, "3ヶ月合計順位"].values[0],
-            })
+            team_row = result_df.loc[result_df["チーム名"] == team]
+            summary = {"チーム名": team}
+            for (_, m), label in zip(target_months, month_labels):
+                summary[f"{m}月投稿数"] = team_row[f"{label}_投稿数"].values[0]
+                summary[f"{m}月順位"] = team_row[f"{label}_順位"].values[0]
+            summary[f"{span}合計"] = team_row[f"{span}合計投稿数"].values[0]
+            summary["合計順位"] = team_row[f"{span}合計順位"].values[0]
+            summary_rows.append(summary)
         pd.DataFrame(summary_rows).to_excel(writer, sheet_name="チーム別サマリ", index=False)
 
-    print(f"出力先: {OUTPUT_PATH}")
+    print(f"出力先: {output_path}")
     print("\n【投稿数ランキング推移 サマリ】")
     print(result_df.to_string(index=False))
-    return OUTPUT_PATH
+    return output_path
 
 if __name__ == "__main__":
     main()
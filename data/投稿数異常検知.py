@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+月次投稿数・PP増加投稿数の入力ミスらしき値を、集計の前に洗い出す。
+
+1ヶ月だけの突出・有効な月の間の「ー」・マイナスの増加投稿数は、そのまま平均に混ざって
+すべてのレポートを静かに歪めるため、生徒 × 月 の行列全体を配列演算1回で調べて
+フラグの付いたセルを一覧にする（値は直さない。確認してから元のExcelを直す）。
+
+【対象】
+- コミット: 新 月次投稿数 の 0m〜6m（生徒 × 7ヶ月）
+- PP      : PP_Rawdata の 1〜6回目「前回からの増加投稿数」（生徒 × 6回）
+
+【フラグ】
+- 外れ値     : 同じ月（回）の全生徒の中央値・MAD によるロバストzスコアが Z_THRESHOLD 超
+               （MAD=0 の列は平均絶対偏差で代用）。かつ中央値との差が MIN_DEVIATION 以上
+- 急変       : 前月（前回）との差の、同じ月どうしでのロバストzスコアが Z_THRESHOLD 超、かつ差が JUMP_MIN 以上
+- 突出       : 前後の月の両方より SPIKE_MIN 以上多く、かつ SPIKE_RATIO 倍以上（1ヶ月だけ跳ねている）
+- 欠損の谷間 : 前後に数値の月があるのに「ー」・空欄
+- マイナス   : 0未満
+
+【集計からの除外】EXCLUDE_KINDS のフラグが1つでも付いた生徒の行は、共通の読込
+（コミットプラン読込.load_monthly / load_graduates・PP_Rawdata読込.load_pp_rawdata）に
+exclude_anomalies=True を渡すと集計の前に外れる（MGチーム別レポート.py の --exclude-anomalies）。
+外れ値・急変は実際に多く投稿した生徒も拾うため、既定では除外しない。
+"""
+import argparse
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import PP_Rawdata読込
+import コミットプラン読込
+from コミットプラン読込 import MONTH_LABELS
+
+OUTPUT_PATH = Path(__file__).parent / "投稿数異常検知結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "投稿数異常検知.md"
+
+Z_THRESHOLD = 3.5  # Iglewicz & Hoaglin の目安
+MIN_DEVIATION = 10  # これ未満の差は z が大きくてもフラグにしない（0 が多い月の過検出を防ぐ）
+JUMP_MIN = 20  # 前月差の下限（立ち上がりの 0 → 15 程度は普通なので拾わない）
+SPIKE_MIN = 15
+SPIKE_RATIO = 3.0
+EXCLUDE_KINDS = ("突出", "マイナス")  # 入力ミスとみなして集計から外す種類
+PP_LABELS = [f"{n}回目" for n in range(1, PP_Rawdata読込.SESSION_COUNT + 1)]
+FLAG_COLUMNS = ["ソース", "キー", "生徒名", "位置", "値", "種類", "スコア"]
+
+
+def robust_z(x, axis=0):
+    """中央値・MAD によるロバストzスコア（NaN は無視。MAD=0 なら平均絶対偏差で代用）"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 全部 NaN の列（0m の前月差など）
+        med = np.nanmedian(x, axis=axis, keepdims=True)
+        dev = np.abs(x - med)
+        mad = np.nanmedian(dev, axis=axis, keepdims=True) / 0.6745
+        mean_ad = np.nanmean(dev, axis=axis, keepdims=True) * 1.253314
+    scale = np.where(mad > 0, mad, mean_ad)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(scale > 0, (x - med) / scale, 0.0)
+    return z, med
+
+
+def scan_matrix(x):
+    """生徒 × 月 の行列 → 種類 → (フラグの bool 行列, スコア行列) の辞書"""
+    valid = ~np.isnan(x)
+    z, med = robust_z(x, axis=0)
+    outlier = valid & (np.abs(z) > Z_THRESHOLD) & (np.abs(x - med) >= MIN_DEVIATION)
+
+    diff = np.full_like(x, np.nan)
+    diff[:, 1:] = x[:, 1:] - x[:, :-1]
+    dz, _ = robust_z(diff, axis=0)
+    jump = ~np.isnan(diff) & (np.abs(dz) > Z_THRESHOLD) & (np.abs(diff) >= JUMP_MIN)
+
+    prev = np.full_like(x, np.nan)
+    nxt = np.full_like(x, np.nan)
+    prev[:, 1:] = x[:, :-1]
+    nxt[:, :-1] = x[:, 1:]
+    neighbors = np.fmax(prev, nxt)
+    both = ~np.isnan(prev) & ~np.isnan(nxt)  # 前後の両方に数値がある月だけ（端の月・谷間の隣は対象外）
+    spike = valid & both & (x - neighbors >= SPIKE_MIN) & (x >= SPIKE_RATIO * np.maximum(neighbors, 1))
+
+    seen_before = np.maximum.accumulate(valid, axis=1)
+    seen_after = np.maximum.accumulate(valid[:, ::-1], axis=1)[:, ::-1]
+    before = np.zeros_like(valid)
+    after = np.zeros_like(valid)
+    before[:, 1:] = seen_before[:, :-1]
+    after[:, :-1] = seen_after[:, 1:]
+    gap = ~valid & before & after
+
+    negative = valid & (x < 0)
+    with np.errstate(invalid="ignore"):
+        spike_score = np.where(spike, x / np.maximum(neighbors, 1), np.nan)
+    return {
+        "外れ値": (outlier, z),
+        "急変": (jump, dz),
+        "突出": (spike, spike_score),
+        "欠損の谷間": (gap, np.full_like(x, np.nan)),
+        "マイナス": (negative, x),
+    }
+
+
+def has_anomaly(x, kinds=EXCLUDE_KINDS):
+    """生徒 × 月 の行列 → kinds のフラグが1つでも付いた行か（bool の配列）"""
+    x = np.asarray(x, dtype=float)
+    if x.size == 0:
+        return np.zeros(len(x), dtype=bool)
+    flags = scan_matrix(x)
+    return np.logical_or.reduce([flags[kind][0] for kind in kinds]).any(axis=1)
+
+
+def flags_frame(source, keys, names, labels, x):
+    """scan_matrix のフラグを縦持ちの一覧にする"""
+    keys = np.asarray(keys)
+    names = np.asarray(names, dtype=object)
+    frames = []
+    for kind, (mask, score) in scan_matrix(x).items():
+        rows, cols = np.nonzero(mask)
+        frames.append(pd.DataFrame({
+            "ソース": source,
+            "キー": keys[rows],
+            "生徒名": names[rows],
+            "位置": np.asarray(labels)[cols],
+            "値": x[rows, cols],
+            "種類": kind,
+            "スコア": np.round(score[rows, cols], 2),
+        }))
+    out = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FLAG_COLUMNS)
+    return out[FLAG_COLUMNS]
+
+
+def scan(month, pp):
+    """コミット（load_monthly の結果）と PP（load_pp_rawdata の結果）のフラグ一覧"""
+    commit = flags_frame("コミット", month["no."].to_numpy(), month["生徒名"].to_numpy(), MONTH_LABELS,
+                         month[MONTH_LABELS].to_numpy(dtype=float))
+    pp_flags = flags_frame("PP", pp["行番号"].to_numpy(), pp["名前"].to_numpy(), PP_LABELS,
+                           pp[PP_Rawdata読込.INCR_COLS].to_numpy(dtype=float))
+    flags = pd.concat([commit, pp_flags], ignore_index=True)
+    return flags.sort_values(["ソース", "キー", "位置", "種類"], kind="stable").reset_index(drop=True)
+
+
+def flagged_rows(flags, month, pp):
+    """フラグの付いた生徒の行（元の値の並び）"""
+    kinds = flags.groupby(["ソース", "キー"])["種類"].agg(lambda s: "・".join(sorted(set(s)))).rename("フラグ")
+    commit = month.set_index("no.")[["生徒名"] + MONTH_LABELS]
+    commit = commit.join(kinds.loc["コミット"] if "コミット" in kinds.index else kinds.iloc[:0], how="inner")
+    pp_rows = pp.set_index("行番号")[["名前"] + PP_Rawdata読込.INCR_COLS]
+    pp_rows.columns = ["生徒名"] + PP_LABELS
+    pp_rows = pp_rows.join(kinds.loc["PP"] if "PP" in kinds.index else kinds.iloc[:0], how="inner")
+    return commit.reset_index(), pp_rows.reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="月次投稿数・PP増加投稿数の異常値を洗い出す")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    args = parser.parse_args(argv)
+
+    month = コミットプラン読込.load_monthly(pd.read_excel(
+        args.commit_plan or コミットプラン読込.INPUT_PATH, sheet_name=コミットプラン読込.MONTH_SHEET, header=None))
+    pp = PP_Rawdata読込.load_pp_rawdata(args.mg_results)
+
+    flags = scan(month, pp)
+    commit_rows, pp_rows = flagged_rows(flags, month, pp)
+    summary = flags.groupby(["ソース", "種類"]).size().rename("件数").reset_index()
+
+    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+        summary.to_excel(w, sheet_name="サマリ", index=False)
+        flags.to_excel(w, sheet_name="フラグ一覧", index=False)
+        commit_rows.to_excel(w, sheet_name="該当行_コミット", index=False)
+        pp_rows.to_excel(w, sheet_name="該当行_PP", index=False)
+
+    report_lines = [
+        "# 投稿数 異常検知",
+        "",
+        "## サマリ",
+        "",
+        "| ソース | 種類 | 件数 |",
+        "|--------|------|------|",
+    ]
+    for _, row in summary.iterrows():
+        report_lines.append(f"| {row['ソース']} | {row['種類']} | {row['件数']} |")
+    report_lines.extend([
+        "",
+        "## フラグ一覧",
+        "",
+        "| ソース | キー | 生徒名 | 位置 | 値 | 種類 | スコア |",
+        "|--------|------|--------|------|----|------|--------|",
+    ])
+    for _, row in flags.iterrows():
+        value = int(row["値"]) if pd.notna(row["値"]) else "ー"
+        score = row["スコア"] if pd.notna(row["スコア"]) else ""
+        report_lines.append(
+            f"| {row['ソース']} | {row['キー']} | {row['生徒名']} | {row['位置']} | {value} | {row['種類']} | {score} |")
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **コミット**: `コミットプラン (4).xlsx` の「新 月次投稿数」P〜V列（0〜6ヶ月目）",
+        "- **PP**: `［最新版］mg_monthly_analysis_results_v1.1.xlsx` の PP_Rawdata「前回からの増加投稿数」1〜6回目",
+        f"- **外れ値**: 同じ月のロバストzスコア（中央値・MAD）> {Z_THRESHOLD} かつ中央値との差 {MIN_DEVIATION} 以上",
+        f"- **急変**: 前月差の同じ月どうしのロバストzスコア > {Z_THRESHOLD} かつ差 {JUMP_MIN} 以上",
+        f"- **突出**: 前後の月より {SPIKE_MIN} 以上多く、{SPIKE_RATIO:g} 倍以上",
+        "- **欠損の谷間**: 前後に数値の月があるのに「ー」・空欄",
+        "",
+        "---",
+        "*出力: 投稿数異常検知.py*",
+    ])
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {OUTPUT_PATH}")
+    print(f"レポート: {REPORT_PATH}")
+    print()
+    print("【投稿数 異常検知】")
+    for _, row in summary.iterrows():
+        print(f"  {row['ソース']} {row['種類']}: {row['件数']}件")
+    print(f"  該当行: コミット {len(commit_rows)}行 / PP {len(pp_rows)}行")
+    return flags
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+「1つの問いに1本のスクリプト」の代わりに、指標を関数1つで問い合わせる API。
+
+    from 指標クエリ import query
+    query(metric="卒業時投稿数", stat="mean", course="コミット",
+          group_by=["担当MG"], period="2025-11..2026-01")
+
+【指標】（月 = period・group_by の「月」で使う年月）
+- 卒業時投稿数       : コミット＝卒業生の0-6ヶ月目合計（卒業の定義は コミットプラン読込.py）／月=卒業月
+                       プレミアムプラス＝6回目実施日ありの生徒の合計投稿数／月=6回目実施日の年月
+- 0〜6ヶ月合計投稿数 : コミットのみ。初回セッション日がある全生徒の0-6ヶ月目合計／月=初回セッションの年月
+- 全期間合計投稿数   : コミット＝コミットRawdata の現在投稿数合計、プレミアムプラス＝PP_Rawdata の合計投稿数／月なし
+
+【結果のキャッシュ】
+問い合わせ結果は上限付きの LRU キャッシュ（直近 CACHE_SIZE 件）に
+「問い合わせ内容 × 入力Excelのハッシュ（スナップショット）」をキーにして保持する。
+Excel が更新されるとハッシュが変わるため、古い結果は使われない。
+"""
+import argparse
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+import PP_Rawdata読込
+import コミットプラン読込
+from スナップショット保存 import file_sha256
+from 分析DB import MG_RESULTS_PATH
+from 期カレンダー import assign_term_quarter
+
+CACHE_SIZE = 256
+FRAME_CACHE_SIZE = 2  # 読み込んだ明細を保持するスナップショット数
+
+METRICS = ("卒業時投稿数", "0〜6ヶ月合計投稿数", "全期間合計投稿数")
+COURSES = ("コミット", "プレミアムプラス")
+GROUP_COLUMNS = ("コース", "担当MG", "チーム名", "月", "期Q")
+STATS = ("mean", "sum", "count", "median", "min", "max", "std")
+
+
+@lru_cache(maxsize=16)
+def _file_digest(path, mtime_ns, size):
+    return file_sha256(path)[:16]
+
+
+def snapshot_hash(commit_path=None, mg_results_path=None):
+    """入力Excel 2つの内容ハッシュ（更新日時・サイズが同じなら再計算しない）"""
+    parts = []
+    for path in (Path(commit_path or コミットプラン読込.INPUT_PATH), Path(mg_results_path or MG_RESULTS_PATH)):
+        st = path.stat()
+        parts.append(_file_digest(str(path), st.st_mtime_ns, st.st_size))
+    return "-".join(parts)
+
+
+def metric_frame(commit_path=None, mg_results_path=None):
+    """全指標の明細（生徒1人 × 指標 1行）: 指標・コース・生徒名・担当MG・チーム名・月・期Q・値"""
+    commit_path = commit_path or コミットプラン読込.INPUT_PATH
+    mg_results_path = mg_results_path or MG_RESULTS_PATH
+    df_sess = pd.read_excel(commit_path, sheet_name=コミットプラン読込.SESS_SHEET, header=None)
+    df_month = pd.read_excel(commit_path, sheet_name=コミットプラン読込.MONTH_SHEET, header=None)
+    commit_raw = pd.read_excel(mg_results_path, sheet_name="コミットRawdata", header=0)
+    pp_raw = pd.read_excel(mg_results_path, sheet_name=PP_Rawdata読込.SHEET, header=PP_Rawdata読込.HEADER_ROW)
+
+    graduates = コミットプラン読込.load_graduates(df_sess=df_sess, df_month=df_month)
+    sess = コミットプラン読込.load_sessions(df_sess)
+    monthly = コミットプラン読込.load_monthly(df_month).join(sess, on="no.", how="inner")
+    monthly = monthly[monthly["初回セッション日"].notna()]
+
+    pp_mg = PP_Rawdata読込.clean_text(pp_raw["担当MG"])
+    pp_team = PP_Rawdata読込.clean_text(pp_raw["チーム名"])
+    pp_total = コミットプラン読込.to_num_series(pp_raw["合計投稿数"])
+    pp_grad = pp_raw["6回目実施日"].notna()
+
+    def frame(metric, course, names, mgs, teams, months, values):
+        return pd.DataFrame({
+            "指標": metric,
+            "コース": course,
+            "生徒名": pd.Series(names).to_numpy(),
+            "担当MG": pd.Series(mgs).to_numpy(),
+            "チーム名": pd.Series(teams).to_numpy() if teams is not None else None,
+            "月": pd.Series(months).to_numpy() if months is not None else None,
+            "値": pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(),
+        })
+
+    frames = [
+        frame("卒業時投稿数", "コミット", graduates["生徒名"], graduates["担当MG"], None,
+              graduates["卒業月"].replace("", None), graduates["卒業時投稿数"]),
+        frame("卒業時投稿数", "プレミアムプラス", pp_raw.loc[pp_grad, "名前"], pp_mg[pp_grad], pp_team[pp_grad],
+              pd.to_datetime(pp_raw.loc[pp_grad, "6回目実施日"], errors="coerce").dt.strftime("%Y-%m"),
+              pp_total[pp_grad]),
+        frame("0〜6ヶ月合計投稿数", "コミット", monthly["生徒名"], monthly["担当MG"], None,
+              monthly["初回セッション日"].dt.strftime("%Y-%m"),
+              monthly[コミットプラン読込.MONTH_LABELS].fillna(0).sum(axis=1)),
+        frame("全期間合計投稿数", "コミット", commit_raw["生徒名"], PP_Rawdata読込.clean_text(commit_raw["Unnamed: 6"]),
+              PP_Rawdata読込.clean_text(commit_raw["チーム名"]), None,
+              コミットプラン読込.to_num_series(commit_raw["現在投稿数合計"])),
+        frame("全期間合計投稿数", "プレミアムプラス", pp_raw["名前"], pp_mg, pp_team, None, pp_total),
+    ]
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df["値"].notna()].reset_index(drop=True)
+    df["期Q"] = assign_term_quarter(df["月"])["期Q"]
+    return df
+
+
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def _metric_frame_cached(snapshot, commit_path, mg_results_path):
+    return metric_frame(commit_path, mg_results_path)
+
+
+def parse_period(period):
+    """"2025-11..2026-01"・"2025-11"・"4期2Q" → ("月", 開始, 終了) または ("期Q", ラベル, None)"""
+    period = str(period).strip()
+    if "期" in period:
+        return "期Q", period, None
+    start, _, end = period.partition("..")
+    start = str(pd.Period(start, freq="M"))
+    end = str(pd.Period(end, freq="M")) if end else start
+    return "月", start, end
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _query_cached(key, snapshot, commit_path, mg_results_path):
+    metric, stat, course, group_by, period = key
+    df = _metric_frame_cached(snapshot, commit_path, mg_results_path)
+    df = df[df["指標"] == metric]
+    if course is not None:
+        df = df[df["コース"] == course]
+    if period is not None:
+        if df["月"].isna().all() and len(df):
+            raise ValueError(f"指標「{metric}」には月がないため period は指定できません")
+        kind, start, end = parse_period(period)
+        if kind == "期Q":
+            df = df[df["期Q"] == start]
+        else:
+            df = df[(df["月"] >= start) & (df["月"] <= end)]
+
+    if not group_by:
+        # 空の選択でも Series のメソッドに任せる（count・sum は 0、mean などは NaN）
+        value = df["値"].agg(stat)
+        return pd.DataFrame({stat: [value], "人数": [len(df)]})
+    g = df.groupby(list(group_by), dropna=False)["値"]
+    out = g.agg(stat).rename(stat).to_frame()
+    out["人数"] = g.count()
+    return out.reset_index()
+
+
+def query(metric, stat="mean", course=None, group_by=None, period=None,
+          commit_path=None, mg_results_path=None, round_digits=2):
+    """
+    指標を集計して DataFrame で返す。
+
+    metric: METRICS のいずれか
+    stat: "mean"・"sum"・"count"・"median"・"min"・"max"・"std"
+    course: "コミット"・"プレミアムプラス"・None（両方）
+    group_by: GROUP_COLUMNS の列のリスト（None なら全体1行）
+    period: "2025-11..2026-01"（両端を含む）・"2025-11"・"4期2Q"（None なら全期間）
+    """
+    if metric not in METRICS:
+        raise ValueError(f"指標は {METRICS} のいずれか: {metric}")
+    if stat not in STATS:
+        raise ValueError(f"stat は {STATS} のいずれか: {stat}")
+    if course is not None and course not in COURSES:
+        raise ValueError(f"course は {COURSES} のいずれか: {course}")
+    group_by = tuple(group_by or ())
+    unknown = [c for c in group_by if c not in GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f"group_by は {GROUP_COLUMNS} から: {unknown}")
+
+    commit_path = str(commit_path or コミットプラン読込.INPUT_PATH)
+    mg_results_path = str(mg_results_path or MG_RESULTS_PATH)
+    snapshot = snapshot_hash(commit_path, mg_results_path)
+    key = (metric, stat, course, group_by, period)
+    result = _query_cached(key, snapshot, commit_path, mg_results_path).copy()
+    if round_digits is not None:
+        result[stat] = result[stat].round(round_digits)
+    return result
+
+
+def cache_info():
+    """問い合わせ結果キャッシュの状況（hits・misses・maxsize・currsize）"""
+    return _query_cached.cache_info()
+
+
+def clear_cache():
+    _query_cached.cache_clear()
+    _metric_frame_cached.cache_clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="指標を問い合わせる")
+    parser.add_argument("metric", choices=METRICS)
+    parser.add_argument("--stat", default="mean", choices=list(STATS))
+    parser.add_argument("--course", default=None, choices=COURSES)
+    parser.add_argument("--group-by", nargs="*", default=None, choices=GROUP_COLUMNS)
+    parser.add_argument("--period", default=None, help='"2025-11..2026-01"・"2025-11"・"4期2Q"')
+    args = parser.parse_args(argv)
+
+    result = query(args.metric, args.stat, args.course, args.group_by, args.period)
+    print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
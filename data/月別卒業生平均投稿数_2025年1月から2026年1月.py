@@ -13,6 +13,8 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+from 名前正規化 import normalize_name
+
 # 入力パス
 BASE = Path(__file__).parent.parent
 INPUT_PATH = BASE / "コミットプラン (4).xlsx"
@@ -49,16 +51,6 @@ for year in [2025, 2026]:
         TARGET_MONTHS.append(f"{year}-{month:02d}")
 
 
-def normalize_name(name):
-    """名前を正規化（全角スペース→半角スペース、小文字化など）"""
-    if pd.isna(name):
-        return ""
-    s = str(name).strip()
-    s = s.replace("　", " ")
-    s = s.lower()
-    return s
-
-
 def to_num(val):
     """数値に変換"""
     if pd.isna(val):
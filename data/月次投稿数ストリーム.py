@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+"""
+「新 月次投稿数」を1行ずつ流して集計する（行数に比例してメモリが増えない）。
+
+pd.read_excel(header=None) でシート全体を DataFrame にしてから行ループする代わりに、
+openpyxl の read_only モードの行イテレータからジェネレータをつないで
+「読む → 検証 → 卒業生の抽出 → 集計」を1パスで行う。
+数十万行のブックでも小さいVMで処理できる。
+
+【パイプライン】
+    iter_sheet_rows  : read_only のワークブックから値のタプルを1行ずつ
+    parse_monthly    : no.・在学・生徒名・0m〜6m に変換（無効な行は検証ログへ）
+    iter_graduates   : セッション実施状況管理と突き合わせて卒業生だけを流す
+    StreamAggregator : 卒業月別・担当MG別の 人数・合計・二乗和 を逐次更新
+
+メモリに残るのは、セッション実施状況管理の no. → (担当MG, 初回セッション日, 6回目実施日) と
+集計のグループごとの数値だけ（月次の行は保持しない）。
+
+【卒業の定義・卒業時投稿数・卒業月】コミットプラン読込.py と同じ
+"""
+import argparse
+import csv
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+
+import コミットプラン読込
+from コミットプラン読込 import DASH_VALUES, MONTH_LABELS
+
+OUTPUT_PATH = Path(__file__).parent / "月次投稿数ストリーム集計結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "月次投稿数ストリーム集計.md"
+
+MAX_ISSUES = 1000  # 検証ログに残す件数の上限（件数自体はすべて数える）
+GRADUATE_COLUMNS = ["no.", "生徒名", "担当MG", "卒業月", "卒業時投稿数"] + MONTH_LABELS + ["初回セッション日", "6回目実施日"]
+
+
+def iter_sheet_rows(path, sheet_name, min_row=1):
+    """read_only モードでシートの行（値のタプル）を1行ずつ返す。(Excel行番号, 値) を yield"""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        for row_number, values in enumerate(ws.iter_rows(min_row=min_row, values_only=True), start=min_row):
+            yield row_number, values
+    finally:
+        wb.close()
+
+
+def cell(values, col):
+    return values[col] if col < len(values) else None
+
+
+def to_num(value):
+    """1セルを数値に（コミットプラン読込.to_num_series と同じ規則。変換不可は None）"""
+    if value is None:
+        return None
+    text = unicodedata.normalize("NFKC", str(value).strip())
+    if text in DASH_VALUES:
+        return None
+    try:
+        num = float(text)
+    except ValueError:
+        return None
+    if num != num:
+        return None
+    return float(int(num)) if abs(num) != float("inf") else num
+
+
+def to_no(value):
+    """no. セルを整数に（変換不可は None）"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        num = float(str(value).strip()) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(num) if num == num and abs(num) != float("inf") else None
+
+
+def to_date(value):
+    """日付セルのみ Timestamp に（文字列・数値は None）"""
+    return pd.Timestamp(value) if isinstance(value, datetime) else None
+
+
+def has_value(value):
+    return value is not None and str(value).strip() not in DASH_VALUES
+
+
+def load_session_index(path):
+    """セッション実施状況管理を流して no. → (担当MG, 初回セッション日, 6回目実施日) の辞書を作る"""
+    header_row = コミットプラン読込.SESS_HEADER_ROW + 1
+    sixth_col = コミットプラン読込.SESS_COL_6TH_DATE
+    index = {}
+    for row_number, values in iter_sheet_rows(path, コミットプラン読込.SESS_SHEET, min_row=header_row):
+        if row_number == header_row:
+            sixth_col = コミットプラン読込.find_6th_session_col_in(values)
+            continue
+        no_ = to_no(cell(values, コミットプラン読込.SESS_COL_NO))
+        if no_ is None:
+            continue
+        mg = cell(values, コミットプラン読込.SESS_COL_MG)
+        index[no_] = (
+            mg if mg is not None else "",
+            to_date(cell(values, コミットプラン読込.SESS_COL_FIRST_NORMAL)),
+            to_date(cell(values, sixth_col)),
+        )
+    return index
+
+
+def parse_monthly(rows, issues):
+    """新 月次投稿数の行 → 生徒レコード（辞書）。無効な行・セルは issues に記録する"""
+    c0 = コミットプラン読込.MONTH_COL_0M
+    for row_number, values in rows:
+        no_raw = cell(values, コミットプラン読込.MONTH_COL_NO)
+        name = cell(values, コミットプラン読込.MONTH_COL_NAME)
+        no_ = to_no(no_raw)
+        raw = [cell(values, c0 + k) for k in range(len(MONTH_LABELS))]
+        if name is None or str(name).strip() == "":
+            # no. だけ振ってある空の行は黙って飛ばす
+            if any(has_value(v) for v in raw):
+                issues.add(row_number, "生徒名なし（投稿数あり）", no_raw, name)
+            continue
+        if no_ is None:
+            issues.add(row_number, "no.が数値でない", no_raw, name)
+            continue
+        nums = [to_num(v) for v in raw]
+        for label, v, num in zip(MONTH_LABELS, raw, nums):
+            if num is None and has_value(v):
+                issues.add(row_number, f"{label} が数値でない", no_raw, v)
+        record = {"no.": no_, "在学": cell(values, コミットプラン読込.MONTH_COL_STATUS), "生徒名": name}
+        record.update(zip(MONTH_LABELS, nums))
+        record["6m_データあり"] = has_value(raw[-1])
+        yield record
+
+
+def iter_graduates(records, sessions):
+    """セッション情報と突き合わせ、卒業生だけを卒業時投稿数・卒業月つきで流す"""
+    for rec in records:
+        sess = sessions.get(rec["no."])
+        if sess is None:
+            continue
+        mg, first, sixth = sess
+        if sixth is None and not rec["6m_データあり"]:
+            continue
+        if sixth is not None:
+            grad_month = sixth.strftime("%Y-%m")
+        elif first is not None:
+            grad_month = (first + pd.DateOffset(months=6)).strftime("%Y-%m")
+        else:
+            grad_month = ""
+        out = {
+            "no.": rec["no."],
+            "生徒名": rec["生徒名"],
+            "担当MG": mg,
+            "卒業月": grad_month,
+            "卒業時投稿数": int(sum(rec[label] or 0 for label in MONTH_LABELS)),
+        }
+        for label in MONTH_LABELS:
+            out[label] = int(rec[label]) if rec[label] is not None else "ー"
+        out["初回セッション日"] = first.strftime("%Y-%m-%d") if first is not None else ""
+        out["6回目実施日"] = sixth.strftime("%Y-%m-%d") if sixth is not None else ""
+        yield out
+
+
+class IssueLog:
+    """検証で見つかった行（先頭 MAX_ISSUES 件だけ保持し、種類ごとの件数は全件数える）"""
+
+    def __init__(self, limit=MAX_ISSUES):
+        self.limit = limit
+        self.rows = []
+        self.counts = defaultdict(int)
+
+    def add(self, row_number, kind, no_, value):
+        self.counts[kind] += 1
+        if len(self.rows) < self.limit:
+            self.rows.append({"行番号": row_number, "内容": kind, "no.": no_, "値": value})
+
+    def frame(self):
+        return pd.DataFrame(self.rows, columns=["行番号", "内容", "no.", "値"])
+
+
+class StreamAggregator:
+    """グループごとに 人数・合計・二乗和 と 0m〜6m の合計・件数を逐次更新する"""
+
+    def __init__(self, keys=("卒業月", "担当MG")):
+        self.keys = keys
+        self.stats = {key: defaultdict(lambda: [0, 0.0, 0.0]) for key in ("全体",) + tuple(keys)}
+        self.month_sum = [0.0] * len(MONTH_LABELS)
+        self.month_count = [0] * len(MONTH_LABELS)
+
+    def add(self, grad):
+        value = grad["卒業時投稿数"]
+        for key in self.stats:
+            s = self.stats[key]["全体" if key == "全体" else (grad[key] or "（未設定）")]
+            s[0] += 1
+            s[1] += value
+            s[2] += value * value
+        for k, label in enumerate(MONTH_LABELS):
+            if grad[label] != "ー":
+                self.month_sum[k] += grad[label]
+                self.month_count[k] += 1
+
+    def frame(self, key):
+        rows = []
+        for group, (n, total, sq) in sorted(self.stats[key].items(), key=lambda kv: str(kv[0])):
+            mean = total / n
+            var = (sq - n * mean * mean) / (n - 1) if n > 1 else float("nan")
+            rows.append({key: group, "人数": n, "合計": int(total), "平均卒業時投稿数": round(mean, 2),
+                         "標準偏差": round(max(var, 0.0) ** 0.5, 2) if n > 1 else None})
+        return pd.DataFrame(rows, columns=[key, "人数", "合計", "平均卒業時投稿数", "標準偏差"])
+
+    def month_frame(self):
+        return pd.DataFrame({
+            "相対月": MONTH_LABELS,
+            "件数": self.month_count,
+            "平均投稿数": [round(s / n, 2) if n else None for s, n in zip(self.month_sum, self.month_count)],
+        })
+
+
+def run(path=None, csv_path=None):
+    """1パスで集計する。csv_path を渡すと卒業生の行もその場で CSV に書き出す"""
+    path = path or コミットプラン読込.INPUT_PATH
+    sessions = load_session_index(path)
+    issues = IssueLog()
+    agg = StreamAggregator()
+    rows = iter_sheet_rows(path, コミットプラン読込.MONTH_SHEET, min_row=コミットプラン読込.MONTH_DATA_START + 1)
+    graduates = iter_graduates(parse_monthly(rows, issues), sessions)
+
+    writer = None
+    f = open(csv_path, "w", newline="", encoding="utf-8-sig") if csv_path else None
+    try:
+        if f:
+            writer = csv.DictWriter(f, fieldnames=GRADUATE_COLUMNS)
+            writer.writeheader()
+        for grad in graduates:
+            agg.add(grad)
+            if writer:
+                writer.writerow(grad)
+    finally:
+        if f:
+            f.close()
+    return agg, issues
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="新 月次投稿数を1行ずつ流して卒業生を集計する")
+    parser.add_argument("input", nargs="?", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--csv", type=Path, default=None, help="卒業生の行を CSV に書き出す")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    agg, issues = run(args.input, args.csv)
+    elapsed = time.perf_counter() - t0
+
+    overall = agg.frame("全体")
+    by_month = agg.frame("卒業月")
+    by_mg = agg.frame("担当MG").sort_values("平均卒業時投稿数", ascending=False)
+    trajectory = agg.month_frame()
+    issue_counts = pd.DataFrame(sorted(issues.counts.items()), columns=["内容", "件数"])
+
+    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+        overall.to_excel(w, sheet_name="全体", index=False)
+        by_month.to_excel(w, sheet_name="卒業月別", index=False)
+        by_mg.to_excel(w, sheet_name="担当MG別", index=False)
+        trajectory.to_excel(w, sheet_name="相対月別", index=False)
+        issue_counts.to_excel(w, sheet_name="検証サマリ", index=False)
+        issues.frame().to_excel(w, sheet_name="検証ログ", index=False)
+
+    report_lines = [
+        "# 新 月次投稿数 ストリーミング集計（卒業生）",
+        "",
+        "## 卒業月別",
+        "",
+        "| 卒業月 | 人数 | 平均卒業時投稿数 | 標準偏差 |",
+        "|--------|------|-----------------|---------|",
+    ]
+    for _, row in by_month.iterrows():
+        sd = row["標準偏差"] if pd.notna(row["標準偏差"]) else "ー"
+        report_lines.append(f"| {row['卒業月']} | {row['人数']} | {row['平均卒業時投稿数']} | {sd} |")
+    report_lines.extend([
+        "",
+        "## 担当MG別",
+        "",
+        "| 担当MG | 人数 | 平均卒業時投稿数 |",
+        "|--------|------|-----------------|",
+    ])
+    for _, row in by_mg.iterrows():
+        report_lines.append(f"| {row['担当MG']} | {row['人数']} | {row['平均卒業時投稿数']} |")
+    report_lines.extend([
+        "",
+        "## 検証",
+        "",
+        "| 内容 | 件数 |",
+        "|------|------|",
+    ])
+    for _, row in issue_counts.iterrows():
+        report_lines.append(f"| {row['内容']} | {row['件数']} |")
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **入力**: `コミットプラン (4).xlsx` の「新 月次投稿数」「セッション実施状況管理」（openpyxl read_only で1行ずつ）",
+        "- **卒業・卒業時投稿数・卒業月**: `コミットプラン読込.py` と同じ定義",
+        f"- **検証ログ**: 先頭 {MAX_ISSUES} 件のみ保持（件数は全件）",
+        "",
+        "---",
+        "*出力: 月次投稿数ストリーム.py*",
+    ])
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {OUTPUT_PATH}")
+    print(f"レポート: {REPORT_PATH}")
+    if args.csv:
+        print(f"卒業生CSV: {args.csv}")
+    print()
+    print(f"【新 月次投稿数 ストリーミング集計】（{elapsed:.1f}秒）")
+    if overall.empty:
+        print("  卒業生: 0名")
+    else:
+        row = overall.iloc[0]
+        print(f"  卒業生: {row['人数']}名 / 平均卒業時投稿数 {row['平均卒業時投稿数']}投稿")
+    for _, row in issue_counts.iterrows():
+        print(f"  検証 {row['内容']}: {row['件数']}件")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+開始以来のすべての期Q（四半期）について、卒業生の卒業時平均投稿数を1回の実行で比較するスクリプト。
+4期1Q_2Q_卒業時平均投稿数比較.py のように定数（卒業生名簿・対象月）を書き換えて
+四半期ペアごとに再実行する必要はない。
+
+【データ出所】コミットプラン (4).xlsx の「セッション実施状況管理」「新 月次投稿数」シート
+【卒業の定義】6回目実施日がある、または6ヶ月目のデータがある
+【卒業時投稿数】0-6ヶ月目の合計投稿数
+【卒業月】6回目実施日の年月、または初回セッションから6ヶ月後を推定
+【期Q】期カレンダー.py（8月始まり、4期1Q = 2025年8月〜10月）
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+import コミットプラン読込
+from 期カレンダー import assign_term_quarter, build_calendar
+
+OUTPUT_PATH = Path(__file__).parent / "期Q別_卒業時平均投稿数比較結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "期Q別_卒業時平均投稿数比較.md"
+
+
+def summarize_by_quarter(graduates):
+    """期Q ごとの 卒業生数・平均・中央値・最小・最大 と前Q比（卒業生0名の期Qも行を残す）"""
+    g = graduates.groupby("期Q_順").agg(
+        卒業生数=("卒業時投稿数", "count"),
+        平均卒業時投稿数=("卒業時投稿数", "mean"),
+        中央値=("卒業時投稿数", "median"),
+        最小値=("卒業時投稿数", "min"),
+        最大値=("卒業時投稿数", "max"),
+    )
+    cal = build_calendar(graduates["卒業月"].min(), graduates["卒業月"].max())
+    quarters = cal.drop_duplicates("期Q_順").set_index("期Q_順")[["期Q", "Q開始月", "Q終了月"]]
+    g = quarters.join(g).reset_index(drop=True)
+    g["卒業生数"] = g["卒業生数"].fillna(0).astype(int)
+    g["平均卒業時投稿数"] = g["平均卒業時投稿数"].round(2)
+    g["前Q比"] = g["平均卒業時投稿数"].diff().round(2)
+    return g
+
+
+def pivot_mg_by_quarter(graduates, quarters):
+    """担当MG × 期Q の平均卒業時投稿数（人数付き）"""
+    with_mg = graduates[graduates["担当MG"].astype(str).str.strip() != ""]
+    avg = with_mg.pivot_table(index="担当MG", columns="期Q", values="卒業時投稿数", aggfunc="mean").round(2)
+    cnt = with_mg.pivot_table(index="担当MG", columns="期Q", values="卒業時投稿数", aggfunc="count")
+    cols = [q for q in quarters if q in avg.columns]
+    return avg.reindex(columns=cols), cnt.reindex(columns=cols).fillna(0).astype(int)
+
+
+def main(input_path=None):
+    graduates = コミットプラン読込.load_graduates(input_path)
+    graduates = graduates[graduates["卒業月"] != ""].copy()
+    graduates = graduates.join(assign_term_quarter(graduates["卒業月"]))
+    if graduates.empty:
+        print("エラー: 卒業生が見つかりませんでした。")
+        return
+
+    by_quarter = summarize_by_quarter(graduates)
+    quarters = by_quarter.loc[by_quarter["卒業生数"] > 0, "期Q"].tolist()
+    mg_avg, mg_cnt = pivot_mg_by_quarter(graduates, quarters)
+
+    detail_cols = ["期Q", "卒業月", "no.", "生徒名", "担当MG", "卒業時投稿数", "0m", "1m", "2m", "3m", "4m", "5m", "6m"]
+    detail = graduates.sort_values(["期Q_順", "卒業月", "生徒名"])[detail_cols]
+
+    with pd.ExcelWriter(OUTPUT_PATH, engine="openpyxl") as w:
+        by_quarter.to_excel(w, sheet_name="期Q別集計", index=False)
+        mg_avg.to_excel(w, sheet_name="MG別_期Q別平均投稿数", index=True)
+        mg_cnt.to_excel(w, sheet_name="MG別_期Q別人数", index=True)
+        detail.to_excel(w, sheet_name="卒業生一覧", index=False)
+
+    report_lines = [
+        "# 期Q別 卒業時平均投稿数比較",
+        "",
+        f"卒業生{len(graduates)}名を卒業月の期Qごとに集計",
+        "",
+        "## 期Q別集計",
+        "",
+        "| 期Q | 対象月 | 卒業生数 | 平均卒業時投稿数 | 中央値 | 最小値 | 最大値 | 前Q比 |",
+        "|-----|--------|---------|-----------------|--------|--------|--------|-------|",
+    ]
+    for _, row in by_quarter.iterrows():
+        if row["卒業生数"] == 0:
+            report_lines.append(f"| {row['期Q']} | {row['Q開始月']}〜{row['Q終了月']} | 0名 | - | - | - | - | - |")
+            continue
+        diff = f"{row['前Q比']:+.2f}" if pd.notna(row["前Q比"]) else "-"
+        report_lines.append(
+            f"| {row['期Q']} | {row['Q開始月']}〜{row['Q終了月']} | {row['卒業生数']}名 | "
+            f"**{row['平均卒業時投稿数']}** | {row['中央値']} | {int(row['最小値'])} | {int(row['最大値'])} | {diff} |"
+        )
+
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## MG別 期Q別 平均卒業時投稿数",
+        "",
+        "| 担当MG | " + " | ".join(mg_avg.columns) + " |",
+        "|--------|" + "|".join("------" for _ in mg_avg.columns) + "|",
+    ])
+    for mg, row in mg_avg.iterrows():
+        cells = []
+        for q in mg_avg.columns:
+            n = mg_cnt.loc[mg, q]
+            cells.append(f"{row[q]}（{n}名）" if n > 0 else "-")
+        report_lines.append(f"| {mg} | " + " | ".join(cells) + " |")
+
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **ファイル**: `コミットプラン (4).xlsx` の「セッション実施状況管理」「新 月次投稿数」シート",
+        "- **卒業の定義**: 6回目実施日がある、または6ヶ月目のデータがある",
+        "- **卒業時投稿数**: 0-6ヶ月目の合計投稿数",
+        "- **卒業月**: 6回目実施日の年月、または初回セッションから6ヶ月後を推定",
+        "- **期Q**: 8月始まり（1Q: 8〜10月、2Q: 11〜1月、3Q: 2〜4月、4Q: 5〜7月）",
+        "",
+        "---",
+        "*出力: 期Q別_卒業時平均投稿数比較.py*",
+    ])
+
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力完了: {OUTPUT_PATH}")
+    print(f"分析結果: {REPORT_PATH}")
+    print(f"\n【期Q別 卒業時平均投稿数（卒業生{len(graduates)}名）】")
+    for _, row in by_quarter.iterrows():
+        if row["卒業生数"] == 0:
+            print(f"  {row['期Q']}: 卒業生なし")
+            continue
+        diff = f"（前Q比 {row['前Q比']:+.2f}）" if pd.notna(row["前Q比"]) else ""
+        print(f"  {row['期Q']}: {row['平均卒業時投稿数']}投稿（{row['卒業生数']}名）{diff}")
+    return by_quarter
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
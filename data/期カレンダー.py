@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+年月 → 期・Q（四半期）を引くための期カレンダー。
+
+【期の定義】8月始まり。2025年8月〜2026年7月＝4期
+- 1Q: 8月〜10月
+- 2Q: 11月〜1月
+- 3Q: 2月〜4月
+- 4Q: 5月〜7月
+
+月ごとの1行を持つカレンダー表（ディメンション）を作り、
+任意の年月の列に対して reindex 1回でまとめて期・Qを付与する。
+"""
+import pandas as pd
+
+# 基準: 2025年8月 = 4期1Q の開始月
+TERM_BASE_MONTH = pd.Period("2025-08", freq="M")
+TERM_BASE_NO = 4
+MONTHS_PER_TERM = 12
+MONTHS_PER_QUARTER = 3
+
+
+def to_month_period(values):
+    """年月（"2025-11" 文字列・日付・Period）を月次 PeriodIndex に変換。変換できない値は NaT"""
+    s = pd.Series(values)
+    if isinstance(s.dtype, pd.PeriodDtype):
+        return pd.PeriodIndex(s, freq="M")
+    dt = pd.to_datetime(s.replace("", None), errors="coerce")
+    return pd.PeriodIndex(dt, freq="M")
+
+
+def build_calendar(start, end):
+    """start〜end の各月について 期・Q・期Q・Q開始月・Q終了月 を持つカレンダー表を返す（index=年月 Period）"""
+    months = pd.period_range(start=start, end=end, freq="M")
+    offset = months.asi8 - TERM_BASE_MONTH.ordinal
+    term = TERM_BASE_NO + offset // MONTHS_PER_TERM
+    q_index = (offset % MONTHS_PER_TERM) // MONTHS_PER_QUARTER
+    q_start = months - (offset % MONTHS_PER_QUARTER)
+    cal = pd.DataFrame({
+        "年月": months.strftime("%Y-%m"),
+        "期": term,
+        "Q": q_index + 1,
+        "Q開始月": q_start.strftime("%Y-%m"),
+        "Q終了月": (q_start + (MONTHS_PER_QUARTER - 1)).strftime("%Y-%m"),
+    }, index=months)
+    cal["期Q"] = cal["期"].astype(str) + "期" + cal["Q"].astype(str) + "Q"
+    # 期Q の並び順（期をまたいでも単調増加する通し番号）
+    cal["期Q_順"] = cal["期"] * 4 + cal["Q"]
+    return cal
+
+
+def assign_term_quarter(values):
+    """年月の列に 期・Q・期Q を一括付与した DataFrame を返す（元の並び順・index を維持）"""
+    idx = values.index if isinstance(values, pd.Series) else pd.RangeIndex(len(values))
+    months = to_month_period(values)
+    valid = months[months.notna()]
+    if len(valid) == 0:
+        cal = build_calendar(TERM_BASE_MONTH, TERM_BASE_MONTH)
+    else:
+        cal = build_calendar(valid.min(), valid.max())
+    out = cal.reindex(months)
+    out.index = idx
+    return out[["期", "Q", "期Q", "期Q_順", "Q開始月", "Q終了月"]]
+
+
+def term_quarter_label(month):
+    """単一の年月の 期Q ラベル（例: "2025-11" → "4期2Q"）"""
+    return assign_term_quarter([month])["期Q"].iloc[0]
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+生徒ごとの特徴量（初速・平均月間投稿数・卒業時投稿数・セッション間隔・担当MG・チーム名など）を
+入力Excelの版ごとに1回だけ計算し、列単位の圧縮ファイルに保存する特徴量ストア。
+
+これまでスクリプトごとに少しずつ違う規則で計算し直していたため、
+分析・スコアリングはここから読むだけにして、定義を1か所にそろえる。
+
+    from 特徴量ストア import FeatureStore
+    features = FeatureStore().load()                       # 最新版
+    features = FeatureStore().load(version="1a2b3c4d5e6f", columns=["生徒ID", "初速"])
+    features, record = load_or_build(as_of="2026-02-05")   # 今の Excel の版・基準日（まだなければ作る）
+
+退会リスクスコア.py・目標カーブ進捗.py・KGI_卒業時投稿数シミュレーション.py・卒業時投稿数予測.py は
+生徒の投稿数・初速・担当MG・チーム名などをここから読む（--version で過去の版も使える）。
+
+【キー】生徒ID（生徒ID名寄せ.py）× 版。コースごとに1行（PP は再登録で複数行ある生徒は行番号が最後の行）
+      生徒ID はコミットno.、PP だけの生徒は保存先の 生徒ID台帳.sqlite（生徒ID名寄せ.py の台帳）の番号なので、
+      行の挿入や版をまたいでも同じ生徒を指す
+【版】コミットプラン・mg_monthly_analysis_results の内容ハッシュ（指標クエリ.snapshot_hash）と、
+      卒業時アンケート・クレーム対応（生徒IDの名寄せに使う。--survey・--claims）の内容ハッシュだけから作る。
+      同じ内容の Excel なら計算し直さない
+【基準日】--as-of で渡す（省略時は今日）。ファイルの更新日時は使わない（コピーしただけで変わるため）。
+      セッション日の上限に使うので、版 × 基準日 ごとに1つ保存する
+
+【特徴量の定義】
+- 0m〜6m         : コミット＝新 月次投稿数 の 0〜6ヶ月目（「ー」・空欄は NaN）、
+                   PP＝k 回目の「前回からの増加投稿数」を k ヶ月目とみなす（0m は 0）
+- 初速           : 0m〜6m で初めて投稿数>0 になった月（コミットは 0〜6、PP は回数と同じ 1〜6）
+- 平均月間投稿数 : コミット＝数値のある 0m〜6m の平均、PP＝合計投稿数 ÷（1回目〜最後のセッションの月数）
+- 卒業時投稿数   : コミット＝卒業生の 0m〜6m 合計（コミットプラン読込.py）、PP＝6回目実施日がある生徒の合計投稿数
+- 初回セッション日: コミット＝セッション実施状況管理 W列（0ヶ月目の基準。コミットプラン読込.load_sessions と同じ）、
+                   PP＝最初のセッション実施日
+- セッション間隔 : 実施済みセッション（基準日より後の予定日は除く）の日付の間隔（日）の平均・最大。
+                   最終セッション日・セッション回数も同じ基準日まで
+- 最終サポート日 : コミットのみ（セッション実施状況管理 S列）
+- 担当MG・チーム名: コミット＝セッション実施状況管理・コミットRawdata、PP＝PP_Rawdata
+
+【保存の仕組み】
+- versions.jsonl : 版一覧（版 × 基準日 で1行。作り直したときはその行を置き換える）。列名と型もここに持つ。
+                   SCHEMA が違う（列の定義が古い）版は作り直す
+- features/<版>_<基準日>.npz : 列ごとの配列（数値は float64、文字は str。欠損は NaN・""）
+- 生徒ID台帳.sqlite : 生徒IDの台帳（生徒ID名寄せ.save_registry）。版を作るたびに書き足す
+"""
+import argparse
+import datetime as dt
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import PP_Rawdata読込
+import コミットプラン読込
+import 生徒ID名寄せ
+from コミットプラン読込 import MONTH_LABELS
+from アンケート読込 import CLAIM_PATH, SURVEY_PATH
+from スナップショット保存 import file_sha256
+from 分析DB import MG_RESULTS_PATH
+from 指標クエリ import snapshot_hash
+
+STORE_DIR = Path(__file__).parent / "特徴量ストア"
+SCHEMA = 4  # FEATURE_COLUMNS・定義を変えたら上げる
+
+FEATURE_COLUMNS = [
+    "生徒ID", "コース", "ソースキー", "生徒名", "担当MG", "チーム名", "在学",
+    "初回セッション日", "最終セッション日", "最終サポート日", "セッション回数", "平均セッション間隔日", "最大セッション間隔日",
+] + MONTH_LABELS + [
+    "初速", "平均月間投稿数", "記録月数", "卒業", "卒業月", "卒業時投稿数",
+]
+TEXT_COLUMNS = {"コース", "ソースキー", "生徒名", "担当MG", "チーム名", "在学",
+                "初回セッション日", "最終セッション日", "最終サポート日", "卒業月"}
+
+
+def session_gap_stats(dates, as_of=None):
+    """生徒 × 回 の日付（datetime64、NaT可）→ 回数・間隔の平均・最大（日）・最初・最後。
+    as_of より後の日付（予定として入っているもの）は除く"""
+    values = np.asarray(dates, dtype="datetime64[ns]").copy()
+    if as_of is not None:
+        values[values > np.datetime64(pd.Timestamp(as_of), "ns")] = np.datetime64("NaT")
+    values = np.sort(values, axis=1)  # NaT は末尾へ
+    days = values.astype("datetime64[D]").astype("float64")
+    days[np.isnat(values)] = np.nan
+    gaps = np.diff(days, axis=1)
+    has_gap = ~np.isnan(gaps)
+    n_gaps = has_gap.sum(axis=1)
+    mean_gap = np.where(n_gaps > 0, np.where(has_gap, gaps, 0).sum(axis=1) / np.maximum(n_gaps, 1), np.nan)
+    max_gap = np.where(n_gaps > 0, np.where(has_gap, gaps, -np.inf).max(axis=1, initial=-np.inf), np.nan)
+    count = (~np.isnat(values)).sum(axis=1)
+    first = pd.Series(values[:, 0]) if values.shape[1] else pd.Series(pd.NaT, index=range(len(values)))
+    last = pd.Series(values[np.arange(len(values)), np.maximum(count - 1, 0)])
+    return count, mean_gap, max_gap, first, last
+
+
+def first_positive(matrix):
+    """各行で初めて 0 より大きくなった列番号（なければ NaN）"""
+    positive = np.nan_to_num(matrix) > 0
+    return np.where(positive.any(axis=1), positive.argmax(axis=1), np.nan)
+
+
+def date_text(s):
+    return pd.to_datetime(s).dt.strftime("%Y-%m-%d").fillna("")
+
+
+def commit_features(df_sess, df_month, commit_raw, as_of=None):
+    """コミットの生徒（新 月次投稿数の no.）ごとの特徴量"""
+    month = コミットプラン読込.load_monthly(df_month)
+    sess = コミットプラン読込.load_sessions(df_sess)
+    dates = コミットプラン読込.load_session_dates(df_sess)
+    graduates = コミットプラン読込.load_graduates(df_sess=df_sess, df_month=df_month).set_index("no.")
+    teams = pd.DataFrame({
+        "no.": コミットプラン読込.to_no_series(commit_raw["no."]),
+        "チーム名": PP_Rawdata読込.clean_text(commit_raw["チーム名"]),
+    }).dropna(subset=["no."]).drop_duplicates("no.", keep="last")
+    teams = teams.set_index(teams["no."].astype(int))["チーム名"]
+
+    df = month.join(sess[["担当MG", "初回セッション日"]], on="no.", how="left").join(dates, on="no.", how="left")
+    posts = df[MONTH_LABELS].to_numpy(dtype=float)
+    recorded = (~np.isnan(posts)).sum(axis=1)
+    session_cols = [c for c in dates.columns if c != "最終サポート日"]
+    count, mean_gap, max_gap, _, last = session_gap_stats(
+        df[session_cols].to_numpy(dtype="datetime64[ns]"), as_of)
+    no_ = df["no."]
+    out = pd.DataFrame({
+        "コース": "コミット",
+        "ソースキー": no_.astype(str).to_numpy(),
+        "生徒名": df["生徒名"].astype(str).str.strip().to_numpy(),
+        "担当MG": df["担当MG"].fillna("").to_numpy(),
+        "チーム名": no_.map(teams).fillna("").to_numpy(),
+        "在学": df["在学"].fillna("").astype(str).str.strip().to_numpy(),
+        "初回セッション日": date_text(df["初回セッション日"]).to_numpy(),
+        "最終セッション日": date_text(last).to_numpy(),
+        "最終サポート日": date_text(df["最終サポート日"]).to_numpy(),
+        "セッション回数": count,
+        "平均セッション間隔日": mean_gap,
+        "最大セッション間隔日": max_gap,
+    })
+    for k, label in enumerate(MONTH_LABELS):
+        out[label] = posts[:, k]
+    out["初速"] = first_positive(posts)
+    out["平均月間投稿数"] = np.where(recorded > 0, np.nansum(posts, axis=1) / np.maximum(recorded, 1), np.nan)
+    out["記録月数"] = recorded
+    out["卒業"] = no_.isin(graduates.index).to_numpy(dtype=float)
+    out["卒業月"] = no_.map(graduates["卒業月"]).fillna("").to_numpy()
+    out["卒業時投稿数"] = no_.map(graduates["卒業時投稿数"]).to_numpy(dtype=float)
+    return out
+
+
+def pp_features(pp_raw, as_of=None):
+    """PP の生徒（PP_Rawdata の行番号）ごとの特徴量"""
+    pp = PP_Rawdata読込.load_pp_rawdata(df=pp_raw)
+    dates = pp[PP_Rawdata読込.SESSION_COLS].to_numpy(dtype="datetime64[ns]")
+    incr = pp[PP_Rawdata読込.INCR_COLS].to_numpy(dtype=float)
+    posts = np.column_stack([np.zeros(len(pp)), incr])  # k 回目 → k ヶ月目、0m は 0
+    count, mean_gap, max_gap, first, last = session_gap_stats(dates, as_of)
+    span = ((last.dt.year - first.dt.year) * 12 + (last.dt.month - first.dt.month) + 1).to_numpy(dtype=float)
+    total = pp["合計投稿数"].to_numpy(dtype=float)
+    graduated = pp["6回目実施日"].notna().to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        monthly = np.where(count > 0, total / span, np.nan)
+    out = pd.DataFrame({
+        "コース": "プレミアムプラス",
+        "ソースキー": pp["行番号"].astype(str).to_numpy(),
+        "生徒名": pp["名前"].astype(str).to_numpy(),
+        "担当MG": pp["担当MG"].fillna("").to_numpy(),
+        "チーム名": pp["チーム名"].fillna("").to_numpy(),
+        "在学": pp["ステータス"].fillna("").astype(str).str.strip().to_numpy(),
+        "初回セッション日": date_text(first).to_numpy(),
+        "最終セッション日": date_text(last).to_numpy(),
+        "最終サポート日": "",
+        "セッション回数": count,
+        "平均セッション間隔日": mean_gap,
+        "最大セッション間隔日": max_gap,
+    })
+    for k, label in enumerate(MONTH_LABELS):
+        out[label] = posts[:, k]
+    out["初速"] = first_positive(posts)
+    out["平均月間投稿数"] = monthly
+    out["記録月数"] = np.where(count > 0, span, 0)
+    out["卒業"] = graduated.astype(float)
+    out["卒業月"] = date_text(pp["6回目実施日"]).str[:7].to_numpy()
+    out["卒業時投稿数"] = np.where(graduated, total, np.nan)
+    return out
+
+
+def input_hash(commit_path, mg_results_path, survey_path=SURVEY_PATH, claim_path=CLAIM_PATH):
+    """入力の内容ハッシュ（アンケート・クレームはファイルがなければ「なし」）"""
+    parts = [snapshot_hash(str(commit_path), str(mg_results_path))]
+    parts += [file_sha256(path)[:16] if Path(path).exists() else "なし" for path in (survey_path, claim_path)]
+    return "-".join(parts)
+
+
+def compute_features(commit_path=None, mg_results_path=None, as_of=None, survey_path=SURVEY_PATH,
+                     claim_path=CLAIM_PATH, registry_path=None):
+    """全生徒の特徴量（FEATURE_COLUMNS の順）。as_of はセッション日の上限（既定: なし）。
+    registry_path は生徒IDの台帳（振ったIDを書き足す。省略時は台帳なしで振る）"""
+    commit_path = commit_path or コミットプラン読込.INPUT_PATH
+    mg_results_path = mg_results_path or MG_RESULTS_PATH
+    df_sess = pd.read_excel(commit_path, sheet_name=コミットプラン読込.SESS_SHEET, header=None)
+    df_month = pd.read_excel(commit_path, sheet_name=コミットプラン読込.MONTH_SHEET, header=None)
+    commit_raw = pd.read_excel(mg_results_path, sheet_name="コミットRawdata", header=0)
+    pp_raw = pd.read_excel(mg_results_path, sheet_name=PP_Rawdata読込.SHEET, header=PP_Rawdata読込.HEADER_ROW)
+
+    records = 生徒ID名寄せ.load_records(commit_path, mg_results_path, survey_path, claim_path,
+                                    df_sess=df_sess, df_month=df_month, commit_raw=commit_raw, pp_raw=pp_raw)
+    registry = 生徒ID名寄せ.load_registry(registry_path) if registry_path else None
+    mapping, _, _ = 生徒ID名寄せ.resolve(records, registry)
+    if registry_path:
+        生徒ID名寄せ.save_registry(mapping, registry_path)
+    commit = 生徒ID名寄せ.attach_student_id(
+        commit_features(df_sess, df_month, commit_raw, as_of), mapping, "新 月次投稿数", "ソースキー")
+    pp = 生徒ID名寄せ.attach_student_id(pp_features(pp_raw, as_of), mapping, "PP_Rawdata", "ソースキー")
+    # PP は同じ生徒の再登録行があるため、生徒IDごとに最後の行だけ残す
+    pp = pp.assign(_row=pp["ソースキー"].astype(int)).sort_values("_row")
+    pp = pp[pp["生徒ID"].isna() | ~pp.duplicated("生徒ID", keep="last")].drop(columns="_row")
+
+    df = pd.concat([commit, pp], ignore_index=True)[FEATURE_COLUMNS]
+    return df.sort_values(["生徒ID", "コース"], na_position="last").reset_index(drop=True)
+
+
+class FeatureStore:
+    """版ごとの特徴量を保存・読み出しする"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.catalog_path = self.root / "versions.jsonl"
+        self.features_dir = self.root / "features"
+        self.registry_path = self.root / "生徒ID台帳.sqlite"
+
+    def records(self):
+        if not self.catalog_path.exists():
+            return []
+        with open(self.catalog_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def versions(self):
+        """版一覧（作成順）"""
+        rows = [{"版": r["version"], "基準日": r["基準日"], "作成日時": r["created_at"], "行数": r["rows"],
+                 "入力ハッシュ": r["inputs"]} for r in self.records()]
+        return pd.DataFrame(rows, columns=["版", "基準日", "作成日時", "行数", "入力ハッシュ"])
+
+    def resolve(self, version=None, as_of=None):
+        """版・基準日 → 保存済みの情報。version 省略時は最新、as_of 省略時（または保存がない日）はその版の最後に作ったもの"""
+        records = self.records()
+        if not records:
+            raise SystemExit(f"特徴量がありません（先に build）: {self.root}")
+        if version is not None:
+            records = [r for r in records if r["version"] == version]
+            if not records:
+                raise SystemExit(f"版が見つかりません: {version}")
+        else:
+            records = [r for r in records if r["version"] == records[-1]["version"]]
+        if as_of is not None:
+            day = f"{pd.Timestamp(as_of):%Y-%m-%d}"
+            records = [r for r in records if r["基準日"] == day] or records
+        return records[-1]
+
+    def build(self, commit_path=None, mg_results_path=None, as_of=None, force=False, survey_path=SURVEY_PATH,
+              claim_path=CLAIM_PATH):
+        """入力Excelの版・基準日の特徴量を作る。保存済みなら計算しない（force=True で作り直し）。
+        as_of はセッション日の上限（省略時は今日）"""
+        commit_path = Path(commit_path or コミットプラン読込.INPUT_PATH)
+        mg_results_path = Path(mg_results_path or MG_RESULTS_PATH)
+        inputs = input_hash(commit_path, mg_results_path, survey_path, claim_path)
+        version = hashlib.sha256(inputs.encode()).hexdigest()[:12]
+        as_of = pd.Timestamp(as_of if as_of is not None else dt.date.today()).normalize()
+        day = f"{as_of:%Y-%m-%d}"
+        if not force:
+            for r in self.records():
+                if r["version"] == version and r["基準日"] == day and r.get("schema") == SCHEMA:
+                    return r, False
+
+        df = compute_features(commit_path, mg_results_path, as_of, survey_path, claim_path, self.registry_path)
+        arrays, kinds = {}, {}
+        for i, col in enumerate(df.columns):
+            if col in TEXT_COLUMNS:
+                arrays[f"c{i}"] = df[col].fillna("").astype(str).to_numpy(dtype=str)
+                kinds[col] = "text"
+            else:
+                arrays[f"c{i}"] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64")
+                kinds[col] = "number"
+        self.features_dir.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(self.features_dir / f"{version}_{as_of:%Y%m%d}.npz", **arrays)
+        record = {
+            "version": version,
+            "schema": SCHEMA,
+            "基準日": day,
+            "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+            "inputs": inputs,
+            "files": [commit_path.name, mg_results_path.name],
+            "columns": list(df.columns),
+            "kinds": kinds,
+            "rows": len(df),
+        }
+        # 同じ版・基準日の行は置き換える（作り直し・SCHEMA の更新で行が重複しないように）
+        records = [r for r in self.records() if (r["version"], r["基準日"]) != (version, day)] + [record]
+        tmp = self.catalog_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        tmp.replace(self.catalog_path)
+        return record, True
+
+    def load(self, version=None, columns=None, as_of=None):
+        """版の特徴量を DataFrame で返す（version 省略時は最新版、as_of で基準日、columns で列を絞れる）"""
+        record = self.resolve(version, as_of)
+        wanted = columns or record["columns"]
+        unknown = [c for c in wanted if c not in record["columns"]]
+        if unknown:
+            raise KeyError(f"{record['version']} にない列: {unknown}")
+        out = {}
+        with np.load(self.features_dir / f"{record['version']}_{record['基準日'].replace('-', '')}.npz") as data:
+            for col in wanted:
+                values = data[f"c{record['columns'].index(col)}"]
+                if record["kinds"][col] == "text":
+                    out[col] = pd.Series(values, dtype=object).replace("", None)
+                else:
+                    out[col] = pd.Series(values)
+        df = pd.DataFrame(out)
+        if "生徒ID" in df:
+            df["生徒ID"] = df["生徒ID"].astype("Int64")
+        return df
+
+
+def course_frame(features, course="コミット"):
+    """load の結果 → そのコースの行（ソースキーは no.・行番号の整数、日付は Timestamp、文字の欠損は ""）"""
+    df = features[features["コース"] == course].copy()
+    df["ソースキー"] = df["ソースキー"].astype(int)
+    for col in ("初回セッション日", "最終セッション日", "最終サポート日"):
+        df[col] = pd.to_datetime(df[col])
+    for col in ("生徒名", "担当MG", "チーム名", "在学"):
+        df[col] = df[col].fillna("")
+    return df.reset_index(drop=True)
+
+
+def load_or_build(version=None, commit_path=None, mg_results_path=None, store_dir=STORE_DIR, columns=None,
+                  as_of=None, survey_path=SURVEY_PATH, claim_path=CLAIM_PATH):
+    """version の特徴量。version 省略時は今の Excel の版・基準日 as_of（保存されていなければここで作る）
+    → (DataFrame, 版の情報)"""
+    store = FeatureStore(store_dir)
+    if version:
+        record = store.resolve(version, as_of)
+    else:
+        record = store.build(commit_path, mg_results_path, as_of, survey_path=survey_path, claim_path=claim_path)[0]
+    return store.load(record["version"], columns, record["基準日"]), record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生徒ごとの特徴量を版ごとに保存する")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="保存先フォルダ")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="今の Excel の特徴量を作る")
+    p_build.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    p_build.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    p_build.add_argument("--survey", type=Path, default=SURVEY_PATH, help="卒業時アンケートの xlsx（名寄せに使う）")
+    p_build.add_argument("--claims", type=Path, default=CLAIM_PATH, help="クレーム対応の xlsx（名寄せに使う）")
+    p_build.add_argument("--as-of", default=None, help="基準日。これより後のセッション日は予定とみなす（既定: 今日）")
+    p_build.add_argument("--force", action="store_true", help="同じ版でも作り直す")
+
+    sub.add_parser("list", help="版の一覧")
+
+    p_show = sub.add_parser("show", help="版の特徴量を表示・出力")
+    p_show.add_argument("--version", default=None, help="版（既定: 最新）")
+    p_show.add_argument("--as-of", default=None, help="基準日（既定: その版で最後に作ったもの）")
+    p_show.add_argument("--columns", nargs="*", default=None)
+    p_show.add_argument("--xlsx", type=Path, default=None, help="Excel に出力")
+    args = parser.parse_args(argv)
+
+    store = FeatureStore(args.store)
+    if args.command == "build":
+        record, created = store.build(args.commit_plan, args.mg_results, args.as_of, force=args.force,
+                                      survey_path=args.survey, claim_path=args.claims)
+        print(f"{'作成' if created else '作成済み'}: {record['version']}（基準日 {record['基準日']}・{record['rows']}行）")
+        return
+    if args.command == "list":
+        print(store.versions().to_string(index=False))
+        return
+
+    df = store.load(args.version, args.columns, args.as_of)
+    if args.xlsx:
+        df.to_excel(args.xlsx, index=False)
+        print(f"出力: {args.xlsx}")
+    else:
+        print(df.to_string(index=False, max_rows=40))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
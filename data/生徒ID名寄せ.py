@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+シートごとにばらばらの生徒レコードを名寄せし、全ソース共通の整数の生徒IDを振る。
+
+【ソース】（: の後はソースキー）
+- セッション実施状況管理・新 月次投稿数（コミットプラン (4).xlsx）: no.
+- コミットRawdata（mg_monthly_analysis_results）: 行番号（no. はコミットプランの no. と同じ番号）
+- PP_Rawdata: 行番号
+- 卒業時アンケート（SnsClub卒業時アンケート（回答） (1).xlsx の「アンケート回答」）: 回答の順番。名前のみで突き合わせる
+- クレーム対応（クレーム対応 (1).xlsx）: 行番号（No. が空の続きの行があるため）。
+  名前の列がないため、生徒の文面の「〇〇と申します」から名前を取り出す
+
+【名寄せの手順】
+1. 同じ no.（コミット）の行は同一人物としてつなぐ
+2. 正規化した名前（名前正規化.py: NFKC・カナ統一・括弧除去・空白除去）をブロッキングキーにして、同じキーのレコードだけを比べる
+   （全ペア比較ではなく、キーごとのまとまりの中だけ＝ほぼ線形）
+3. 同じキーの中に別々の no. の生徒が複数いる場合は同名の別人の可能性があるため、
+   そのキーでは名前によるつなぎ込みをせず「衝突」として出力する
+   （PP_Rawdata は同じ生徒が再登録で複数行になるため、行番号が違っても同名ならつなぐ）
+4. 表記ゆれの候補（先頭2文字が同じで似ている名前）は自動ではつながず「名寄せ候補」として出力する
+
+【生徒ID】つながったレコードのまとまりごとに、次の順で最初に当てはまるもの
+- コミットno. があれば最小の no.
+- なければ台帳（生徒ID台帳）にあるID。台帳のキーはレコードごとに「no.<コミットno.>」か
+  「ソース|正規化名|同じソース・同じ名前の中で何件目か」で、行番号は使わない（行が挿入されても変わらない）
+- どちらもなければ NEW_ID_BASE より大きい、台帳・今回のどのIDよりも大きい番号を新しく振る
+振ったIDは台帳に書き足す（消えた生徒のキーも残すので、戻ってきたときは同じIDになる）。
+名寄せの結果が変わった生徒（PP だけだった生徒にコミットの行がつながったなど）は、その生徒のIDだけが変わる
+台帳: 分析DB.sqlite の「生徒ID台帳」（--db）。特徴量ストアは保存先フォルダの 生徒ID台帳.sqlite を使う
+
+【確かめ方】--verify: PP_Rawdata・コミットRawdata の先頭に1行足して名寄せし直し、
+元からいたレコードの生徒IDが1件も変わらないこと・足した行に新しいIDが振られることを確かめる
+"""
+import argparse
+import difflib
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import PP_Rawdata読込
+import アンケート読込
+import コミットプラン読込
+from アンケート読込 import CLAIM_COL_STUDENT, CLAIM_PATH, SURVEY_COL_NAME, SURVEY_PATH, claim_names
+from 分析DB import DB_PATH, MG_RESULTS_PATH
+from 名前正規化 import normalize_names
+
+BASE = Path(__file__).parent
+OUTPUT_PATH = BASE / "生徒ID名寄せ結果.xlsx"
+ID_TABLE = "生徒ID対応"
+REGISTRY_TABLE = "生徒ID台帳"
+
+# 同じ値なら同一人物、違えば別人とみなすキー
+PERSON_KEY = "コミットno."
+CONFLICT_COLUMNS = ["正規化名", "レコード数", "コミットno.", "PP行番号", "ソース"]
+SIMILARITY_THRESHOLD = 0.85
+NEW_ID_BASE = 1_000_000  # コミットno. のない生徒にはこれより大きい番号を振る（no. と重ならないように）
+VERIFY_NAME = "確認用 追加生徒"  # --verify で先頭に足す行の名前
+MIN_NAME_LENGTH = 2
+
+
+def records_frame(source, keys, names, commit_no=None, pp_row=None):
+    n = len(keys)
+    df = pd.DataFrame({
+        "ソース": source,
+        "ソースキー": pd.Series(keys).astype(str).to_numpy(),
+        "名前": pd.Series(names, dtype="string").to_numpy(),
+        "コミットno.": pd.Series(commit_no if commit_no is not None else [pd.NA] * n, dtype="Int64").to_numpy(),
+        "PP行番号": pd.Series(pp_row if pp_row is not None else [pd.NA] * n, dtype="Int64").to_numpy(),
+    })
+    df["正規化名"] = normalize_names(df["名前"]).to_numpy()
+    return df[df["正規化名"].str.len() >= MIN_NAME_LENGTH]
+
+
+def load_records(commit_path=None, mg_results_path=None, survey_path=SURVEY_PATH, claim_path=CLAIM_PATH,
+                 df_sess=None, df_month=None, commit_raw=None, pp_raw=None):
+    """全ソースのレコード（ソース・ソースキー・名前・コミットno.・PP行番号・正規化名）。
+    df_sess・df_month・commit_raw・pp_raw を渡せば、そのシートは読み直さない"""
+    commit_path = commit_path or コミットプラン読込.INPUT_PATH
+    mg_results_path = mg_results_path or MG_RESULTS_PATH
+    if df_sess is None:
+        df_sess = pd.read_excel(commit_path, sheet_name=コミットプラン読込.SESS_SHEET, header=None)
+    if df_month is None:
+        df_month = pd.read_excel(commit_path, sheet_name=コミットプラン読込.MONTH_SHEET, header=None)
+    if commit_raw is None:
+        commit_raw = pd.read_excel(mg_results_path, sheet_name="コミットRawdata", header=0)
+    sess = コミットプラン読込.load_sessions(df_sess).reset_index()
+    month = コミットプラン読込.load_monthly(df_month)
+    commit_raw = commit_raw[commit_raw["生徒名"].notna()]
+    commit_raw_no = コミットプラン読込.to_num_series(commit_raw["no."])
+    pp = PP_Rawdata読込.load_pp_rawdata(mg_results_path, df=pp_raw)
+
+    frames = [
+        records_frame("セッション実施状況管理", sess["no."], sess["セッション生徒名"], commit_no=sess["no."]),
+        records_frame("新 月次投稿数", month["no."], month["生徒名"], commit_no=month["no."]),
+        records_frame("コミットRawdata", commit_raw.index + 2, commit_raw["生徒名"], commit_no=commit_raw_no),
+        records_frame("PP_Rawdata", pp["行番号"], pp["名前"], pp_row=pp["行番号"]),
+    ]
+    if Path(survey_path).exists():
+        survey = アンケート読込.load_survey(survey_path)
+        names = survey[SURVEY_COL_NAME].astype("string")
+        names = names.mask(names.str.contains("名前", na=False))
+        frames.append(records_frame("卒業時アンケート", survey.index + 1, names))
+    if Path(claim_path).exists():
+        claim = アンケート読込.load_claims(claim_path)
+        frames.append(records_frame("クレーム対応", claim.index + 1, claim_names(claim[CLAIM_COL_STUDENT])))
+    return pd.concat(frames, ignore_index=True)
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+    def roots(self):
+        return np.array([self.find(i) for i in range(len(self.parent))])
+
+
+def link_by_key(uf, records, column):
+    """同じキー（no.・行番号）のレコードをつなぐ"""
+    keyed = records[column].notna().to_numpy()
+    idx = np.flatnonzero(keyed)
+    values = records[column].to_numpy()[keyed]
+    order = np.argsort(values, kind="stable")
+    idx, values = idx[order], values[order]
+    same = values[1:] == values[:-1]
+    for a, b in zip(idx[:-1][same], idx[1:][same]):
+        uf.union(a, b)
+
+
+def registry_keys(records):
+    """レコード → 台帳のキー（no.<コミットno.>、なければ ソース|正規化名|同じソース・名前の中で何件目か）"""
+    nth = records.groupby(["ソース", "正規化名"]).cumcount().astype(str)
+    by_name = records["ソース"] + "|" + records["正規化名"] + "|" + nth
+    no_ = records["コミットno."]
+    return pd.Series(np.where(no_.isna(), by_name, "no." + no_.astype("string").fillna("")), index=records.index)
+
+
+def assign_ids(records, roots, registry=None):
+    """まとまり（roots）ごとの生徒ID: コミットno. の最小値、なければ台帳のID、どちらもなければ新しい番号"""
+    registry = registry if registry is not None else pd.Series(dtype="int64")
+    groups = pd.DataFrame({
+        "root": roots,
+        "no.": records["コミットno."].astype("Float64").to_numpy(),
+        "台帳": records["台帳キー"].map(registry).astype("Float64").to_numpy(),
+    })
+    ids = groups.groupby("root", sort=False)["no."].min()
+    used = set(ids.dropna().astype(np.int64))
+    next_id = max([NEW_ID_BASE, *registry.astype(np.int64), *used]) + 1
+    # 台帳のIDは、コミットの no. でなく、今回まだ使っていないものだけ引き継ぐ（分かれたまとまりは2つ目から新しい番号）
+    for root, known in groups[groups["root"].map(ids).isna()].groupby("root", sort=False)["台帳"]:
+        reusable = sorted(int(v) for v in known.dropna().unique() if v > NEW_ID_BASE and int(v) not in used)
+        if reusable:
+            ids[root] = reusable[0]
+        else:
+            ids[root], next_id = next_id, next_id + 1
+        used.add(int(ids[root]))
+    return ids.reindex(roots).astype(np.int64).to_numpy()
+
+
+def load_registry(db_path=DB_PATH):
+    """台帳 → 台帳キー → 生徒ID（まだなければ空）"""
+    if not Path(db_path).exists():
+        return pd.Series(dtype="int64")
+    con = sqlite3.connect(str(db_path))
+    try:
+        exists = con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (REGISTRY_TABLE,)).fetchone()
+        if not exists:
+            return pd.Series(dtype="int64")
+        df = pd.read_sql(f'SELECT "台帳キー", "生徒ID" FROM "{REGISTRY_TABLE}"', con)
+    finally:
+        con.close()
+    return df.set_index("台帳キー")["生徒ID"].astype("int64")
+
+
+def save_registry(mapping, db_path=DB_PATH):
+    """resolve の結果の 台帳キー → 生徒ID を台帳に書き足す（今回ないキーも消さずに残す）"""
+    old = load_registry(db_path)
+    new = mapping.drop_duplicates("台帳キー").set_index("台帳キー")["生徒ID"].astype("int64")
+    merged = pd.concat([old[~old.index.isin(new.index)], new]).rename("生徒ID").rename_axis("台帳キー")
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(db_path))
+    try:
+        merged.reset_index().to_sql(REGISTRY_TABLE, con, if_exists="replace", index=False)
+        con.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "idx_{REGISTRY_TABLE}_台帳キー" ON "{REGISTRY_TABLE}" ("台帳キー")')
+        con.commit()
+    finally:
+        con.close()
+
+
+def resolve(records, registry=None):
+    """
+    レコードに生徒IDを振る（registry は load_registry の台帳。省略時は空の台帳から振る）。
+    戻り値: (records に「台帳キー」「生徒ID」列を足した表, 衝突した名前キーの一覧, 名寄せ候補)
+    """
+    records = records.reset_index(drop=True)
+    uf = UnionFind(len(records))
+    link_by_key(uf, records, PERSON_KEY)
+
+    # 正規化名のブロックごとに、no. が1つに定まる場合だけつなぐ
+    conflicts = []
+    distinct = records.groupby("正規化名")[PERSON_KEY].nunique()
+    ambiguous = distinct[distinct > 1]
+    for name, idx in records.groupby("正規化名").indices.items():
+        if name in ambiguous.index:
+            block = records.iloc[idx]
+            conflicts.append({
+                "正規化名": name,
+                "レコード数": len(idx),
+                "コミットno.": ", ".join(str(v) for v in sorted(block["コミットno."].dropna().unique())),
+                "PP行番号": ", ".join(str(v) for v in sorted(block["PP行番号"].dropna().unique())),
+                "ソース": ", ".join(sorted(block["ソース"].unique())),
+            })
+            continue
+        for i in idx[1:]:
+            uf.union(idx[0], i)
+
+    records["台帳キー"] = registry_keys(records)
+    records["生徒ID"] = assign_ids(records, uf.roots(), registry)
+
+    return records, pd.DataFrame(conflicts, columns=CONFLICT_COLUMNS), similar_name_candidates(records)
+
+
+def similar_name_candidates(records, threshold=SIMILARITY_THRESHOLD):
+    """先頭2文字が同じブロックの中で、別IDなのに名前が似ている組（自動ではつながない）"""
+    names = records.drop_duplicates("正規化名")[["正規化名", "生徒ID"]]
+    names = names.assign(ブロック=names["正規化名"].str[:2])
+    rows = []
+    for _, block in names.groupby("ブロック"):
+        if len(block) < 2:
+            continue
+        values = block[["正規化名", "生徒ID"]].to_numpy()
+        for i in range(len(values)):
+            for j in range(i + 1, len(values)):
+                (a, id_a), (b, id_b) = values[i], values[j]
+                if id_a == id_b:
+                    continue
+                ratio = difflib.SequenceMatcher(None, a, b).ratio()
+                if ratio >= threshold:
+                    rows.append({"名前A": a, "生徒ID_A": id_a, "名前B": b, "生徒ID_B": id_b, "類似度": round(ratio, 3)})
+    return pd.DataFrame(rows, columns=["名前A", "生徒ID_A", "名前B", "生徒ID_B", "類似度"])
+
+
+def student_table(records):
+    """生徒ID一覧（代表名・ソース別レコード数・コミットno.・PP行番号）"""
+    counts = pd.crosstab(records["生徒ID"], records["ソース"])
+    first = records.groupby("生徒ID").agg(
+        代表名=("名前", "first"),
+        コミットno=("コミットno.", "min"),
+        PP行番号=("PP行番号", "min"),
+        ソース数=("ソース", "nunique"),
+    ).rename(columns={"コミットno": "コミットno."})
+    return first.join(counts).reset_index()
+
+
+def attach_student_id(df, mapping, source, key_col):
+    """任意の表に生徒ID列を付ける（mapping は resolve の結果、key_col はそのソースのキー列）"""
+    m = mapping[mapping["ソース"] == source][["ソースキー", "生徒ID"]]
+    keys = df[key_col].astype(str)
+    return df.assign(生徒ID=keys.map(m.drop_duplicates("ソースキー").set_index("ソースキー")["生徒ID"]).astype("Int64"))
+
+
+def prepend_row(df, name_col, name):
+    """先頭に name の行を1行足す（ほかの列は空。後ろの行は行番号が1つずれる）"""
+    row = pd.DataFrame({col: [name if col == name_col else None] for col in df.columns})
+    return pd.concat([row, df], ignore_index=True)
+
+
+def verify(commit_path=None, mg_results_path=None, survey_path=SURVEY_PATH, claim_path=CLAIM_PATH):
+    """PP_Rawdata・コミットRawdata の先頭に1行足して台帳つきで名寄せし直し、元のレコードのIDが変わらないか確かめる
+    → ソースごとの レコード数・IDが変わった件数・一致（足した行は「追加した行」）"""
+    commit_path = commit_path or コミットプラン読込.INPUT_PATH
+    mg_results_path = mg_results_path or MG_RESULTS_PATH
+    frames = {
+        "df_sess": pd.read_excel(commit_path, sheet_name=コミットプラン読込.SESS_SHEET, header=None),
+        "df_month": pd.read_excel(commit_path, sheet_name=コミットプラン読込.MONTH_SHEET, header=None),
+        "commit_raw": pd.read_excel(mg_results_path, sheet_name="コミットRawdata", header=0),
+        "pp_raw": pd.read_excel(mg_results_path, sheet_name=PP_Rawdata読込.SHEET, header=PP_Rawdata読込.HEADER_ROW),
+    }
+    before, _, _ = resolve(load_records(commit_path, mg_results_path, survey_path, claim_path, **frames))
+    registry = before.drop_duplicates("台帳キー").set_index("台帳キー")["生徒ID"]
+
+    frames["commit_raw"] = prepend_row(frames["commit_raw"], "生徒名", VERIFY_NAME)
+    frames["pp_raw"] = prepend_row(frames["pp_raw"], "名前", VERIFY_NAME)
+    after, _, _ = resolve(load_records(commit_path, mg_results_path, survey_path, claim_path, **frames), registry)
+
+    # 行番号がキーのソースは、足した行の分だけずらして元のレコードと突き合わせる
+    shifted = before["ソース"].isin(["PP_Rawdata", "コミットRawdata"])
+    keys = before["ソースキー"].where(~shifted, (before["ソースキー"].astype(int) + 1).astype(str))
+    expected = before.assign(ソースキー=keys).set_index(["ソース", "ソースキー"])["生徒ID"]
+    got = after.drop_duplicates(["ソース", "ソースキー"]).set_index(["ソース", "ソースキー"])["生徒ID"]
+    changed = expected.ne(got.reindex(expected.index))
+    rows = [{"ソース": source, "レコード数": int(len(flags)), "IDが変わった件数": int(flags.sum()), "一致": not flags.any()}
+            for source, flags in changed.groupby(level="ソース")]
+    added = after[after["名前"] == VERIFY_NAME]["生徒ID"]
+    rows.append({"ソース": "追加した行", "レコード数": len(added), "IDが変わった件数": 0,
+                 "一致": bool(len(added)) and bool((added > before["生徒ID"].max()).all()) and added.nunique() == 1})
+    return pd.DataFrame(rows, columns=["ソース", "レコード数", "IDが変わった件数", "一致"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="シートごとの生徒レコードを名寄せし、共通の生徒IDを振る")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--survey", type=Path, default=SURVEY_PATH, help="卒業時アンケートの xlsx")
+    parser.add_argument("--claims", type=Path, default=CLAIM_PATH, help="クレーム対応の xlsx")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="台帳・生徒ID対応を置く分析DB")
+    parser.add_argument("--xlsx", type=Path, default=OUTPUT_PATH, help="名寄せ結果（--verify では確認結果）の Excel")
+    parser.add_argument("--verify", action="store_true",
+                        help="--db は使わず、行を挿入して名寄せし直しても元の生徒のIDが変わらないか確かめる")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        checked = verify(args.commit_plan, args.mg_results, args.survey, args.claims)
+        print(f"【生徒ID名寄せの確認】不一致 {int((~checked['一致']).sum())}件")
+        for _, row in checked.iterrows():
+            print(f"  {row['ソース']}: {'一致' if row['一致'] else '不一致'}（{row['レコード数']}件・"
+                  f"IDが変わった {row['IDが変わった件数']}件）")
+        args.xlsx.parent.mkdir(parents=True, exist_ok=True)
+        checked.to_excel(args.xlsx, index=False)
+        print(f"出力: {args.xlsx}")
+        if not checked["一致"].all():
+            raise SystemExit(1)
+        return checked
+
+    records = load_records(args.commit_plan, args.mg_results, args.survey, args.claims)
+    mapping, conflicts, candidates = resolve(records, load_registry(args.db))
+    save_registry(mapping, args.db)
+    students = student_table(mapping)
+
+    by_source = mapping.groupby("ソース").agg(レコード数=("生徒ID", "size"), 生徒数=("生徒ID", "nunique"))
+    multi = students[students["ソース数"] >= 2]
+
+    with pd.ExcelWriter(args.xlsx, engine="openpyxl") as w:
+        by_source.reset_index().to_excel(w, sheet_name="ソース別", index=False)
+        students.to_excel(w, sheet_name="生徒ID一覧", index=False)
+        mapping.to_excel(w, sheet_name="生徒ID対応", index=False)
+        conflicts.to_excel(w, sheet_name="衝突", index=False)
+        candidates.to_excel(w, sheet_name="名寄せ候補", index=False)
+
+    con = sqlite3.connect(str(args.db))
+    try:
+        mapping.to_sql(ID_TABLE, con, if_exists="replace", index=False)
+        for col in ["生徒ID", "ソース", "ソースキー", "正規化名"]:
+            con.execute(f'CREATE INDEX IF NOT EXISTS "idx_{ID_TABLE}_{col}" ON "{ID_TABLE}" ("{col}")')
+        con.commit()
+    finally:
+        con.close()
+
+    print(f"出力: {args.xlsx}")
+    print(f"DB: {args.db}（テーブル {ID_TABLE}・{REGISTRY_TABLE}）")
+    print()
+    print("【生徒ID 名寄せ】")
+    print(f"  レコード数: {len(mapping)} → 生徒ID数: {mapping['生徒ID'].nunique()}")
+    print(f"  2ソース以上にまたがる生徒: {len(multi)}名")
+    print(f"  衝突（同名の別人の可能性・つながず）: {len(conflicts)}件")
+    print(f"  名寄せ候補（表記ゆれ・要確認）: {len(candidates)}件")
+    for source, row in by_source.iterrows():
+        print(f"  {source}: {row['レコード数']}件 / {row['生徒数']}名")
+    return mapping
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
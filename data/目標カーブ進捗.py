@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+コミットの全生徒の月次投稿数を KGI の目標カーブ（0m〜6m）と比べ、
+GAP を 年月・コホート・担当MG・チーム別 に集計する。
+
+コミット_11月12月1月投稿数_集計.py は 3ヶ月（11月・12月・1月）と1つのコホートに決め打ちで比べていたが、
+ここでは 生徒 × ヶ月目 の行列と目標カーブ（長さ7）をブロードキャストして全期間の GAP を1回で出すので、
+毎月そのまま履歴全体を追える。
+
+【ロジック】
+- 0ヶ月目 = 初回の通常セッション日（セッション実施状況管理 W列）の月。k ヶ月目のカレンダー月 = 0ヶ月目 + k
+- GAP = 実績投稿数 − 目標（コミットプラン読込.EXPECTED_MONTHLY_POSTS: 0,6,15,16,16,16,11）
+- 対象セル: 基準日（--as-of。省略時は今日）の月より前（終わった月）で、投稿数が入っているもの（「ー」・空欄は除く）
+- 達成 = 実績 ≥ 目標
+- コホート = 0ヶ月目の年月（開始月）と、その期Q（期カレンダー.py）
+- チーム名: mg_monthly_analysis_results の コミットRawdata（no. で突合）
+- 生徒の投稿数・0ヶ月目・担当MG・チーム名は 特徴量ストア.py の版から読む（--version。省略時は今の Excel の版）
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import 特徴量ストア
+from コミットプラン読込 import EXPECTED_MONTHLY_POSTS, MONTH_LABELS
+from 期カレンダー import assign_term_quarter
+
+OUTPUT_PATH = Path(__file__).parent / "目標カーブ進捗結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "目標カーブ進捗.md"
+UNSET = "（未設定）"
+ROLLUPS = {  # シート名 → 集計キー
+    "年月別": "年月",
+    "コホート別": "コホート",
+    "開始期Q別": "開始期Q",
+    "担当MG別": "担当MG",
+    "チーム別": "チーム名",
+}
+CUMULATIVE_TARGET = np.cumsum(EXPECTED_MONTHLY_POSTS)
+
+
+def load_students(features):
+    """特徴量（特徴量ストア.load の結果）→ コミットの生徒（no.・生徒名・担当MG・チーム名・在学・0ヶ月目・0m〜6m）"""
+    df = 特徴量ストア.course_frame(features, "コミット").rename(columns={"ソースキー": "no."})
+    df["担当MG"] = df["担当MG"].str.strip().replace("", UNSET)
+    df["チーム名"] = df["チーム名"].replace("", UNSET)
+    df["開始月"] = pd.PeriodIndex(df["初回セッション日"], freq="M")
+    cols = ["no.", "生徒名", "担当MG", "チーム名", "在学", "開始月"] + MONTH_LABELS
+    return df[cols].reset_index(drop=True)
+
+
+def gap_cells(students, as_of):
+    """生徒 × ヶ月目 の GAP を一括計算し、対象セルだけを縦持ちにした表"""
+    posts = students[MONTH_LABELS].to_numpy(dtype=float)
+    start = students["開始月"].array.asi8.astype(float)
+    start[students["開始月"].isna().to_numpy()] = np.nan
+    k = np.arange(len(MONTH_LABELS))
+
+    calendar = start[:, None] + k[None, :]            # (生徒, 7) のカレンダー月（Period の通し番号）
+    gap = posts - EXPECTED_MONTHLY_POSTS[None, :]     # 目標カーブをそのまま全生徒に当てる
+    closed = calendar < pd.Period(as_of, freq="M").ordinal
+    mask = closed & ~np.isnan(posts)
+
+    rows, cols = np.nonzero(mask)
+    months = pd.PeriodIndex.from_ordinals(calendar[rows, cols].astype(np.int64), freq="M")
+    cohorts = students["開始月"].to_numpy()[rows]
+    cells = pd.DataFrame({
+        "no.": students["no."].to_numpy()[rows],
+        "生徒名": students["生徒名"].to_numpy()[rows],
+        "担当MG": students["担当MG"].to_numpy()[rows],
+        "チーム名": students["チーム名"].to_numpy()[rows],
+        "コホート": pd.PeriodIndex(cohorts, freq="M").strftime("%Y-%m"),
+        "ヶ月目": k[cols],
+        "年月": months.strftime("%Y-%m"),
+        "投稿数": posts[rows, cols],
+        "目標": EXPECTED_MONTHLY_POSTS[cols],
+        "GAP": gap[rows, cols],
+    })
+    cells["達成"] = cells["GAP"] >= 0
+    cells["開始期Q"] = assign_term_quarter(cells["コホート"])["期Q"].to_numpy()
+    return cells
+
+
+def student_progress(students, cells):
+    """生徒ごとの累計（終わった月までの投稿数の合計と、同じ月までの目標の合計）"""
+    per = cells.groupby("no.").agg(
+        経過月数=("ヶ月目", "count"),
+        最終ヶ月目=("ヶ月目", "max"),
+        累計投稿数=("投稿数", "sum"),
+        累計目標=("目標", "sum"),
+        達成月数=("達成", "sum"),
+    )
+    out = students[["no.", "生徒名", "担当MG", "チーム名", "在学"]].join(per, on="no.", how="inner")
+    out["開始月"] = students.set_index("no.")["開始月"].reindex(out["no."]).dt.strftime("%Y-%m").to_numpy()
+    out["累計GAP"] = out["累計投稿数"] - out["累計目標"]
+    out["目標カーブ比"] = np.round(
+        out["累計投稿数"] / out["累計目標"].where(out["累計目標"] > 0), 2)
+    return out.sort_values(["累計GAP", "no."]).reset_index(drop=True)
+
+
+def rollup(cells, key):
+    """key ごとの 生徒数・セル数・平均投稿数・平均目標・平均GAP・達成率"""
+    out = cells.groupby(key, sort=True).agg(
+        生徒数=("no.", "nunique"),
+        セル数=("GAP", "size"),
+        平均投稿数=("投稿数", "mean"),
+        平均目標=("目標", "mean"),
+        平均GAP=("GAP", "mean"),
+        達成率=("達成", "mean"),
+    )
+    out["平均投稿数"] = out["平均投稿数"].round(2)
+    out["平均目標"] = out["平均目標"].round(2)
+    out["平均GAP"] = out["平均GAP"].round(2)
+    out["達成率"] = (out["達成率"] * 100).round(1)
+    return out.reset_index()
+
+
+def gap_matrix(cells, key):
+    """key × ヶ月目 の平均GAP（どの月齢で目標から離れるかを見る）"""
+    m = cells.pivot_table(index=key, columns="ヶ月目", values="GAP", aggfunc="mean").round(2)
+    m.columns = [MONTH_LABELS[c] for c in m.columns]
+    return m.reset_index()
+
+
+def md_table(df, key):
+    lines = [
+        f"| {key} | 生徒数 | セル数 | 平均投稿数 | 平均目標 | 平均GAP | 達成率 |",
+        "|------|--------|--------|-----------|---------|---------|--------|",
+    ]
+    for _, row in df.iterrows():
+        lines.append(
+            f"| {row[key]} | {row['生徒数']} | {row['セル数']} | {row['平均投稿数']} | {row['平均目標']} | "
+            f"{row['平均GAP']:+.2f} | {row['達成率']}% |")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="月次投稿数を目標カーブと比べ、GAP を 年月・コホート・MG・チーム別に集計する")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--survey", type=Path, default=特徴量ストア.SURVEY_PATH, help="卒業時アンケートの xlsx（生徒IDの名寄せ）")
+    parser.add_argument("--claims", type=Path, default=特徴量ストア.CLAIM_PATH, help="クレーム対応の xlsx（生徒IDの名寄せ）")
+    parser.add_argument("--version", default=None, help="特徴量ストアの版（既定: 今の Excel の版）")
+    parser.add_argument("--as-of", default=None, help="基準日。この月より前の月を集計（既定: 今日。--version 指定時はその版の基準日）")
+    parser.add_argument("--store", type=Path, default=特徴量ストア.STORE_DIR, help="特徴量ストアのフォルダ")
+    parser.add_argument("--output-dir", type=Path, default=None, help="出力先フォルダ（既定: data/ と 分析結果/）")
+    args = parser.parse_args(argv)
+    output_path = args.output_dir / OUTPUT_PATH.name if args.output_dir else OUTPUT_PATH
+    report_path = args.output_dir / REPORT_PATH.name if args.output_dir else REPORT_PATH
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    features, record = 特徴量ストア.load_or_build(
+        args.version, args.commit_plan, args.mg_results, args.store, as_of=args.as_of,
+        survey_path=args.survey, claim_path=args.claims)
+    # 基準日の月はまだ途中なので「終わっていない月」にする（特徴量も同じ基準日で作る）
+    as_of = pd.Timestamp(args.as_of or record["基準日"])
+    students = load_students(features)
+    cells = gap_cells(students, as_of)
+    progress = student_progress(students, cells)
+    rollups = {sheet: rollup(cells, key) for sheet, key in ROLLUPS.items()}
+    overall = rollup(cells.assign(全体="全体"), "全体")
+
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
+        overall.to_excel(w, sheet_name="全体", index=False)
+        for sheet, df in rollups.items():
+            df.to_excel(w, sheet_name=sheet, index=False)
+        gap_matrix(cells, "コホート").to_excel(w, sheet_name="コホート×ヶ月目", index=False)
+        gap_matrix(cells, "年月").to_excel(w, sheet_name="年月×ヶ月目", index=False)
+        progress.to_excel(w, sheet_name="生徒別", index=False)
+        cells.to_excel(w, sheet_name="セル一覧", index=False)
+
+    total = overall.iloc[0]
+    report_lines = [
+        f"# 目標カーブ進捗（基準日: {as_of:%Y-%m-%d}）",
+        "",
+        f"特徴量: {record['version']}（{record['基準日']} 時点）",
+        "",
+        f"目標カーブ（0m〜6m）: {', '.join(str(int(v)) for v in EXPECTED_MONTHLY_POSTS)}"
+        f"（累計 {int(CUMULATIVE_TARGET[-1])}）",
+        "",
+        "## 全体",
+        "",
+        f"- **対象**: {total['生徒数']}名・{total['セル数']}セル（生徒 × 終わった月）",
+        f"- **平均GAP**: {total['平均GAP']:+.2f}投稿 / 月",
+        f"- **達成率**: {total['達成率']}%",
+    ]
+    for sheet, key in ROLLUPS.items():
+        report_lines.extend(["", f"## {sheet}", ""])
+        report_lines.extend(md_table(rollups[sheet], key))
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **投稿数**: `コミットプラン (4).xlsx`「新 月次投稿数」P〜V列（0〜6ヶ月目）",
+        "- **0ヶ月目**: 「セッション実施状況管理」W列（初回の通常セッション日）の月",
+        "- **チーム名**: `［最新版］mg_monthly_analysis_results_v1.1.xlsx` の コミットRawdata",
+        "- **対象セル**: 基準日の月より前の月で、投稿数が入っているもの（「ー」・空欄は除く）",
+        "- **GAP**: 実績 − 目標、**達成率**: 実績 ≥ 目標 のセルの割合",
+        "",
+        "---",
+        "*出力: 目標カーブ進捗.py*",
+    ])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
+    print()
+    print(f"【目標カーブ進捗】基準日 {as_of:%Y-%m-%d}")
+    print(f"  対象: {total['生徒数']}名・{total['セル数']}セル / 平均GAP {total['平均GAP']:+.2f} / 達成率 {total['達成率']}%")
+    recent = rollups["年月別"].tail(3)
+    for _, row in recent.iterrows():
+        print(f"  {row['年月']}: 平均 {row['平均投稿数']}（目標 {row['平均目標']}）GAP {row['平均GAP']:+.2f}")
+    return cells
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
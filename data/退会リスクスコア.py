@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+在学中の生徒全員の退会リスクを一括でスコアリングし、担当MG別のリスク順リストを出力する。
+
+既存の集計は卒業生を振り返るものだけなので、「新 月次投稿数」の 在学=在学中 の生徒を対象に、
+今の時点で分かる材料からリスクを 0〜100 で出す（毎朝数秒で更新できるよう、全員分を配列演算1回で計算）。
+
+生徒の投稿数・初速・担当MG・セッション日は 特徴量ストア.py の版から読む（--version。省略時は今の Excel の版）。
+
+【材料（0〜1 に揃えてから重み付き平均。材料がない生徒はその項目を除いて平均する）】
+- 投稿の停滞   : 直近 RECENT_MONTHS ヶ月（経過済みの月）の投稿数 ÷ 期待投稿数（EXPECTED_MONTHLY_POSTS）が低いほど高い
+- 初速の遅れ   : 初めて投稿した月（特徴量の初速。経過済みの月のみ）が 1ヶ月目より遅いほど高い。まだ投稿がなく2ヶ月目以降なら 1
+- セッション間隔: 最後のセッション（特徴量の最終セッション日。なければ最終サポート日）からの日数が SESSION_GRACE_DAYS を超えるほど高い
+                  （最終セッション日は版の基準日までに実施したもの。基準日がそれより前なら、それ以降の日付は使わない）
+基準日は --as-of（省略時は今日、--version 指定時はその版の基準日）。版の基準日より後を指定したときは、その間の記録がないことをレポートに書く
+- 満足度       : 卒業時アンケートに回答があれば、サービス全体・コーチングマネージャーの満足度（10点満点）が低いほど高い
+- クレーム     : クレーム対応に名前があれば 1
+（アンケート・クレームは生徒名を 名前正規化.py で正規化して突き合わせる）
+
+【リスク区分】高: HIGH_RISK 以上、中: MEDIUM_RISK 以上、低: それ未満
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import アンケート読込
+import コミットプラン読込
+import 特徴量ストア
+from アンケート読込 import (
+    CLAIM_COL_STUDENT, CLAIM_PATH, SURVEY_COL_MG_SATISFACTION, SURVEY_COL_NAME, SURVEY_COL_SATISFACTION, SURVEY_PATH,
+    claim_names,
+)
+from コミットプラン読込 import EXPECTED_MONTHLY_POSTS, MONTH_LABELS
+from 名前正規化 import normalize_names
+
+OUTPUT_PATH = Path(__file__).parent / "退会リスクスコア結果.xlsx"
+REPORT_PATH = Path(__file__).parent.parent / "分析結果" / "退会リスクスコア.md"
+
+RECENT_MONTHS = 2
+SESSION_GRACE_DAYS = 14  # これ以内なら間隔のリスクは 0
+SESSION_FULL_DAYS = 45   # これ以上空いたら 1
+
+WEIGHTS = {
+    "投稿の停滞": 0.35,
+    "初速の遅れ": 0.15,
+    "セッション間隔": 0.30,
+    "満足度": 0.10,
+    "クレーム": 0.10,
+}
+HIGH_RISK = 60
+MEDIUM_RISK = 35
+TOP_PER_MG = 10  # レポートに載せる MG ごとの人数
+
+
+def elapsed_months(start, as_of):
+    """初回セッション日 → 基準日が何ヶ月目か（初回セッションの月 = 0）"""
+    start = pd.to_datetime(start)
+    return (as_of.year - start.dt.year) * 12 + (as_of.month - start.dt.month)
+
+
+def survey_signals(path=SURVEY_PATH):
+    """正規化名 → 満足度（サービス全体・MG の平均。同じ名前の回答が複数あれば最新）"""
+    if not Path(path).exists():
+        return pd.Series(dtype=float, name="満足度")
+    survey = アンケート読込.load_survey(path)
+    scores = survey[[SURVEY_COL_SATISFACTION, SURVEY_COL_MG_SATISFACTION]].apply(
+        コミットプラン読込.to_num_series)
+    df = pd.DataFrame({"正規化名": normalize_names(survey[SURVEY_COL_NAME]), "満足度": scores.mean(axis=1)})
+    df = df[(df["正規化名"] != "") & df["満足度"].notna()]
+    return df.drop_duplicates("正規化名", keep="last").set_index("正規化名")["満足度"]
+
+
+def claim_counts(path=CLAIM_PATH):
+    """正規化名 → クレーム件数"""
+    if not Path(path).exists():
+        return pd.Series(dtype=int, name="クレーム件数")
+    claim = アンケート読込.load_claims(path)
+    names = normalize_names(claim_names(claim[CLAIM_COL_STUDENT]))
+    return names[names != ""].value_counts().rename("クレーム件数")
+
+
+def load_inputs(features, survey_path=SURVEY_PATH, claim_path=CLAIM_PATH):
+    """特徴量（特徴量ストア.load の結果）→ 在学中のコミット生徒（no.・生徒名・担当MG・初回セッション日・
+    最終セッション日・最終サポート日・0m〜6m・初速）とアンケート・クレーム"""
+    commit = 特徴量ストア.course_frame(features, "コミット").rename(columns={"ソースキー": "no."})
+    students = commit[commit["在学"] == コミットプラン読込.ENROLLED_STATUS]
+    return students.reset_index(drop=True), survey_signals(survey_path), claim_counts(claim_path)
+
+
+def last_session_dates(students, as_of):
+    """基準日までの最終セッション日（基準日より後なら使わない。なければ最終サポート日）"""
+    held = students["最終セッション日"]
+    support = students["最終サポート日"]
+    return held.where(held <= as_of).fillna(support.where(support <= as_of))
+
+
+def score(students, surveys, claims, as_of):
+    """リスクの材料・スコア・区分を一括で計算する（1行 = 在学中の生徒1人）"""
+    as_of = pd.Timestamp(as_of).normalize()
+    posts = students[MONTH_LABELS].to_numpy(dtype=float)
+
+    # 経過済みの月（当月は途中なので含めない）。初回セッション日がなければ材料なし
+    current = elapsed_months(students["初回セッション日"], as_of).to_numpy(dtype=float)
+    cols = np.arange(len(MONTH_LABELS))
+    done = cols[None, :] < np.clip(current, 0, len(MONTH_LABELS))[:, None]
+    recent = done & (cols[None, :] >= (np.clip(current, 0, len(MONTH_LABELS)) - RECENT_MONTHS)[:, None])
+    observed = recent & ~np.isnan(posts)
+    expected = np.where(observed, EXPECTED_MONTHLY_POSTS[None, :], 0).sum(axis=1)
+    actual = np.where(observed, posts, 0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stall = np.where(expected > 0, 1 - np.minimum(actual / expected, 1), np.nan)
+
+    # 初速が経過済みの月なら初投稿済み（当月の投稿はまだ数えない）
+    speed = students["初速"].to_numpy(dtype=float)
+    first_post = np.where(speed < current, speed, np.nan)
+    late = np.where(~np.isnan(first_post), np.clip((first_post - 1) / 2, 0, 1),
+                    np.where(current >= 2, 1.0, 0.0))
+    late = np.where(np.isnan(current), np.nan, late)
+
+    last_session = last_session_dates(students, as_of)
+    days = (as_of - last_session).dt.days.to_numpy(dtype=float)
+    gap = np.clip((days - SESSION_GRACE_DAYS) / (SESSION_FULL_DAYS - SESSION_GRACE_DAYS), 0, 1)
+
+    key = normalize_names(students["生徒名"])
+    satisfaction = key.map(surveys).to_numpy(dtype=float)
+    unsatisfied = np.clip((10 - satisfaction) / 10, 0, 1)
+    claim_n = key.map(claims).fillna(0).to_numpy(dtype=float)
+    claim = (claim_n > 0).astype(float)
+
+    parts = np.column_stack([stall, late, gap, unsatisfied, claim])
+    weights = np.array(list(WEIGHTS.values()))
+    available = ~np.isnan(parts)
+    w = np.where(available, weights[None, :], 0)
+    with np.errstate(invalid="ignore"):
+        risk = 100 * np.nansum(parts * w, axis=1) / w.sum(axis=1)
+
+    out = students[["no.", "生徒名", "担当MG", "初回セッション日"]].copy()
+    out["最終セッション日"] = last_session
+    out["経過月"] = current
+    out["直近投稿数"] = np.where(expected > 0, actual, np.nan)
+    out["直近期待投稿数"] = np.where(expected > 0, expected, np.nan)
+    out["初速_初投稿月"] = first_post
+    out["最終セッションからの日数"] = days
+    out["満足度"] = satisfaction
+    out["クレーム件数"] = claim_n.astype(int)
+    for k, name in enumerate(WEIGHTS):
+        out[f"リスク_{name}"] = np.round(parts[:, k], 2)
+    out["リスクスコア"] = np.round(risk, 1)
+    out["リスク区分"] = np.select([risk >= HIGH_RISK, risk >= MEDIUM_RISK], ["高", "中"], "低")
+    out["担当MG"] = out["担当MG"].replace("", "（未設定）").fillna("（未設定）")
+    return out.sort_values(["リスクスコア", "no."], ascending=[False, True], na_position="last").reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在学中の生徒の退会リスクを一括スコアリングする")
+    parser.add_argument("--commit-plan", type=Path, default=None, help="コミットプラン (4).xlsx")
+    parser.add_argument("--mg-results", type=Path, default=None, help="mg_monthly_analysis_results の xlsx")
+    parser.add_argument("--survey", type=Path, default=SURVEY_PATH, help="卒業時アンケートの xlsx")
+    parser.add_argument("--claims", type=Path, default=CLAIM_PATH, help="クレーム対応の xlsx")
+    parser.add_argument("--version", default=None, help="特徴量ストアの版（既定: 今の Excel の版）")
+    parser.add_argument("--as-of", default=None, help="基準日（既定: 今日。--version 指定時はその版の基準日）")
+    parser.add_argument("--store", type=Path, default=特徴量ストア.STORE_DIR, help="特徴量ストアのフォルダ")
+    parser.add_argument("--output-dir", type=Path, default=None, help="出力先フォルダ（既定: data/ と 分析結果/）")
+    args = parser.parse_args(argv)
+    output_path = args.output_dir / OUTPUT_PATH.name if args.output_dir else OUTPUT_PATH
+    report_path = args.output_dir / REPORT_PATH.name if args.output_dir else REPORT_PATH
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    features, record = 特徴量ストア.load_or_build(
+        args.version, args.commit_plan, args.mg_results, args.store, as_of=args.as_of,
+        survey_path=args.survey, claim_path=args.claims)
+    as_of = pd.Timestamp(args.as_of or record["基準日"])
+    # 最終セッション日は版の基準日までしか入っていないので、それより後の基準日では日数が伸びるだけになる
+    stale = as_of > pd.Timestamp(record["基準日"])
+    stale_note = (f"※ 基準日 {as_of:%Y-%m-%d} は特徴量の基準日 {record['基準日']} より後です。"
+                  "その間のセッション・投稿は入っていないため、リスクは高めに出ます")
+    students, surveys, claims = load_inputs(features, args.survey, args.claims)
+    t_load = time.perf_counter() - t0
+    result = score(students, surveys, claims, as_of)
+    t_score = time.perf_counter() - t0 - t_load
+
+    by_mg = result.groupby("担当MG").agg(
+        在学人数=("no.", "count"),
+        高リスク=("リスク区分", lambda s: int((s == "高").sum())),
+        中リスク=("リスク区分", lambda s: int((s == "中").sum())),
+        平均リスクスコア=("リスクスコア", "mean"),
+    ).round(1).sort_values(["高リスク", "平均リスクスコア"], ascending=False).reset_index()
+
+    with pd.ExcelWriter(output_path, engine="openpyxl") as w:
+        result.to_excel(w, sheet_name="リスク順", index=False)
+        by_mg.to_excel(w, sheet_name="担当MG別", index=False)
+
+    report_lines = [
+        f"# 退会リスクスコア（基準日: {as_of:%Y-%m-%d}）",
+        "",
+        f"特徴量: {record['version']}（{record['基準日']} 時点）",
+        "",
+    ]
+    if stale:
+        report_lines.extend([stale_note, ""])
+    report_lines += [
+        "## 担当MG別",
+        "",
+        "| 担当MG | 在学人数 | 高リスク | 中リスク | 平均リスクスコア |",
+        "|--------|---------|---------|---------|----------------|",
+    ]
+    for _, row in by_mg.iterrows():
+        report_lines.append(
+            f"| {row['担当MG']} | {row['在学人数']} | {row['高リスク']} | {row['中リスク']} | {row['平均リスクスコア']} |")
+    report_lines.extend(["", f"## 担当MG別 リスク上位（各 {TOP_PER_MG} 名まで、中・高のみ）"])
+    for mg, group in result[result["リスク区分"] != "低"].groupby("担当MG", sort=False):
+        report_lines.extend([
+            "",
+            f"### {mg}",
+            "",
+            "| no. | 生徒名 | スコア | 区分 | 経過月 | 直近投稿数／期待 | 最終セッションから |",
+            "|-----|--------|--------|------|--------|-----------------|------------------|",
+        ])
+        for _, row in group.head(TOP_PER_MG).iterrows():
+            recent = (f"{int(row['直近投稿数'])}／{int(row['直近期待投稿数'])}"
+                      if pd.notna(row["直近投稿数"]) else "ー")
+            days = f"{int(row['最終セッションからの日数'])}日" if pd.notna(row["最終セッションからの日数"]) else "ー"
+            elapsed = f"{int(row['経過月'])}ヶ月目" if pd.notna(row["経過月"]) else "ー"
+            report_lines.append(
+                f"| {row['no.']} | {row['生徒名']} | {row['リスクスコア']} | {row['リスク区分']} | {elapsed} | {recent} | {days} |")
+    report_lines.extend([
+        "",
+        "---",
+        "",
+        "## データ出所・定義",
+        "",
+        "- **対象**: `コミットプラン (4).xlsx`「新 月次投稿数」の 在学=在学中（特徴量ストア.py の版）",
+        "- **最終セッション日**: 「セッション実施状況管理」V〜AH列（0〜12回目の実施日）のうち版の基準日までの最大、なければ最終サポート日",
+        f"- **期待投稿数**: 0m〜6m = {', '.join(str(int(v)) for v in EXPECTED_MONTHLY_POSTS)}",
+        "- **重み**: " + "、".join(f"{k} {v:.0%}" for k, v in WEIGHTS.items()) + "（材料がない項目は除いて再配分）",
+        f"- **区分**: 高 {HIGH_RISK} 以上・中 {MEDIUM_RISK} 以上",
+        "",
+        "---",
+        "*出力: 退会リスクスコア.py*",
+    ])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(report_lines))
+
+    print(f"出力: {output_path}")
+    print(f"レポート: {report_path}")
+    print()
+    print(f"【退会リスクスコア】基準日 {as_of:%Y-%m-%d}（読込 {t_load:.1f}秒 / 計算 {t_score * 1000:.0f}ms）")
+    print(f"  在学中: {len(result)}名 / 高: {int((result['リスク区分'] == '高').sum())}名 / "
+          f"中: {int((result['リスク区分'] == '中').sum())}名")
+    if stale:
+        print(f"  {stale_note}")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
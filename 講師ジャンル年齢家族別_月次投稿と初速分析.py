@@ -46,8 +46,8 @@ def first_post_month(row):
     return np.nan
 
 
-def load_data():
-    df = pd.read_excel(INPUT_PATH, sheet_name=SHEET, header=None)
+def load_data(input_path=None):
+    df = pd.read_excel(input_path or INPUT_PATH, sheet_name=SHEET, header=None)
     rows = []
     for i in range(DATA_START_ROW, len(df)):
         no_ = df.iloc[i, COL_NO]
@@ -96,13 +96,14 @@ def aggregate_by(df, group_col, label):
     return g
 
 
-def main():
-    df = load_data()
+def main(input_path=None, output_dir=None):
+    df = load_data(input_path)
     print(f"総レコード数: {len(df)}")
     print()
 
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = OUTPUT_DIR / "講師ジャンル年齢家族別_月次投稿と初速分析.xlsx"
+    output_dir = Path(output_dir or OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    out_path = output_dir / "講師ジャンル年齢家族別_月次投稿と初速分析.xlsx"
 
     with pd.ExcelWriter(out_path, engine="openpyxl") as w:
         # 講師別